@@ -0,0 +1,44 @@
+from datetime import date
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.db import get_session
+from app.models import AnalyticsSummary, Job, JobRead, User
+from app.services.analytics import get_summary
+from app.services.job_handlers import ANALYTICS_REBUILD
+from app.services.jobs import enqueue_job, job_worker
+
+router = APIRouter()
+
+
+@router.get("/analytics/summary", response_model=AnalyticsSummary)
+async def read_analytics_summary(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+    date_from: date | None = None,
+    date_to: date | None = None,
+    top_clients: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> AnalyticsSummary:
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    return await get_summary(
+        session, current_user.id, date_from, date_to, top_clients=top_clients
+    )
+
+
+@router.post("/analytics/rebuild", response_model=JobRead, status_code=202)
+async def rebuild_analytics(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> Job:
+    """Recompute the caller's rollups from scratch in the background."""
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    job = enqueue_job(session, current_user.id, ANALYTICS_REBUILD)
+    await session.commit()
+    await session.refresh(job)
+    job_worker.wake()
+    return job
@@ -1,16 +1,21 @@
+import uuid
 from datetime import timedelta
+
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_sso.sso.google import GoogleSSO
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
-from app.db import get_session
+
 from app.core.config import settings
-from app.security import create_access_token, verify_password
-from app.models import User, Token
-from fastapi_sso.sso.google import GoogleSSO
-from app.security import get_password_hash
-import uuid
+from app.db import get_session
+from app.models import Token, User
+from app.security import (
+    create_access_token,
+    get_password_hash_async,
+    verify_and_update_password,
+)
 
 router = APIRouter()
 
@@ -32,10 +37,20 @@ async def login_access_token(
 ) -> Token:
     result = await session.execute(select(User).where(User.email == form_data.username))
     user = result.scalars().first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    verified, new_hash = await verify_and_update_password(
+        form_data.password, user.hashed_password
+    )
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    if new_hash:
+        # Stored hash predates the current argon2 parameters; upgrade it.
+        user.hashed_password = new_hash
+        session.add(user)
+        await session.commit()
 
     if not user.id:
         raise HTTPException(status_code=500, detail="User ID missing")
@@ -85,7 +100,7 @@ async def google_callback(
             user = User(
                 email=user_info.email,
                 full_name=user_info.display_name,
-                hashed_password=get_password_hash(password),
+                hashed_password=await get_password_hash_async(password),
                 provider="google",
                 provider_id=user_info.id,
                 is_active=True,
@@ -1,13 +1,17 @@
+import uuid
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError, jwt
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db import get_session
+from sqlmodel import select
+
 from app.core.config import settings
+from app.db import get_session
 from app.models import User
 from app.security import ALGORITHM
-from sqlmodel import select
+from app.services.user_cache import user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/auth/access-token")
 
@@ -16,22 +20,39 @@ class TokenPayload(BaseModel):
     sub: str | None = None
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
-    token: str = Depends(reusable_oauth2),  # pyright: ignore[reportCallInDefaultInitializer]
-) -> User:
+async def authenticate(session: AsyncSession, token: str) -> User:
+    """Resolve a bearer token to its active user, raising HTTPException."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
         token_data = TokenPayload(**payload)  # pyright: ignore[reportAny]
+        user_id = uuid.UUID(token_data.sub)
     except (JWTError, Exception):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    result = await session.execute(select(User).where(User.id == token_data.sub))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user = user_cache.get(user_id)
+    if user is None:
+        result = await session.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        user_cache.set(user)
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    token: str = Depends(reusable_oauth2),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> User:
+    return await authenticate(session, token)
+
+
+async def get_current_superuser(
+    current_user: User = Depends(get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough privileges")
+    return current_user
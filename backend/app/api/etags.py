@@ -0,0 +1,49 @@
+import hashlib
+
+from fastapi import HTTPException, Response
+
+# Clients may keep a copy but must revalidate it on every use; a matching
+# ETag then costs a 304 with no body. "private" keeps shared caches out.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """A strong ETag from the values that determine a representation."""
+    digest = hashlib.sha256("\0".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _entity_tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def matches_if_none_match(header: str | None, etag: str) -> bool:
+    """True when the client's copy is current (weak comparison, RFC 9110)."""
+    if not header:
+        return False
+    tags = _entity_tags(header)
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def check_if_match(header: str | None, etag: str) -> None:
+    """Raise 412 unless ``If-Match`` is absent or names ``etag`` (strong comparison)."""
+    if header is None:
+        return
+    tags = _entity_tags(header)
+    if "*" not in tags and etag not in tags:
+        raise HTTPException(
+            status_code=412,
+            detail="Invoice has changed since it was read",
+            headers={"ETag": etag},
+        )
+
+
+def set_validators(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag)
+    return response
@@ -0,0 +1,31 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_session
+
+router = APIRouter()
+
+
+@router.get("/health/live")
+async def liveness() -> dict[str, str]:
+    """The process is up and its event loop is responsive."""
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness(
+    request: Request,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> dict[str, str]:
+    """Startup has finished, shutdown has not begun and the database answers."""
+    if not getattr(request.app.state, "ready", False):  # pyright: ignore[reportAny]
+        raise HTTPException(status_code=503, detail="Starting up or draining")
+    try:
+        _ = await asyncio.wait_for(session.execute(text("SELECT 1")), timeout=2.0)
+    except (SQLAlchemyError, OSError, TimeoutError):
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ready"}
@@ -1,30 +1,272 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Response
-from sqlmodel import select
+from collections.abc import Awaitable
+from datetime import datetime
+from typing import Annotated, Any, Literal, TypeVar
+
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Select,
+    String,
+    Text,
+    func,
+    literal,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db import get_session
-from app.models import Invoice, InvoiceCreate, InvoiceUpdate, User
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import col, select
+
 from app.api import deps
-from app.services.pdf_service import generate_pdf
+from app.api.etags import (
+    check_if_match,
+    make_etag,
+    matches_if_none_match,
+    not_modified,
+    set_validators,
+)
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.responses import PydanticJSONResponse
+from app.core.config import settings
+from app.db import get_session
+from app.models import (
+    EmailBatchResult,
+    EmailDelivery,
+    EmailOutbox,
+    Invoice,
+    InvoiceCreate,
+    InvoiceEmailBatchRequest,
+    InvoiceEmailRequest,
+    InvoiceFilter,
+    InvoiceImport,
+    InvoiceImportResult,
+    InvoicePage,
+    InvoiceSearchPage,
+    InvoiceSummary,
+    InvoiceUpdate,
+    Job,
+    JobRead,
+    User,
+    invoice_search_vector,
+)
+from app.services.analytics import record_invoice_change, rollup_key
+from app.services.export_service import (
+    open_pdf_export,
+    stream_invoice_export,
+    stream_invoice_pdfs_zip,
+)
+from app.services.import_service import ImportTooLarge, import_invoices
+from app.services.invoice_numbers import assign_invoice_numbers
+from app.services.invoice_queries import filter_invoices, search_tsquery
+from app.services.job_handlers import INVOICES_EXPORT_PDF
+from app.services.jobs import enqueue_job, job_worker
+from app.services.line_items import (
+    InvalidLineItem,
+    InvoiceTotals,
+    apply_totals,
+    replace_line_items,
+)
+from app.services.mailer import email_worker
+from app.services.pdf_cache import pdf_cache
+from app.services.pdf_service import (
+    invoice_pdf_source,
+    render_invoice_html,
+    render_invoice_pdf,
+    render_pdf_source,
+)
+from app.services.preview import pdf_to_png, png_supported, preview_coalescer
+from app.services.render_pool import RenderPoolSaturated, RenderTimeout, render_pool
+from app.services.templates import load_user_templates, template_for
+from app.services.usage import consume_invoices, month_start, release_invoices
 
 router = APIRouter()
 
+_T = TypeVar("_T")
+
+# Scalar columns of InvoiceSummary. Lists never load the ``content`` JSON,
+# which holds every line item and dominates row size. Queries over them use
+# SQLAlchemy's select(): sqlmodel's only has overloads for up to four columns.
+SUMMARY_COLUMNS = tuple(
+    col(getattr(Invoice, name))  # pyright: ignore[reportAny]
+    for name in InvoiceSummary.model_fields
+)
+
+
+def _compute_totals(invoice: Invoice) -> InvoiceTotals:
+    try:
+        return apply_totals(invoice)
+    except InvalidLineItem as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _rendered(render: Awaitable[_T]) -> _T:
+    """Await a render-pool job, mapping pool backpressure to HTTP errors."""
+    try:
+        return await render
+    except RenderPoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="PDF renderer is busy, try again shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except RenderTimeout:
+        raise HTTPException(status_code=504, detail="PDF rendering timed out")
+
+
+async def _commit_or_conflict(session: AsyncSession) -> None:
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Invoice number already exists")
+    except StaleDataError:
+        # The version-checked UPDATE/DELETE matched no row: another request
+        # changed the invoice after this one read it.
+        await session.rollback()
+        raise HTTPException(
+            status_code=409, detail="Invoice was changed by another request"
+        )
+
+
+def invoice_etag(invoice: Invoice | InvoiceSummary) -> str:
+    return make_etag(invoice.id, invoice.version)
+
+
+def invoice_filter_params(
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    status: str | None = None,
+    client_name: str | None = None,
+    invoice_number: str | None = None,
+    ids: Annotated[list[uuid.UUID] | None, Query()] = None,
+) -> InvoiceFilter:
+    return InvoiceFilter(
+        date_from=date_from,
+        date_to=date_to,
+        status=status,
+        client_name=client_name,
+        invoice_number=invoice_number,
+        ids=ids,
+    )
+
+
+def list_invoices_query(
+    user_id: uuid.UUID | None,
+    filters: InvoiceFilter,
+    after: tuple[datetime, uuid.UUID] | None = None,
+) -> Select[Any]:  # pyright: ignore[reportExplicitAny]
+    # Newest first; (date, id) is unique so the order is stable under inserts
+    # and a page can resume from the last row seen instead of an OFFSET.
+    query = filter_invoices(
+        sa.select(*SUMMARY_COLUMNS).where(col(Invoice.user_id) == user_id),
+        filters,
+    )
+    if after:
+        query = query.where(
+            tuple_(col(Invoice.date), col(Invoice.id))
+            < tuple_(literal(after[0]), literal(after[1]))
+        )
+    return query.order_by(col(Invoice.date).desc(), col(Invoice.id).desc())
+
+
+def search_invoices_query(
+    user_id: uuid.UUID | None,
+    tsquery: ColumnElement[Any],  # pyright: ignore[reportExplicitAny]
+    after: tuple[float, uuid.UUID] | None = None,
+) -> Select[Any]:  # pyright: ignore[reportExplicitAny]
+    # Best match first; id breaks ties so (rank, id) can serve as a cursor.
+    rank = func.ts_rank(invoice_search_vector, tsquery, type_=Float)
+    query = sa.select(*SUMMARY_COLUMNS, rank.label("rank")).where(
+        col(Invoice.user_id) == user_id,
+        invoice_search_vector.bool_op("@@")(tsquery),
+    )
+    if after:
+        query = query.where(
+            tuple_(rank, col(Invoice.id)) < tuple_(literal(after[0]), literal(after[1]))
+        )
+    return query.order_by(rank.desc(), col(Invoice.id).desc())
+
 
-@router.get("/invoices/", response_model=list[Invoice])
+@router.get("/invoices/", response_model=InvoicePage)
 async def read_invoices(
     session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
     current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
-    skip: int = 0,
-    limit: int = 100,
-) -> list[Invoice]:
-    query = (
-        select(Invoice)
-        .where(Invoice.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-    )
-    result = await session.execute(query)
-    return list(result.scalars().all())
+    filters: InvoiceFilter = Depends(invoice_filter_params),  # pyright: ignore[reportCallInDefaultInitializer]
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    after = None
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor, 2)
+        try:
+            after = (
+                datetime.fromisoformat(str(cursor_date)),
+                uuid.UUID(str(cursor_id)),
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    query = list_invoices_query(current_user.id, filters, after)
+    result = await session.execute(query.limit(limit + 1))
+    # The columns are InvoiceSummary's fields in order and already typed by
+    # the table, so the rows are encoded as they are instead of being built
+    # into models and validated twice.
+    invoices = [dict(row) for row in result.mappings()]
+    next_cursor = None
+    if len(invoices) > limit:
+        invoices = invoices[:limit]
+        last = invoices[-1]
+        next_cursor = encode_cursor(last["date"].isoformat(), str(last["id"]))
+    # Every change to a listed invoice bumps its version, so the ids and
+    # versions on the page pin down the whole body.
+    etag = make_etag(*(f"{i['id']}.{i['version']}" for i in invoices), next_cursor)
+    if matches_if_none_match(if_none_match, etag):
+        return not_modified(etag)
+    response = PydanticJSONResponse({"items": invoices, "next_cursor": next_cursor})
+    set_validators(response, etag)
+    return response
+
+
+@router.get("/invoices/search", response_model=InvoiceSearchPage)
+async def search_invoices(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> Response:
+    """Invoices matching every word of ``q`` as a prefix, best match first.
+
+    Looks at the invoice number, client name and email, and line-item
+    descriptions, in that order of weight.
+    """
+    tsquery = search_tsquery(q)
+    if tsquery is None:
+        return PydanticJSONResponse({"items": [], "next_cursor": None})
+    after = None
+    if cursor:
+        cursor_rank, cursor_id = decode_cursor(cursor, 2)
+        try:
+            after = (float(cursor_rank), uuid.UUID(str(cursor_id)))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    query = search_invoices_query(current_user.id, tsquery, after)
+    result = await session.execute(query.limit(limit + 1))
+    hits = [dict(row) for row in result.mappings()]
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1]["rank"], str(hits[-1]["id"]))
+    return PydanticJSONResponse({"items": hits, "next_cursor": next_cursor})
 
 
 @router.post("/invoices/", response_model=Invoice)
@@ -33,14 +275,185 @@ async def create_invoice(
     session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
     invoice_in: InvoiceCreate,
     current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
-) -> Invoice:
+) -> Response:
     if not current_user.id:
         raise HTTPException(status_code=400, detail="User ID is missing")
     invoice = Invoice(**invoice_in.model_dump(), user_id=current_user.id)  # pyright: ignore[reportAny]
+    totals = _compute_totals(invoice)
+    await consume_invoices(session, current_user.id)
+    await assign_invoice_numbers(session, current_user.id, [invoice])
     session.add(invoice)
-    await session.commit()
+    await replace_line_items(session, invoice, totals)
+    await record_invoice_change(session, None, rollup_key(invoice))
+    await _commit_or_conflict(session)
     await session.refresh(invoice)
-    return invoice
+    return PydanticJSONResponse(invoice)
+
+
+@router.post("/invoices/import", response_model=InvoiceImportResult)
+async def bulk_import_invoices(
+    *,
+    request: Request,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+    idempotency_key: Annotated[str | None, Header(max_length=255)] = None,
+) -> InvoiceImportResult:
+    """Create many invoices from a JSON array or NDJSON (application/x-ndjson) body.
+
+    Valid rows are inserted and invalid ones reported per row. Retrying with
+    the same Idempotency-Key returns the first attempt's result unchanged.
+    """
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+
+    if idempotency_key:
+        # A concurrent retry blocks on this insert until the first attempt
+        # commits, then finds its stored result instead of importing twice.
+        claimed = await session.execute(
+            insert(InvoiceImport)
+            .values(user_id=current_user.id, idempotency_key=idempotency_key)
+            .on_conflict_do_nothing()
+            .returning(col(InvoiceImport.idempotency_key))
+        )
+        if claimed.first() is None:
+            previous = await session.get(
+                InvoiceImport, (current_user.id, idempotency_key)
+            )
+            if previous is None or previous.result is None:
+                raise HTTPException(
+                    status_code=409, detail="Import already in progress"
+                )
+            return InvoiceImportResult.model_validate(previous.result)
+
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    try:
+        result = await import_invoices(
+            session, current_user.id, await request.body(), ndjson
+        )
+    except ImportTooLarge as e:
+        await session.rollback()
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if idempotency_key:
+        _ = await session.execute(
+            update(InvoiceImport)
+            .where(
+                col(InvoiceImport.user_id) == current_user.id,
+                col(InvoiceImport.idempotency_key) == idempotency_key,
+            )
+            .values(result=result.model_dump(mode="json"))
+        )
+    await session.commit()
+    return result
+
+
+@router.post("/invoices/export/pdf")
+async def export_invoice_pdfs(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    export_in: InvoiceFilter,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> StreamingResponse:
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    count, templates, invoices = await open_pdf_export(
+        session, current_user.id, export_in
+    )
+    if not count:
+        raise HTTPException(status_code=404, detail="No invoices match the filter")
+
+    return StreamingResponse(
+        stream_invoice_pdfs_zip(invoices, current_user, templates=templates),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="invoices.zip"'},
+    )
+
+
+@router.post("/invoices/export/pdf/jobs", response_model=JobRead, status_code=202)
+async def start_invoice_pdf_export(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    export_in: InvoiceFilter,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> Job:
+    """Like POST /invoices/export/pdf, but built by a background job.
+
+    Poll GET /jobs/{id} for progress and fetch the archive from
+    GET /jobs/{id}/download once it has succeeded.
+    """
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    job = enqueue_job(
+        session,
+        current_user.id,
+        INVOICES_EXPORT_PDF,
+        export_in.model_dump(mode="json", exclude_unset=True),
+    )
+    await session.commit()
+    await session.refresh(job)
+    job_worker.wake()
+    return job
+
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@router.get("/invoices/export")
+async def export_invoices(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+    filters: InvoiceFilter = Depends(invoice_filter_params),  # pyright: ignore[reportCallInDefaultInitializer]
+    export_format: Annotated[Literal["csv", "ndjson"], Query(alias="format")] = "csv",
+) -> StreamingResponse:
+    query = filter_invoices(
+        sa.select(*SUMMARY_COLUMNS, col(Invoice.content)).where(
+            col(Invoice.user_id) == current_user.id
+        ),
+        filters,
+    ).order_by(col(Invoice.date), col(Invoice.id))
+    return StreamingResponse(
+        stream_invoice_export(session, query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="invoices.{export_format}"'
+        },
+    )
+
+
+@router.post("/invoices/email", response_model=EmailBatchResult, status_code=202)
+async def email_invoices(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    batch_in: InvoiceEmailBatchRequest,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> EmailBatchResult:
+    """Queue every matching invoice for delivery to its client_email."""
+    has_email = func.coalesce(col(Invoice.client_email), "") != ""
+    matching = filter_invoices(
+        select(func.count()).where(Invoice.user_id == current_user.id),
+        batch_in.filters,
+    )
+    skipped = (await session.execute(matching.where(~has_email))).scalar_one()
+    # One INSERT ... SELECT, however large the month-end batch is.
+    source = filter_invoices(
+        sa.select(
+            func.gen_random_uuid(),
+            col(Invoice.user_id),
+            col(Invoice.id),
+            col(Invoice.client_email),
+            literal(batch_in.subject, type_=String),
+            literal(batch_in.message or "", type_=Text),
+        ).where(col(Invoice.user_id) == current_user.id, has_email),
+        batch_in.filters,
+    )
+    result = await session.execute(
+        insert(EmailOutbox).from_select(
+            ["id", "user_id", "invoice_id", "recipient", "subject", "body"], source
+        )
+    )
+    await session.commit()
+    email_worker.wake()
+    return EmailBatchResult(queued=result.rowcount, skipped=skipped)  # pyright: ignore[reportAttributeAccessIssue]
 
 
 @router.get("/invoices/{invoice_id}", response_model=Invoice)
@@ -49,7 +462,8 @@ async def read_invoice(
     session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
     invoice_id: uuid.UUID,
     current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
-) -> Invoice:
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
     result = await session.execute(
         select(Invoice).where(
             Invoice.id == invoice_id, Invoice.user_id == current_user.id
@@ -58,7 +472,12 @@ async def read_invoice(
     invoice = result.scalars().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    return invoice
+    etag = invoice_etag(invoice)
+    if matches_if_none_match(if_none_match, etag):
+        return not_modified(etag)
+    response = PydanticJSONResponse(invoice)
+    set_validators(response, etag)
+    return response
 
 
 @router.put("/invoices/{invoice_id}", response_model=Invoice)
@@ -68,24 +487,35 @@ async def update_invoice(
     invoice_id: uuid.UUID,
     invoice_in: InvoiceUpdate,
     current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
-) -> Invoice:
-    result = await session.execute(
-        select(Invoice).where(
-            Invoice.id == invoice_id, Invoice.user_id == current_user.id
-        )
+    if_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    query = select(Invoice).where(
+        Invoice.id == invoice_id, Invoice.user_id == current_user.id
     )
+    if if_match is not None:
+        # Hold the row so the version checked is the version replaced.
+        query = query.with_for_update()
+    result = await session.execute(query)
     invoice = result.scalars().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    check_if_match(if_match, invoice_etag(invoice))
 
+    before = rollup_key(invoice)
     invoice_data = invoice_in.model_dump(exclude_unset=True)
     for key, value in invoice_data.items():  # pyright: ignore[reportAny]
         setattr(invoice, key, value)
+    totals = _compute_totals(invoice)
 
     session.add(invoice)
-    await session.commit()
+    await replace_line_items(session, invoice, totals)
+    await record_invoice_change(session, before, rollup_key(invoice))
+    await _commit_or_conflict(session)
     await session.refresh(invoice)
-    return invoice
+    pdf_cache.invalidate(invoice.id)
+    response = PydanticJSONResponse(invoice)
+    set_validators(response, invoice_etag(invoice))
+    return response
 
 
 @router.delete("/invoices/{invoice_id}", response_model=Invoice)
@@ -94,7 +524,7 @@ async def delete_invoice(
     session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
     invoice_id: uuid.UUID,
     current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
-) -> Invoice:
+) -> Response:
     result = await session.execute(
         select(Invoice).where(
             Invoice.id == invoice_id, Invoice.user_id == current_user.id
@@ -105,8 +535,14 @@ async def delete_invoice(
         raise HTTPException(status_code=404, detail="Invoice not found")
 
     await session.delete(invoice)
-    await session.commit()
-    return invoice
+    await record_invoice_change(session, rollup_key(invoice), None)
+    if invoice.created_at is not None:
+        await release_invoices(
+            session, invoice.user_id, month_start(invoice.created_at)
+        )
+    await _commit_or_conflict(session)
+    pdf_cache.invalidate(invoice.id)
+    return PydanticJSONResponse(invoice)
 
 
 @router.get("/invoices/{invoice_id}/pdf")
@@ -115,6 +551,7 @@ async def get_invoice_pdf(
     session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
     invoice_id: uuid.UUID,
     current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+    if_none_match: Annotated[str | None, Header()] = None,
 ) -> Response:
     result = await session.execute(
         select(Invoice).where(
@@ -124,6 +561,137 @@ async def get_invoice_pdf(
     invoice = result.scalars().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    templates = await load_user_templates(
+        session, invoice.user_id, [invoice.template_name]
+    )
+
+    # The PDF also depends on the template and the sender's profile, so its
+    # ETag is the PDF cache key rather than the invoice version.
+    html_content, key = invoice_pdf_source(
+        invoice, current_user, template_for(invoice, templates)
+    )
+    etag = make_etag(key)
+    if matches_if_none_match(if_none_match, etag):
+        return not_modified(etag)
+    pdf_content = await _rendered(render_pdf_source(html_content, key, invoice.id))
+    response = Response(content=pdf_content, media_type="application/pdf")
+    set_validators(response, etag)
+    return response
 
-    pdf_content = generate_pdf(invoice, current_user)
-    return Response(content=pdf_content, media_type="application/pdf")
+
+@router.post("/invoices/{invoice_id}/preview")
+async def preview_invoice(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    invoice_id: uuid.UUID,
+    invoice_in: InvoiceUpdate | None = None,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+    preview_format: Annotated[Literal["png", "html"], Query(alias="format")] = "png",
+    page: Annotated[int, Query(ge=1)] = 1,
+    dpi: Annotated[int, Query(ge=36, le=settings.PREVIEW_MAX_DPI)] = 96,
+    debounce: bool = False,
+) -> Response:
+    """Preview the invoice with unsaved edits (the request body) applied.
+
+    ``png`` rasterizes a page of the very PDF the download would return, so
+    the preview is pixel-identical and that layout is cached for the next
+    download. ``html`` is the markup WeasyPrint lays out. With ``debounce``,
+    a burst of edits to one invoice renders once, and every request of the
+    burst gets the image of the latest edit.
+    """
+    result = await session.execute(
+        select(Invoice).where(
+            Invoice.id == invoice_id, Invoice.user_id == current_user.id
+        )
+    )
+    invoice = result.scalars().first()
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+
+    changes = invoice_in.model_dump(exclude_unset=True) if invoice_in else {}
+    draft = Invoice.model_validate(invoice.model_dump() | changes)
+    _ = _compute_totals(draft)
+    templates = await load_user_templates(
+        session, invoice.user_id, [draft.template_name]
+    )
+    template = template_for(draft, templates)
+
+    if preview_format == "html":
+        return HTMLResponse(render_invoice_html(draft, current_user, template))
+    if not png_supported():
+        raise HTTPException(
+            status_code=501, detail="PNG previews are not enabled on this server"
+        )
+
+    async def render() -> tuple[bytes, int]:
+        pdf_content = await render_invoice_pdf(draft, current_user, template)
+        return await render_pool.run(pdf_to_png, pdf_content, page - 1, dpi)
+
+    try:
+        if debounce:
+            png, page_count = await _rendered(
+                preview_coalescer.submit((invoice_id, page, dpi), render)
+            )
+        else:
+            png, page_count = await _rendered(render())
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return Response(
+        content=png,
+        media_type="image/png",
+        headers={"X-Page-Count": str(page_count), "Cache-Control": "no-store"},
+    )
+
+
+@router.post(
+    "/invoices/{invoice_id}/email", response_model=EmailDelivery, status_code=202
+)
+async def email_invoice(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    invoice_id: uuid.UUID,
+    email_in: InvoiceEmailRequest,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> EmailOutbox:
+    result = await session.execute(
+        select(Invoice).where(
+            Invoice.id == invoice_id, Invoice.user_id == current_user.id
+        )
+    )
+    invoice = result.scalars().first()
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    recipient = email_in.recipient or invoice.client_email
+    if not recipient:
+        raise HTTPException(status_code=422, detail="Invoice has no client email")
+
+    outbox = EmailOutbox(
+        user_id=invoice.user_id,
+        invoice_id=invoice_id,
+        recipient=recipient,
+        subject=email_in.subject,
+        body=email_in.message or "",
+    )
+    session.add(outbox)
+    await session.commit()
+    await session.refresh(outbox)
+    email_worker.wake()
+    return outbox
+
+
+@router.get("/invoices/{invoice_id}/emails", response_model=list[EmailDelivery])
+async def read_invoice_emails(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    invoice_id: uuid.UUID,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> list[EmailOutbox]:
+    result = await session.execute(
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.invoice_id == invoice_id,
+            EmailOutbox.user_id == current_user.id,
+        )
+        .order_by(col(EmailOutbox.created_at).desc())
+    )
+    return list(result.scalars().all())
@@ -0,0 +1,50 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.api import deps
+from app.db import get_session
+from app.models import Job, JobRead, User
+from app.services.job_handlers import job_result_path
+
+router = APIRouter()
+
+
+async def _get_job(session: AsyncSession, user: User, job_id: uuid.UUID) -> Job:
+    result = await session.execute(
+        select(Job).where(Job.id == job_id, Job.user_id == user.id)
+    )
+    job = result.scalars().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobRead)
+async def read_job(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    job_id: uuid.UUID,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> Job:
+    return await _get_job(session, current_user, job_id)
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_job_result(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    job_id: uuid.UUID,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> FileResponse:
+    job = await _get_job(session, current_user, job_id)
+    filename = (job.result or {}).get("file")
+    if job.status != "succeeded" or not isinstance(filename, str):
+        raise HTTPException(status_code=404, detail="Job has no file to download")
+    path = job_result_path(filename)
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="Job output has expired")
+    return FileResponse(path, filename=f"invoices-{job_id}{path.suffix}")
@@ -0,0 +1,126 @@
+import asyncio
+import hmac
+import threading
+import time
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api import deps
+from app.core.config import settings
+from app.db import async_session_maker
+from app.models import User
+from app.services.metrics import (
+    RequestStats,
+    http_request_db_queries,
+    http_request_db_seconds,
+    http_request_seconds,
+    http_requests_in_progress,
+    render,
+    request_stats,
+)
+from app.services.profiling import SamplingProfiler, profile_path, save_profile
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics(request: Request) -> Response:
+    """Prometheus metrics, only for scrapers sending ``METRICS_TOKEN``."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(await asyncio.to_thread(render), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/debug/profiles/{profile_id}")
+async def read_profile(
+    profile_id: uuid.UUID,
+    _current_user: User = Depends(deps.get_current_superuser),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> FileResponse:
+    """Collapsed stacks of a request made with ``X-Profile: 1``."""
+    path = profile_path(profile_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8")
+
+
+async def _profiling_allowed(headers: Headers) -> bool:
+    authorization = headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    async with async_session_maker() as session:
+        try:
+            user = await deps.authenticate(session, token)
+        except HTTPException:
+            return False
+    return user.is_superuser
+
+
+class MetricsMiddleware:
+    """Times every request and counts its SQL, labelled by route template.
+
+    Adds a ``Server-Timing`` header to each response. Superusers can send
+    ``X-Profile: 1`` to have the request sampled by ``SamplingProfiler``;
+    the response then carries ``X-Profile-Id`` for ``/debug/profiles/{id}``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app: ASGIApp = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        profiler: SamplingProfiler | None = None
+        profile_id = uuid.uuid4()
+        headers = Headers(scope=scope)
+        if headers.get("X-Profile") == "1" and await _profiling_allowed(headers):
+            profiler = SamplingProfiler(
+                threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_SECONDS
+            )
+            profiler.start()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]  # pyright: ignore[reportAny]
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append(
+                    "Server-Timing",
+                    stats.server_timing(time.perf_counter() - started_at),
+                )
+                if profiler is not None:
+                    response_headers["X-Profile-Id"] = str(profile_id)
+            await send(message)
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            http_requests_in_progress.dec()
+            request_stats.reset(token)
+            # The matched route's template keeps label cardinality bounded.
+            route: str = getattr(scope.get("route"), "path", "<unmatched>")
+            http_request_seconds.labels(
+                method=scope["method"], route=route, status=str(status)
+            ).observe(elapsed)
+            http_request_db_queries.labels(route=route).observe(stats.db_queries)
+            http_request_db_seconds.labels(route=route).observe(stats.db_seconds)
+            if profiler is not None:
+                profiler.stop()
+                _ = await asyncio.to_thread(save_profile, profile_id, profiler)
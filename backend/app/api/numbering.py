@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.db import get_session
+from app.models import (
+    InvoiceNumbering,
+    InvoiceNumberingRead,
+    InvoiceNumberingUpdate,
+    User,
+)
+from app.services.invoice_numbers import (
+    InvalidNumberPattern,
+    get_numbering,
+    preview_next_number,
+    validate_numbering,
+)
+
+router = APIRouter()
+
+
+async def _read(
+    session: AsyncSession, numbering: InvoiceNumbering
+) -> InvoiceNumberingRead:
+    return InvoiceNumberingRead.model_validate(
+        numbering, update={"next_number": await preview_next_number(session, numbering)}
+    )
+
+
+@router.get("/invoice-numbering", response_model=InvoiceNumberingRead)
+async def read_invoice_numbering(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> InvoiceNumberingRead:
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    return await _read(session, await get_numbering(session, current_user.id))
+
+
+@router.put("/invoice-numbering", response_model=InvoiceNumberingRead)
+async def update_invoice_numbering(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    numbering_in: InvoiceNumberingUpdate,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> InvoiceNumberingRead:
+    """Change how new invoices are numbered.
+
+    Sequences continue from where they are; numbers already issued keep
+    their old format. A pattern that reproduces an existing number makes
+    that create fail with 409 rather than duplicate it.
+    """
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    numbering = await get_numbering(session, current_user.id)
+    for key, value in numbering_in.model_dump().items():  # pyright: ignore[reportAny]
+        setattr(numbering, key, value)
+    try:
+        validate_numbering(numbering)
+    except InvalidNumberPattern as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    session.add(numbering)
+    await session.commit()
+    await session.refresh(numbering)
+    return await _read(session, numbering)
@@ -0,0 +1,22 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: str | float) -> str:
+    """Pack the sort key of the last row of a page into an opaque token."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str, size: int) -> list[str | float]:
+    padded = token + "=" * (-len(token) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded))  # pyright: ignore[reportAny]
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:  # pyright: ignore[reportUnknownArgumentType]
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values  # pyright: ignore[reportUnknownVariableType]
@@ -0,0 +1,20 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSON encoded in one pass by pydantic-core.
+
+    Returning a Response from a route skips FastAPI's response_model
+    handling, which validates the object again and then serializes it
+    through Python dicts and ``json.dumps``. Models are written by their
+    compiled serializer; plain dicts and lists of UUIDs, datetimes and
+    numbers are encoded the same way the model would encode them. Only use
+    it for data the route built from its own models or table columns; the
+    route's ``response_model`` still documents the schema.
+    """
+
+    def render(self, content: Any) -> bytes:  # pyright: ignore[reportExplicitAny, reportAny]
+        return to_json(content)
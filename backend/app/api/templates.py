@@ -0,0 +1,127 @@
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from jinja2 import TemplateSyntaxError
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.api import deps
+from app.db import get_session
+from app.models import (
+    InvoiceTemplate,
+    InvoiceTemplateCreate,
+    InvoiceTemplateRead,
+    InvoiceTemplateUpdate,
+    User,
+)
+from app.services.templates import template_registry
+
+router = APIRouter()
+
+
+def _check_syntax(source: str) -> None:
+    try:
+        template_registry.check_syntax(source)
+    except TemplateSyntaxError as e:
+        raise HTTPException(
+            status_code=422, detail=f"Template syntax error on line {e.lineno}: {e}"
+        )
+
+
+async def _get_template(
+    session: AsyncSession, user: User, name: str
+) -> InvoiceTemplate:
+    result = await session.execute(
+        select(InvoiceTemplate).where(
+            InvoiceTemplate.user_id == user.id, InvoiceTemplate.name == name
+        )
+    )
+    template = result.scalars().first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template
+
+
+@router.get("/templates/", response_model=list[InvoiceTemplateRead])
+async def read_templates(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> list[InvoiceTemplate]:
+    result = await session.execute(
+        select(InvoiceTemplate)
+        .where(InvoiceTemplate.user_id == current_user.id)
+        .order_by(col(InvoiceTemplate.name))
+    )
+    return list(result.scalars().all())
+
+
+@router.post("/templates/", response_model=InvoiceTemplateRead)
+async def create_template(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    template_in: InvoiceTemplateCreate,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> InvoiceTemplate:
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    _check_syntax(template_in.source)
+
+    template = InvoiceTemplate.model_validate(
+        template_in, update={"user_id": current_user.id}
+    )
+    session.add(template)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Template name already exists")
+    await session.refresh(template)
+    return template
+
+
+@router.put("/templates/{name}", response_model=InvoiceTemplateRead)
+async def update_template(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    name: str,
+    template_in: InvoiceTemplateUpdate,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> InvoiceTemplate:
+    _check_syntax(template_in.source)
+
+    # A new version is a new cache identity: compiled code and rendered PDFs
+    # of the previous revision are simply never looked up again. Bump it in
+    # SQL so concurrent edits can never end up sharing a version number.
+    result = await session.execute(
+        update(InvoiceTemplate)
+        .where(
+            col(InvoiceTemplate.user_id) == current_user.id,
+            col(InvoiceTemplate.name) == name,
+        )
+        .values(
+            source=template_in.source,
+            version=col(InvoiceTemplate.version) + 1,
+            updated_at=datetime.now(UTC),
+        )
+        .returning(InvoiceTemplate)
+    )
+    template = result.scalars().first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+    await session.commit()
+    return template
+
+
+@router.delete("/templates/{name}", response_model=InvoiceTemplateRead)
+async def delete_template(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    name: str,
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> InvoiceTemplate:
+    template = await _get_template(session, current_user, name)
+    await session.delete(template)
+    await session.commit()
+    return template
@@ -0,0 +1,63 @@
+import uuid
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.db import get_session
+from app.models import Job, JobRead, Subscription, SubscriptionUpdate, UsageRead, User
+from app.services.job_handlers import USAGE_RECONCILE
+from app.services.jobs import enqueue_job, job_worker
+from app.services.usage import get_usage
+
+router = APIRouter()
+
+
+@router.get("/usage", response_model=UsageRead)
+async def read_usage(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> UsageRead:
+    """This month's invoice count against the caller's plan limit."""
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    return await get_usage(session, current_user.id)
+
+
+@router.post("/usage/reconcile", response_model=JobRead, status_code=202)
+async def reconcile_usage(
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    current_user: User = Depends(deps.get_current_user),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> Job:
+    """Recount the caller's usage from their invoices in the background."""
+    if not current_user.id:
+        raise HTTPException(status_code=400, detail="User ID is missing")
+    job = enqueue_job(session, current_user.id, USAGE_RECONCILE)
+    await session.commit()
+    await session.refresh(job)
+    job_worker.wake()
+    return job
+
+
+@router.put("/users/{user_id}/subscription", response_model=UsageRead)
+async def update_subscription(
+    *,
+    session: AsyncSession = Depends(get_session),  # pyright: ignore[reportCallInDefaultInitializer]
+    user_id: uuid.UUID,
+    subscription_in: SubscriptionUpdate,
+    _current_user: User = Depends(deps.get_current_superuser),  # pyright: ignore[reportCallInDefaultInitializer]
+) -> UsageRead:
+    if subscription_in.plan not in settings.PLAN_INVOICE_LIMITS:
+        raise HTTPException(status_code=422, detail="Unknown plan")
+    if await session.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    subscription = await session.get(Subscription, user_id)
+    if subscription is None:
+        subscription = Subscription(user_id=user_id, plan=subscription_in.plan)
+    subscription.plan = subscription_in.plan
+    subscription.updated_at = datetime.now(UTC)
+    session.add(subscription)
+    await session.commit()
+    return await get_usage(session, user_id)
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.api import deps
 from app.db import get_session
 from app.models import User
-from app.api import deps
-from app.security import get_password_hash
+from app.security import get_password_hash_async
 
 router = APIRouter()
 
@@ -23,7 +24,7 @@ async def create_user(
             detail="The user with this email already exists in the system.",
         )
 
-    user_in.hashed_password = get_password_hash(user_in.hashed_password)
+    user_in.hashed_password = await get_password_hash_async(user_in.hashed_password)
     session.add(user_in)
     await session.commit()
     await session.refresh(user_in)
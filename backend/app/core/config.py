@@ -1,4 +1,5 @@
 import os
+
 from pydantic_settings import BaseSettings
 
 
@@ -9,6 +10,20 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Connection pool (per worker process)
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # set to 0 behind pgbouncer
+    DB_KEEPALIVES_IDLE: int = 60
+    DB_KEEPALIVES_INTERVAL: int = 10
+    DB_KEEPALIVES_COUNT: int = 5
+    # Separate pool for short side transactions, e.g. invoice number blocks
+    DB_SIDE_POOL_SIZE: int = 2
+
     BACKEND_HOST: str = "0.0.0.0"
     BACKEND_PORT: int = 8000
     GOOGLE_CLIENT_ID: str = "your-google-client-id"
@@ -17,6 +32,107 @@ class Settings(BaseSettings):
         f"http://localhost:{os.getenv('BACKEND_PORT', '8000')}/auth/google/callback"
     )
 
+    # Rendered PDF cache: in-memory LRU budget and optional shared disk tier
+    # with its own budget (0 = unbounded)
+    PDF_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    PDF_CACHE_DIR: str | None = None
+    PDF_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+
+    # PDF render process pool; 0 workers means one per CPU core
+    PDF_RENDER_WORKERS: int = 0
+    PDF_RENDER_MAX_QUEUE: int = 32
+    PDF_RENDER_TIMEOUT_SECONDS: float = 30.0
+    PDF_RENDER_RETRY_AFTER_SECONDS: int = 5
+
+    # Jinja templates: shared bytecode cache (None = system temp dir) and
+    # filesystem polling, which should stay off outside development
+    TEMPLATE_BYTECODE_DIR: str | None = None
+    TEMPLATE_AUTO_RELOAD: bool = False
+    TEMPLATE_CACHE_SIZE: int = 400
+    # Per-render budget for user templates: loop iterations and sandboxed
+    # calls or lookups, characters of output, and wall time
+    TEMPLATE_MAX_OPERATIONS: int = 1_000_000
+    TEMPLATE_MAX_OUTPUT_CHARS: int = 5_000_000
+    TEMPLATE_RENDER_TIMEOUT_SECONDS: float = 2.0
+
+    # Live preview: renders for one invoice are debounced by DEBOUNCE and
+    # started at most MAX_DELAY after the first edit of a burst
+    PREVIEW_DEBOUNCE_SECONDS: float = 0.3
+    PREVIEW_MAX_DELAY_SECONDS: float = 1.5
+    PREVIEW_MAX_DPI: int = 300
+
+    # Outgoing mail: pooled SMTP connections, each reused for up to
+    # MAX_MESSAGES_PER_CONNECTION messages
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    SMTP_FROM: str = "invoices@localhost"
+    SMTP_POOL_SIZE: int = 4
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+
+    # Email outbox worker: polling, retries with exponential backoff, and the
+    # claim lease after which a stuck "sending" message is retried
+    EMAIL_WORKER_ENABLED: bool = True
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_POLL_SECONDS: float = 5.0
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_SECONDS: float = 30.0
+    EMAIL_RETRY_MAX_SECONDS: float = 3600.0
+    EMAIL_LEASE_SECONDS: float = 300.0
+
+    # Background jobs: concurrent jobs per API process (0 leaves them all to
+    # worker.py), retries, and where job output files go; with several
+    # nodes the result directory must be shared storage
+    JOB_WORKERS: int = 2
+    JOB_POLL_SECONDS: float = 2.0
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    JOB_RETRY_MAX_SECONDS: float = 600.0
+    JOB_RESULT_DIR: str = "/tmp/invoice-jobs"
+    JOB_RESULT_TTL_SECONDS: float = 7 * 24 * 3600
+
+    # Prometheus metrics at /metrics, served only once a token is set;
+    # scrapers must send "Authorization: Bearer <token>". Profiles of
+    # X-Profile requests are kept in PROFILE_DIR (shared storage when
+    # running several nodes).
+    METRICS_TOKEN: str | None = None
+    PROFILE_DIR: str = "/tmp/invoice-profiles"
+    PROFILE_KEEP: int = 100
+    PROFILE_SAMPLE_INTERVAL_SECONDS: float = 0.005
+
+    # Rows fetched per server-side cursor batch by streaming exports
+    EXPORT_BATCH_SIZE: int = 500
+    # How long a bulk PDF export waits on a saturated render pool for any one
+    # invoice before listing it in errors.txt instead
+    EXPORT_RENDER_MAX_WAIT_SECONDS: float = 300.0
+
+    # Bulk import: rows per request and rows per multi-row INSERT
+    IMPORT_MAX_ROWS: int = 50_000
+    IMPORT_CHUNK_SIZE: int = 1_000
+
+    # Plans: invoices a user may create per calendar month (UTC), 0 for no
+    # limit. Users without a Subscription row are on DEFAULT_PLAN.
+    PLAN_INVOICE_LIMITS: dict[str, int] = {"free": 50, "pro": 0}
+    DEFAULT_PLAN: str = "free"
+
+    # Authenticated-user cache; the shared tier uses an in-process stand-in
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10_000
+    USER_CACHE_SHARED: bool = False
+
+    # argon2 cost; hashes made with other values are upgraded on next login.
+    # Benchmark a change with scripts/benchmark_password_hash.py.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+
     class Config:
         case_sensitive: bool = True
         env_file: str = ".env"
@@ -1,22 +1,91 @@
+import time
 from collections.abc import AsyncGenerator
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
 from sqlmodel import SQLModel
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
 from app.core.config import settings
+from app.services.metrics import (
+    db_pool_checkout_seconds,
+    instrument_engine,
+    track_pool,
+)
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Records how long each checkout waits, the first sign of an undersized pool."""
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = async_sessionmaker(
-        engine, class_=AsyncSession, expire_on_commit=False
+    def connect(self) -> PoolProxiedConnection:
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            db_pool_checkout_seconds.observe(time.perf_counter() - started_at)
+
+
+def _create_engine(pool_size: int, max_overflow: int) -> AsyncEngine:
+    return create_async_engine(
+        DATABASE_URL,
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            # asyncpg has no client-side keepalive options; these make the server
+            # probe idle connections so dead peers are noticed by both ends.
+            "server_settings": {
+                "tcp_keepalives_idle": str(settings.DB_KEEPALIVES_IDLE),
+                "tcp_keepalives_interval": str(settings.DB_KEEPALIVES_INTERVAL),
+                "tcp_keepalives_count": str(settings.DB_KEEPALIVES_COUNT),
+            },
+        },
     )
-    async with async_session() as session:
+
+
+engine = _create_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+instrument_engine(engine.sync_engine)
+track_pool(engine.sync_engine)
+
+async_session_maker = async_sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Short side transactions that must commit apart from the request's own,
+# such as reserving invoice numbers. A request holding a connection from
+# the main pool never waits on that pool for a second one, so a burst of
+# requests cannot exhaust it between them.
+side_engine = _create_engine(settings.DB_SIDE_POOL_SIZE, 0)
+instrument_engine(side_engine.sync_engine)
+
+side_session_maker = async_sessionmaker(
+    side_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    # FastAPI caches this dependency per request, so get_current_user and the
+    # handler share one session; it only checks out a connection on first use.
+    async with async_session_maker() as session:
         yield session
 
 
 async def init_db():
     async with engine.begin() as conn:
         # await conn.run_sync(SQLModel.metadata.drop_all)
+        _ = await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        _ = await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
         await conn.run_sync(SQLModel.metadata.create_all)
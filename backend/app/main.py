@@ -1,15 +1,50 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import auth, users, invoices
-from app.db import init_db
+from fastapi.responses import JSONResponse
 
-from contextlib import asynccontextmanager
+from app.api import (
+    analytics,
+    auth,
+    health,
+    invoices,
+    jobs,
+    metrics,
+    numbering,
+    templates,
+    usage,
+    users,
+)
+from app.core.config import settings
+from app.db import init_db
+from app.security import PasswordHashingBusy
+from app.services.jobs import job_worker
+from app.services.mailer import email_worker
+from app.services.render_pool import render_pool
+from app.services.templates import TemplateBudgetExceeded, template_registry
+from app.services.usage import PlanLimitExceeded
 
 
 @asynccontextmanager
-async def lifespan(_app: FastAPI):
-    await init_db()
+async def lifespan(application: FastAPI):
+    # server.py's pre-fork parent creates the schema once before forking and
+    # has only one of its workers run the background workers.
+    if not getattr(application.state, "schema_ready", False):
+        await init_db()
+    _ = template_registry.precompile()
+    await render_pool.start()
+    background = getattr(application.state, "run_background_workers", True)
+    if settings.EMAIL_WORKER_ENABLED and background:
+        email_worker.start()
+    if settings.JOB_WORKERS and background:
+        job_worker.start()
+    application.state.ready = True
     yield
+    application.state.ready = False
+    await job_worker.stop()
+    await email_worker.stop()
+    render_pool.shutdown()
 
 
 app = FastAPI(title="Invoice Management API", lifespan=lifespan)
@@ -20,12 +55,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Profile-Id"],
 )
+# Added last so it wraps CORS too and times the whole request.
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(
+    _request: Request, exc: PasswordHashingBusy
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, try again shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(PlanLimitExceeded)
+async def plan_limit_exceeded_handler(
+    _request: Request, exc: PlanLimitExceeded
+) -> JSONResponse:
+    return JSONResponse(status_code=403, content={"detail": str(exc)})
+
+
+@app.exception_handler(TemplateBudgetExceeded)
+async def template_budget_exceeded_handler(
+    _request: Request, exc: TemplateBudgetExceeded
+) -> JSONResponse:
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
 
 
 app.include_router(auth.router, prefix="", tags=["auth"])
 app.include_router(users.router, prefix="", tags=["users"])
 app.include_router(invoices.router, prefix="", tags=["invoices"])
+app.include_router(analytics.router, prefix="", tags=["analytics"])
+app.include_router(templates.router, prefix="", tags=["templates"])
+app.include_router(numbering.router, prefix="", tags=["invoice numbering"])
+app.include_router(usage.router, prefix="", tags=["usage"])
+app.include_router(jobs.router, prefix="", tags=["jobs"])
+app.include_router(metrics.router, prefix="", tags=["metrics"])
+app.include_router(health.router, prefix="", tags=["health"])
 
 
 @app.get("/")
@@ -1,9 +1,14 @@
 # pyright: reportUnknownVariableType=false
-from typing import Any
-from sqlalchemy import JSON, Column
-from sqlmodel import Field, SQLModel, Relationship
-from datetime import datetime, timezone
 import uuid
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from typing import Annotated, Any, Literal
+
+from pydantic import EmailStr, StringConstraints
+from sqlalchemy import JSON, Column, Computed, DateTime, Index, Numeric, Text, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import declared_attr
+from sqlmodel import Field, Relationship, SQLModel, col
 
 
 class UserBase(SQLModel):
@@ -38,12 +43,18 @@ class UserCreate(SQLModel):
 
 class InvoiceBase(SQLModel):
     invoice_number: str
-    date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    date: datetime = Field(default_factory=lambda: datetime.now(UTC))
     due_date: datetime | None = None
     client_name: str
     client_email: str | None = None
-    total_amount: float = 0.0
+    # Recomputed from content["items"] when present (see services.line_items)
+    total_amount: float = Field(
+        default=0.0, sa_column=Column(Numeric(14, 2, asdecimal=False), nullable=False)
+    )
     status: str = "draft"  # draft, sent, paid
+    # Name of one of the owner's InvoiceTemplates; None (or a name that no
+    # longer exists) renders the built-in template
+    template_name: str | None = None
     content: dict[str, Any] = Field(  # pyright: ignore[reportExplicitAny]
         default={}, sa_column=Column(JSON)
     )  # Stores full invoice data/items
@@ -53,10 +64,103 @@ class Invoice(InvoiceBase, table=True):
     id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id")
     user: User = Relationship(back_populates="invoices")  # pyright: ignore[reportAny]
+    subtotal: float = Field(
+        default=0.0, sa_column=Column(Numeric(14, 2, asdecimal=False), nullable=False)
+    )
+    vat_amount: float = Field(
+        default=0.0, sa_column=Column(Numeric(14, 2, asdecimal=False), nullable=False)
+    )
+    # Bumped by the ORM on every UPDATE, which is also made conditional on
+    # the version read (see __mapper_args__); ETags are derived from it.
+    version: int = Field(default=1)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+        sa_column_kwargs={"onupdate": func.now()},
+    )
+    # Counts against the plan's monthly limit (see services.usage). None for
+    # invoices created before the column existed.
+    created_at: datetime | None = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+
+    @declared_attr  # pyright: ignore[reportArgumentType]
+    def __mapper_args__(cls) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny, reportIncompatibleVariableOverride]
+        return {"version_id_col": cls.__table__.c.version}  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+
+
+class LineItem(SQLModel, table=True):
+    """One row of ``Invoice.content["items"]``, normalized for SQL aggregation."""
+
+    id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    invoice_id: uuid.UUID = Field(
+        foreign_key="invoice.id", ondelete="CASCADE", index=True
+    )
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    position: int
+    description: str = ""
+    quantity: Decimal = Field(default=Decimal(0), max_digits=12, decimal_places=3)
+    unit_price: Decimal = Field(default=Decimal(0), max_digits=14, decimal_places=4)
+    vat_rate: Decimal = Field(default=Decimal(0), max_digits=5, decimal_places=2)
+    line_total: Decimal = Field(default=Decimal(0), max_digits=14, decimal_places=2)
+    vat_amount: Decimal = Field(default=Decimal(0), max_digits=14, decimal_places=2)
+
+
+# Every invoice query is scoped to one user, so user_id leads each index.
+# The list index matches the keyset order of GET /invoices/ exactly.
+_ = Index(
+    "ix_invoice_user_date_id",
+    col(Invoice.user_id),
+    col(Invoice.date).desc(),
+    col(Invoice.id).desc(),
+)
+_ = Index("ix_invoice_user_status", col(Invoice.user_id), col(Invoice.status))
+_ = Index(
+    "ix_invoice_user_number",
+    col(Invoice.user_id),
+    col(Invoice.invoice_number),
+    unique=True,
+)
+# Substring search on client name (ILIKE '%...%'); needs the pg_trgm extension.
+_ = Index(
+    "ix_invoice_client_name_trgm",
+    col(Invoice.client_name),
+    postgresql_using="gin",
+    postgresql_ops={"client_name": "gin_trgm_ops"},
+)
+
+# Full-text search document for GET /invoices/search, maintained by Postgres.
+# The 'simple' config neither stems nor drops stop words, which suits names,
+# numbers and prefix matching. Emails are also split on '@' and '.' so a
+# company's domain matches. Only immutable functions may appear here.
+INVOICE_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', invoice_number), 'A')"
+    + " || setweight(to_tsvector('simple', client_name), 'B')"
+    + " || setweight(to_tsvector('simple', coalesce(client_email, '') || ' '"
+    + " || translate(coalesce(client_email, ''), '@.', '  ')), 'C')"
+    + " || setweight(jsonb_to_tsvector('simple', coalesce(jsonb_path_query_array("
+    + "content::jsonb, '$.items[*].description'), '[]'), '[\"string\"]'), 'D')"
+)
+# A table column only: it is left off the Invoice mapper so loading an
+# invoice never reads it and no API model exposes it.
+invoice_search_vector = Column(
+    "search_vector", TSVECTOR, Computed(INVOICE_SEARCH_DOCUMENT, persisted=True)
+)
+Invoice.__table__.append_column(invoice_search_vector)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+# user_id inside the GIN index (btree_gin) keeps a common word from scanning
+# every tenant's matches.
+_ = Index(
+    "ix_invoice_user_search",
+    col(Invoice.user_id),
+    invoice_search_vector,
+    postgresql_using="gin",
+)
 
 
 class InvoiceCreate(InvoiceBase):
-    pass
+    # Left out, the next number of the user's InvoiceNumbering series is used
+    invoice_number: str | None = None  # pyright: ignore[reportIncompatibleVariableOverride]
 
 
 class InvoiceUpdate(SQLModel):
@@ -67,4 +171,348 @@ class InvoiceUpdate(SQLModel):
     client_email: str | None = None
     total_amount: float | None = None
     status: str | None = None
+    template_name: str | None = None
     content: dict[str, Any] | None = None  # pyright: ignore[reportExplicitAny]
+
+
+class InvoiceTemplateBase(SQLModel):
+    name: str = Field(max_length=100)
+    source: str = Field(sa_column=Column(Text, nullable=False))
+
+
+class InvoiceTemplate(InvoiceTemplateBase, table=True):
+    """A user's own Jinja invoice layout.
+
+    ``version`` is bumped on every edit; together with ``id`` it identifies
+    one immutable revision of the source (see services.templates).
+    """
+
+    id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id")
+    version: int = 1
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+_ = Index(
+    "ix_invoicetemplate_user_name",
+    col(InvoiceTemplate.user_id),
+    col(InvoiceTemplate.name),
+    unique=True,
+)
+
+
+class InvoiceTemplateCreate(InvoiceTemplateBase):
+    pass
+
+
+class InvoiceTemplateUpdate(SQLModel):
+    source: str
+
+
+class InvoiceTemplateRead(InvoiceTemplateBase):
+    version: int
+    updated_at: datetime
+
+
+class InvoiceNumberingBase(SQLModel):
+    # Tokens: {YYYY}, {YY} and {MM} of the invoice date, and the sequence
+    # number as {seq} or zero-padded as {seq:05} (see services.invoice_numbers)
+    pattern: str = Field(default="INV-{YYYY}-{seq:05}", max_length=100)
+    reset: str = "yearly"  # never, yearly: restart {seq} at 1 each year
+    gaps: str = "allow"  # allow, gapless (see services.invoice_numbers)
+
+
+class InvoiceNumbering(InvoiceNumberingBase, table=True):
+    """A user's invoice number format; defaults apply until one is saved."""
+
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+
+
+class InvoiceNumberingUpdate(SQLModel):
+    pattern: str = Field(max_length=100)
+    reset: Literal["never", "yearly"] = "yearly"
+    gaps: Literal["allow", "gapless"] = "allow"
+
+
+class InvoiceNumberingRead(InvoiceNumberingBase):
+    next_number: str  # what an invoice dated today would get
+
+
+class InvoiceCounter(SQLModel, table=True):
+    """Last sequence number handed out per user and period.
+
+    The period is the invoice year for yearly resets and 0 otherwise.
+    """
+
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    period: int = Field(primary_key=True)
+    last_value: int = 0
+
+
+class Subscription(SQLModel, table=True):
+    """A user's plan; users without a row are on settings.DEFAULT_PLAN."""
+
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    plan: str
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+
+
+class SubscriptionUpdate(SQLModel):
+    plan: str
+
+
+class UsageCounter(SQLModel, table=True):
+    """Invoices created per user and calendar month (UTC) that still exist.
+
+    Maintained in the same transaction as each create and delete, and
+    recomputed from the invoice table by services.usage.reconcile_usage.
+    """
+
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    period: date = Field(primary_key=True)  # first day of the month
+    invoices: int = 0
+
+
+class UsageRead(SQLModel):
+    plan: str
+    period: date
+    invoices: int
+    invoice_limit: int | None  # None means unlimited
+
+
+class InvoiceImport(SQLModel, table=True):
+    """Stored outcome of a bulk import, replayed for retried Idempotency-Keys."""
+
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    idempotency_key: str = Field(primary_key=True, max_length=255)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    result: dict[str, Any] | None = Field(  # pyright: ignore[reportExplicitAny]
+        default=None, sa_column=Column(JSON)
+    )
+
+
+class ImportRowError(SQLModel):
+    row: int
+    errors: list[str]
+
+
+class InvoiceImportResult(SQLModel):
+    created: int
+    ids: list[uuid.UUID]
+    errors: list[ImportRowError]
+
+
+class InvoiceFilter(SQLModel):
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    status: str | None = None
+    client_name: str | None = None
+    invoice_number: str | None = None
+    ids: list[uuid.UUID] | None = None
+
+
+class InvoiceSummary(SQLModel):
+    """List view of an invoice: every scalar column, without ``content``."""
+
+    id: uuid.UUID
+    invoice_number: str
+    date: datetime
+    due_date: datetime | None = None
+    client_name: str
+    client_email: str | None = None
+    total_amount: float
+    status: str
+    version: int
+    updated_at: datetime
+
+
+class InvoicePage(SQLModel):
+    items: list[InvoiceSummary]
+    next_cursor: str | None = None
+
+
+class InvoiceSearchHit(InvoiceSummary):
+    rank: float
+
+
+class InvoiceSearchPage(SQLModel):
+    items: list[InvoiceSearchHit]
+    next_cursor: str | None = None
+
+
+# Analytics rollups, maintained incrementally by app.services.analytics.
+# Amounts are NUMERIC so repeated +/- deltas never drift.
+class InvoiceDailyRollup(SQLModel, table=True):
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    status: str = Field(primary_key=True)
+    invoice_count: int = 0
+    total_amount: float = Field(
+        default=0.0, sa_column=Column(Numeric(14, 2, asdecimal=False), nullable=False)
+    )
+
+
+class ClientMonthlyRollup(SQLModel, table=True):
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    month: date = Field(primary_key=True)
+    client_name: str = Field(primary_key=True)
+    invoice_count: int = 0
+    total_amount: float = Field(
+        default=0.0, sa_column=Column(Numeric(14, 2, asdecimal=False), nullable=False)
+    )
+
+
+class StatusTotal(SQLModel):
+    status: str
+    invoice_count: int
+    total_amount: float
+
+
+class MonthlyRevenue(SQLModel):
+    month: date
+    status: str
+    invoice_count: int
+    total_amount: float
+
+
+class ClientRevenue(SQLModel):
+    client_name: str
+    invoice_count: int
+    total_amount: float
+
+
+class AnalyticsSummary(SQLModel):
+    invoice_count: int
+    total_amount: float
+    average_invoice_value: float
+    outstanding_count: int
+    outstanding_amount: float
+    by_status: list[StatusTotal]
+    by_month: list[MonthlyRevenue]
+    top_clients: list[ClientRevenue]
+
+
+# Outgoing invoice emails. Rows are the queue itself (see services.mailer):
+# a worker claims due rows, and each row keeps the delivery status.
+class EmailOutbox(SQLModel, table=True):
+    id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    invoice_id: uuid.UUID = Field(
+        foreign_key="invoice.id", ondelete="CASCADE", index=True
+    )
+    recipient: str
+    subject: str | None = None  # None and "" fall back to the default wording
+    body: str = Field(default="", sa_column=Column(Text, nullable=False))
+    status: str = "queued"  # queued, sending, sent, failed
+    attempts: int = 0
+    # When the row is next due; while "sending" it is the claim's expiry,
+    # after which another worker may take the message over.
+    next_attempt_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+    last_error: str | None = None
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+    sent_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+
+
+_ = Index(
+    "ix_emailoutbox_due",
+    col(EmailOutbox.next_attempt_at),
+    postgresql_where=col(EmailOutbox.status).in_(["queued", "sending"]),
+)
+
+
+# A single header line: CR/LF would let a subject inject extra headers.
+EmailSubject = Annotated[str, StringConstraints(max_length=200, pattern=r"^[^\r\n]*$")]
+
+
+class InvoiceEmailRequest(SQLModel):
+    recipient: EmailStr | None = None  # defaults to the invoice's client_email
+    subject: EmailSubject | None = None
+    message: str | None = None
+
+
+class InvoiceEmailBatchRequest(SQLModel):
+    filters: InvoiceFilter = InvoiceFilter()
+    subject: EmailSubject | None = None
+    message: str | None = None
+
+
+class EmailDelivery(SQLModel):
+    id: uuid.UUID
+    invoice_id: uuid.UUID
+    recipient: str
+    status: str
+    attempts: int
+    last_error: str | None = None
+    created_at: datetime
+    sent_at: datetime | None = None
+
+
+class EmailBatchResult(SQLModel):
+    queued: int
+    skipped: int
+
+
+# Background jobs (see services.jobs). Like the email outbox, the table is
+# the queue: workers claim rows with FOR UPDATE SKIP LOCKED.
+class Job(SQLModel, table=True):
+    id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
+    kind: str
+    status: str = "queued"  # queued, running, succeeded, failed
+    payload: dict[str, Any] = Field(  # pyright: ignore[reportExplicitAny]
+        default={}, sa_column=Column(JSON, nullable=False)
+    )
+    progress: float = 0.0  # 0..1
+    progress_message: str | None = None
+    result: dict[str, Any] | None = Field(  # pyright: ignore[reportExplicitAny]
+        default=None, sa_column=Column(JSON)
+    )
+    error: str | None = None
+    attempts: int = 0
+    # Earliest start for a queued job; lease expiry for a running one.
+    run_after: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(UTC),
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+    started_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+    finished_at: datetime | None = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),  # pyright: ignore[reportArgumentType]
+    )
+
+
+_ = Index(
+    "ix_job_due",
+    col(Job.run_after),
+    postgresql_where=col(Job.status).in_(["queued", "running"]),
+)
+
+
+class JobRead(SQLModel):
+    id: uuid.UUID
+    kind: str
+    status: str
+    progress: float
+    progress_message: str | None = None
+    result: dict[str, Any] | None = None  # pyright: ignore[reportExplicitAny]
+    error: str | None = None
+    attempts: int
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
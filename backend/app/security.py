@@ -1,21 +1,93 @@
-from datetime import datetime, timedelta, timezone
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
+from typing import TypeVar
+
 from jose import jwt
 from passlib.context import CryptContext
+
 from app.core.config import settings
+from app.services.metrics import (
+    password_hash_queue_depth,
+    password_hash_rejected,
+    password_hash_seconds,
+)
+
+T = TypeVar("T")
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 ALGORITHM = settings.ALGORITHM
 
 
+class PasswordHashingBusy(Exception):
+    """Raised when too many password operations are already queued."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing is saturated")
+        self.retry_after: int = retry_after
+
+
+class PasswordHasher:
+    """Runs argon2 in a dedicated thread pool, shedding load past a limit.
+
+    argon2-cffi releases the GIL while hashing, so the threads run in
+    parallel and the event loop stays free during a burst of logins.
+    """
+
+    def __init__(self, workers: int, max_pending: int, retry_after: int):
+        self.max_pending: int = max_pending
+        self.retry_after: int = retry_after
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="argon2"
+        )
+        self._pending: int = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args: object) -> T:
+        if self._pending >= self.max_pending:
+            password_hash_rejected.inc()
+            raise PasswordHashingBusy(self.retry_after)
+        self._pending += 1
+        password_hash_queue_depth.inc()
+        started_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            password_hash_queue_depth.dec()
+            password_hash_seconds.labels(operation=fn.__name__).observe(
+                time.perf_counter() - started_at
+            )
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
+
+
 def create_access_token(
     subject: str | int,
     expires_delta: timedelta | None = None,
 ) -> str:
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = datetime.now(UTC) + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(
+        expire = datetime.now(UTC) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode = {"exp": expire, "sub": str(subject)}
@@ -29,3 +101,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify off the event loop.
+
+    Also returns a replacement hash when ``hashed_password`` was made with
+    argon2 parameters other than the configured ones, so callers can rehash
+    transparently on login.
+    """
+    return await password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
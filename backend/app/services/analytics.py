@@ -0,0 +1,277 @@
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import Date, cast, delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.models import (
+    AnalyticsSummary,
+    ClientMonthlyRollup,
+    ClientRevenue,
+    Invoice,
+    InvoiceDailyRollup,
+    MonthlyRevenue,
+    StatusTotal,
+)
+from app.services import user_locks
+
+# Sent but not yet paid; drafts are not owed yet.
+OUTSTANDING_STATUSES = ("sent",)
+
+
+@dataclass(frozen=True)
+class RollupKey:
+    """What one invoice contributes to the rollup tables."""
+
+    user_id: uuid.UUID
+    day: date
+    status: str
+    client_name: str
+    amount: float
+
+    @property
+    def month(self) -> date:
+        return self.day.replace(day=1)
+
+
+def rollup_key(invoice: Invoice) -> RollupKey:
+    return RollupKey(
+        user_id=invoice.user_id,
+        day=invoice.date.date(),
+        status=invoice.status,
+        client_name=invoice.client_name,
+        amount=invoice.total_amount,
+    )
+
+
+async def _apply(
+    session: AsyncSession, changes: Iterable[tuple[RollupKey, int]]
+) -> None:
+    daily: dict[tuple[uuid.UUID, date, str], list[Any]] = {}  # pyright: ignore[reportExplicitAny]
+    clients: dict[tuple[uuid.UUID, date, str], list[Any]] = {}  # pyright: ignore[reportExplicitAny]
+    for key, sign in changes:
+        amount = sign * Decimal(str(key.amount))
+        for totals in (
+            daily.setdefault((key.user_id, key.day, key.status), [0, Decimal(0)]),
+            clients.setdefault(
+                (key.user_id, key.month, key.client_name), [0, Decimal(0)]
+            ),
+        ):
+            totals[0] += sign
+            totals[1] += amount
+    if not daily:
+        return
+
+    await user_locks.lock_users(
+        session, user_locks.ANALYTICS, (user_id for user_id, _, _ in daily)
+    )
+
+    # Upsert in key order so concurrent writers lock rollup rows in the same
+    # order and cannot deadlock each other.
+    if daily:
+        stmt = insert(InvoiceDailyRollup).values(
+            [
+                {
+                    "user_id": user_id,
+                    "day": day,
+                    "status": status,
+                    "invoice_count": count,
+                    "total_amount": amount,
+                }
+                for (user_id, day, status), (count, amount) in sorted(daily.items())
+            ]
+        )
+        _ = await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "day", "status"],
+                set_={
+                    "invoice_count": InvoiceDailyRollup.invoice_count
+                    + stmt.excluded.invoice_count,
+                    "total_amount": col(InvoiceDailyRollup.total_amount)
+                    + stmt.excluded.total_amount,
+                },
+            )
+        )
+    if clients:
+        stmt = insert(ClientMonthlyRollup).values(
+            [
+                {
+                    "user_id": user_id,
+                    "month": month,
+                    "client_name": client_name,
+                    "invoice_count": count,
+                    "total_amount": amount,
+                }
+                for (user_id, month, client_name), (count, amount) in sorted(
+                    clients.items()
+                )
+            ]
+        )
+        _ = await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "month", "client_name"],
+                set_={
+                    "invoice_count": ClientMonthlyRollup.invoice_count
+                    + stmt.excluded.invoice_count,
+                    "total_amount": col(ClientMonthlyRollup.total_amount)
+                    + stmt.excluded.total_amount,
+                },
+            )
+        )
+
+
+async def record_invoice_change(
+    session: AsyncSession, before: RollupKey | None, after: RollupKey | None
+) -> None:
+    """Move an invoice's contribution from ``before`` to ``after``.
+
+    Pass ``before=None`` for a create and ``after=None`` for a delete. Runs
+    in the caller's transaction so rollups commit atomically with the row.
+    """
+    if before == after:
+        return
+    changes: list[tuple[RollupKey, int]] = []
+    if before is not None:
+        changes.append((before, -1))
+    if after is not None:
+        changes.append((after, 1))
+    await _apply(session, changes)
+
+
+async def record_invoices_created(session: AsyncSession, keys: Iterable[RollupKey]):
+    """Add many new invoices at once, in two statements whatever their number."""
+    await _apply(session, ((key, 1) for key in keys))
+
+
+async def rebuild_rollups(session: AsyncSession, user_id: uuid.UUID | None = None):
+    """Regenerate the rollup tables from the invoice table.
+
+    No rollup write can land between the scan and the commit of the
+    caller's transaction. For one user this holds that user's analytics
+    lock, so other tenants keep writing; for everyone it holds a SHARE lock
+    on ``invoice``, which blocks all invoice writes.
+    """
+    if user_id is None:
+        _ = await session.execute(text("LOCK TABLE invoice IN SHARE MODE"))
+    else:
+        await user_locks.lock_users(
+            session, user_locks.ANALYTICS, [user_id], exclusive=True
+        )
+    daily_delete = delete(InvoiceDailyRollup)
+    client_delete = delete(ClientMonthlyRollup)
+    user_filter = ""
+    params: dict[str, uuid.UUID] = {}
+    if user_id is not None:
+        daily_delete = daily_delete.where(col(InvoiceDailyRollup.user_id) == user_id)
+        client_delete = client_delete.where(col(ClientMonthlyRollup.user_id) == user_id)
+        user_filter = "WHERE user_id = :user_id"
+        params["user_id"] = user_id
+
+    _ = await session.execute(daily_delete)
+    _ = await session.execute(client_delete)
+    _ = await session.execute(
+        text(
+            "INSERT INTO invoicedailyrollup (user_id, day, status, invoice_count, total_amount) "
+            + "SELECT user_id, CAST(date AS DATE), status, COUNT(*), SUM(total_amount) "
+            + f"FROM invoice {user_filter} GROUP BY 1, 2, 3"
+        ),
+        params,
+    )
+    _ = await session.execute(
+        text(
+            "INSERT INTO clientmonthlyrollup (user_id, month, client_name, invoice_count, total_amount) "
+            + "SELECT user_id, CAST(date_trunc('month', date) AS DATE), client_name, "
+            + f"COUNT(*), SUM(total_amount) FROM invoice {user_filter} GROUP BY 1, 2, 3"
+        ),
+        params,
+    )
+
+
+async def get_summary(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    top_clients: int = 10,
+) -> AnalyticsSummary:
+    """Dashboard figures, read from the rollups: O(days), not O(invoices)."""
+    month = cast(func.date_trunc("month", InvoiceDailyRollup.day), Date)
+    monthly_query = (
+        select(
+            month.label("month"),
+            InvoiceDailyRollup.status,
+            func.sum(InvoiceDailyRollup.invoice_count).label("invoice_count"),
+            func.sum(InvoiceDailyRollup.total_amount).label("total_amount"),
+        )
+        .where(InvoiceDailyRollup.user_id == user_id)
+        .group_by(month, InvoiceDailyRollup.status)
+        .order_by(month, InvoiceDailyRollup.status)
+    )
+    client_query = (
+        select(
+            ClientMonthlyRollup.client_name,
+            func.sum(ClientMonthlyRollup.invoice_count).label("invoice_count"),
+            func.sum(ClientMonthlyRollup.total_amount).label("total_amount"),
+        )
+        .where(ClientMonthlyRollup.user_id == user_id)
+        .group_by(ClientMonthlyRollup.client_name)
+        .having(func.sum(ClientMonthlyRollup.invoice_count) > 0)
+        .order_by(func.sum(ClientMonthlyRollup.total_amount).desc())
+        .limit(top_clients)
+    )
+    if date_from:
+        monthly_query = monthly_query.where(InvoiceDailyRollup.day >= date_from)
+        client_query = client_query.where(
+            ClientMonthlyRollup.month >= date_from.replace(day=1)
+        )
+    if date_to:
+        monthly_query = monthly_query.where(InvoiceDailyRollup.day <= date_to)
+        client_query = client_query.where(ClientMonthlyRollup.month <= date_to)
+
+    by_month = [
+        MonthlyRevenue(
+            month=row.month,  # pyright: ignore[reportAny]
+            status=row.status,
+            invoice_count=int(row.invoice_count),  # pyright: ignore[reportAny]
+            total_amount=float(row.total_amount or 0),  # pyright: ignore[reportAny]
+        )
+        for row in await session.execute(monthly_query)
+        if row.invoice_count  # pyright: ignore[reportAny]
+    ]
+    top = [
+        ClientRevenue(
+            client_name=row.client_name,
+            invoice_count=int(row.invoice_count),  # pyright: ignore[reportAny]
+            total_amount=float(row.total_amount or 0),  # pyright: ignore[reportAny]
+        )
+        for row in await session.execute(client_query)
+    ]
+
+    statuses: dict[str, StatusTotal] = {}
+    for entry in by_month:
+        total = statuses.setdefault(
+            entry.status,
+            StatusTotal(status=entry.status, invoice_count=0, total_amount=0.0),
+        )
+        total.invoice_count += entry.invoice_count
+        total.total_amount += entry.total_amount
+
+    invoice_count = sum(s.invoice_count for s in statuses.values())
+    total_amount = sum(s.total_amount for s in statuses.values())
+    outstanding = [statuses[s] for s in OUTSTANDING_STATUSES if s in statuses]
+    return AnalyticsSummary(
+        invoice_count=invoice_count,
+        total_amount=total_amount,
+        average_invoice_value=total_amount / invoice_count if invoice_count else 0.0,
+        outstanding_count=sum(s.invoice_count for s in outstanding),
+        outstanding_amount=sum(s.total_amount for s in outstanding),
+        by_status=list(statuses.values()),
+        by_month=by_month,
+        top_clients=top,
+    )
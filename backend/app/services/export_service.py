@@ -0,0 +1,277 @@
+import asyncio
+import csv
+import io
+import json
+import re
+import uuid
+import zipfile
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+)
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any
+
+from sqlalchemy import RowMapping, Select, distinct, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.core.config import settings
+from app.models import Invoice, InvoiceFilter, User
+from app.services.invoice_queries import filter_invoices
+from app.services.line_items import CENT
+from app.services.pdf_service import RENDER_ERRORS, render_invoice_pdf
+from app.services.render_pool import RenderPoolSaturated, render_pool
+from app.services.templates import (
+    VersionedTemplate,
+    load_user_templates,
+    template_for,
+)
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class _ZipSink:
+    """Write-only, non-seekable file object that buffers ZIP output.
+
+    ``zipfile`` detects that it cannot seek and falls back to data
+    descriptors, so the archive can be flushed to the client entry by entry.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes, /) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def invoice_pdf_filename(invoice: Invoice) -> str:
+    number = _UNSAFE_FILENAME_CHARS.sub("_", invoice.invoice_number).strip("_")
+    return f"{number or 'invoice'}-{str(invoice.id)[:8]}.pdf"
+
+
+async def _render_with_retry(
+    invoice: Invoice, user: User, template: VersionedTemplate
+) -> bytes:
+    # A bulk export shares the render pool with interactive requests, so wait
+    # for room rather than failing the whole archive on a busy pool, but give
+    # up on the invoice if the pool stays full for too long.
+    waited = 0.0
+    while True:
+        try:
+            return await render_invoice_pdf(invoice, user, template)
+        except RenderPoolSaturated as e:
+            waited += e.retry_after
+            if waited > settings.EXPORT_RENDER_MAX_WAIT_SECONDS:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def _aiter(invoices: Iterable[Invoice]) -> AsyncIterator[Invoice]:
+    for invoice in invoices:
+        yield invoice
+
+
+async def open_pdf_export(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    filters: InvoiceFilter,
+    batch_size: int | None = None,
+) -> tuple[int, dict[str, VersionedTemplate], AsyncIterable[Invoice]]:
+    """Count and stream the user's invoices matching ``filters``, by date.
+
+    Returns the count, the user templates they use, and the invoices
+    themselves, fetched from a server-side cursor ``batch_size`` at a time
+    so an export never holds every matching invoice at once. The session
+    must stay open until the stream is consumed.
+    """
+    summary = filter_invoices(
+        select(
+            func.count(), func.array_agg(distinct(col(Invoice.template_name)))
+        ).where(Invoice.user_id == user_id),
+        filters,
+    )
+    count, names = (await session.execute(summary)).one()
+    templates = await load_user_templates(session, user_id, names or ())
+    query = filter_invoices(select(Invoice).where(Invoice.user_id == user_id), filters)
+    invoices = await session.stream_scalars(
+        query.order_by(col(Invoice.date)).execution_options(
+            yield_per=batch_size or settings.EXPORT_BATCH_SIZE
+        )
+    )
+    return count, templates, invoices
+
+
+async def stream_invoice_pdfs_zip(
+    invoices: Iterable[Invoice] | AsyncIterable[Invoice],
+    user: User,
+    concurrency: int | None = None,
+    templates: Mapping[str, VersionedTemplate] | None = None,
+    progress: Callable[[int], Awaitable[None]] | None = None,
+) -> AsyncIterator[bytes]:
+    """Render invoices in parallel and stream them out as a ZIP archive.
+
+    At most ``concurrency`` renders are in flight and each finished PDF is
+    written and flushed immediately, so memory stays bounded by the window
+    size rather than the number of invoices. ``invoices`` is only pulled
+    from as the window frees up, so it can be a database stream (see
+    ``open_pdf_export``). ``templates`` maps the user's
+    template names to compiled revisions (see ``load_user_templates``).
+    ``progress`` is awaited with the number of invoices finished so far.
+    """
+    window = concurrency or render_pool.workers
+    sink = _ZipSink()
+    failed: list[str] = []
+    in_flight: dict[asyncio.Task[bytes], Invoice] = {}
+    remaining = aiter(
+        invoices if isinstance(invoices, AsyncIterable) else _aiter(invoices)
+    )
+    finished = 0
+
+    try:
+        with zipfile.ZipFile(
+            sink, mode="w", compression=zipfile.ZIP_DEFLATED
+        ) as archive:
+            while True:
+                while len(in_flight) < window:
+                    invoice = await anext(remaining, None)
+                    if invoice is None:
+                        break
+                    task = asyncio.create_task(
+                        _render_with_retry(
+                            invoice, user, template_for(invoice, templates or {})
+                        )
+                    )
+                    in_flight[task] = invoice
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    invoice = in_flight.pop(task)
+                    try:
+                        archive.writestr(invoice_pdf_filename(invoice), task.result())
+                    except RENDER_ERRORS as e:
+                        failed.append(f"{invoice.invoice_number} ({invoice.id}): {e}")
+                finished += len(done)
+                if progress:
+                    await progress(finished)
+                yield sink.drain()
+
+            if failed:
+                archive.writestr("errors.txt", "\n".join(failed) + "\n")
+        yield sink.drain()
+    finally:
+        # Client went away mid-stream: don't keep rendering for nobody.
+        for task in in_flight:
+            _ = task.cancel()
+
+
+INVOICE_EXPORT_COLUMNS = (
+    "invoice_id",
+    "invoice_number",
+    "date",
+    "due_date",
+    "status",
+    "client_name",
+    "client_email",
+    "total_amount",
+    "item_position",
+    "description",
+    "quantity",
+    "unit_price",
+    "line_total",
+)
+
+
+def _line_total(item: Mapping[str, Any]) -> Decimal | None:  # pyright: ignore[reportExplicitAny]
+    """Rounded to the cent the way ``line_items`` stores it."""
+    try:
+        quantity = Decimal(str(item["quantity"]))  # pyright: ignore[reportAny]
+        unit_price = Decimal(str(item["unit_price"]))  # pyright: ignore[reportAny]
+    except (KeyError, InvalidOperation):
+        return None
+    if not (quantity.is_finite() and unit_price.is_finite()):
+        return None
+    return (quantity * unit_price).quantize(CENT, ROUND_HALF_UP)
+
+
+def flatten_invoice_row(
+    row: RowMapping | Mapping[str, Any],  # pyright: ignore[reportExplicitAny]
+) -> Iterator[dict[str, Any]]:  # pyright: ignore[reportExplicitAny]
+    """One record per line item; invoices without items yield a single record."""
+    invoice = {
+        "invoice_id": str(row["id"]),
+        "invoice_number": row["invoice_number"],
+        "date": row["date"].isoformat(),  # pyright: ignore[reportAny]
+        "due_date": row["due_date"].isoformat() if row["due_date"] else None,  # pyright: ignore[reportAny]
+        "status": row["status"],
+        "client_name": row["client_name"],
+        "client_email": row["client_email"],
+        "total_amount": row["total_amount"],
+    }
+    items = (row["content"] or {}).get("items") or [{}]  # pyright: ignore[reportAny]
+    for position, item in enumerate(items, start=1):  # pyright: ignore[reportAny]
+        yield invoice | {
+            "item_position": position if item else None,
+            "description": item.get("description"),  # pyright: ignore[reportAny]
+            "quantity": item.get("quantity"),  # pyright: ignore[reportAny]
+            "unit_price": item.get("unit_price"),  # pyright: ignore[reportAny]
+            "line_total": _line_total(item) if item else None,  # pyright: ignore[reportAny]
+        }
+
+
+async def stream_invoice_export(
+    session: AsyncSession,
+    query: Select[Any],  # pyright: ignore[reportExplicitAny]
+    export_format: str,
+    batch_size: int | None = None,
+) -> AsyncIterator[str]:
+    """Stream ``query`` as CSV or NDJSON, one chunk per fetched batch.
+
+    Rows come from a server-side cursor ``batch_size`` at a time, so memory
+    use does not depend on how many invoices match.
+    """
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer: csv.DictWriter[str] = csv.DictWriter(
+            buffer, fieldnames=INVOICE_EXPORT_COLUMNS
+        )
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    result = await session.stream(
+        query.execution_options(yield_per=batch_size or settings.EXPORT_BATCH_SIZE)
+    )
+    async for partition in result.mappings().partitions():
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=INVOICE_EXPORT_COLUMNS)
+            for row in partition:
+                writer.writerows(flatten_invoice_row(row))
+            yield buffer.getvalue()
+        else:
+            yield "".join(
+                json.dumps(record, default=float) + "\n"
+                for row in partition
+                for record in flatten_invoice_row(row)
+            )
@@ -0,0 +1,147 @@
+import json
+import uuid
+from collections.abc import Iterator
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col
+
+from app.core.config import settings
+from app.models import (
+    ImportRowError,
+    Invoice,
+    InvoiceCreate,
+    InvoiceImportResult,
+    LineItem,
+)
+from app.services.analytics import record_invoices_created, rollup_key
+from app.services.invoice_numbers import assign_invoice_numbers
+from app.services.line_items import InvoiceTotals, apply_totals
+from app.services.usage import consume_invoices, current_period, release_invoices
+
+LINE_ITEMS_PER_INSERT = 2_000
+
+
+class ImportTooLarge(Exception):
+    pass
+
+
+def parse_records(body: bytes, ndjson: bool) -> Iterator[tuple[int, object]]:
+    """Yield ``(row_number, decoded_record)``; undecodable rows yield the error."""
+    if ndjson:
+        row = 0
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                yield row, json.loads(line)
+            except ValueError as e:
+                yield row, e
+        return
+
+    try:
+        records = json.loads(body)  # pyright: ignore[reportAny]
+    except ValueError as e:
+        yield 1, e
+        return
+    if not isinstance(records, list):
+        yield 1, ValueError("Expected a JSON array of invoices")
+        return
+    yield from enumerate(records, start=1)  # pyright: ignore[reportUnknownArgumentType]
+
+
+def _error_messages(error: Exception) -> list[str]:
+    if isinstance(error, ValidationError):
+        return [
+            f"{'.'.join(str(loc) for loc in e['loc']) or 'record'}: {e['msg']}"
+            for e in error.errors()
+        ]
+    return [str(error)]
+
+
+async def import_invoices(
+    session: AsyncSession, user_id: uuid.UUID, body: bytes, ndjson: bool
+) -> InvoiceImportResult:
+    """Validate every record and insert the valid ones in multi-row chunks.
+
+    Rows without an invoice number are numbered from the user's series.
+    Raises PlanLimitExceeded, importing nothing, if the rows would take the
+    user past the plan's monthly limit.
+    Rows whose invoice number already exists (in the database or earlier in
+    the same payload) are reported as errors rather than failing the batch.
+    Nothing is committed here; the caller owns the transaction.
+    """
+    errors: list[ImportRowError] = []
+    pending: list[tuple[int, Invoice, InvoiceTotals]] = []
+    seen_numbers: set[str] = set()
+
+    for row, record in parse_records(body, ndjson):
+        if row > settings.IMPORT_MAX_ROWS:
+            raise ImportTooLarge(f"At most {settings.IMPORT_MAX_ROWS} rows per import")
+        try:
+            if isinstance(record, Exception):
+                raise record
+            invoice_in = InvoiceCreate.model_validate(record)
+            invoice = Invoice(**invoice_in.model_dump(), user_id=user_id)  # pyright: ignore[reportAny]
+            totals = apply_totals(invoice)
+        except (ValidationError, ValueError) as e:
+            errors.append(ImportRowError(row=row, errors=_error_messages(e)))
+            continue
+        if invoice_in.invoice_number in seen_numbers:
+            errors.append(
+                ImportRowError(row=row, errors=["invoice_number: duplicated in import"])
+            )
+            continue
+        if invoice_in.invoice_number:
+            seen_numbers.add(invoice_in.invoice_number)
+        pending.append((row, invoice, totals))
+
+    # Counted up front, so the whole import is refused when it would pass
+    # the limit; rows that hit an existing number are given back below.
+    period = current_period()
+    await consume_invoices(session, user_id, len(pending), period)
+    # Rows without a number share one block from the counter.
+    await assign_invoice_numbers(session, user_id, [i for _, i, _ in pending])
+
+    created: list[Invoice] = []
+    chunk_size = settings.IMPORT_CHUNK_SIZE
+    for start in range(0, len(pending), chunk_size):
+        chunk = pending[start : start + chunk_size]
+        values: list[dict[str, Any]] = [  # pyright: ignore[reportExplicitAny]
+            invoice.model_dump() for _, invoice, _ in chunk
+        ]
+        result = await session.execute(
+            insert(Invoice)
+            .values(values)
+            .on_conflict_do_nothing(index_elements=["user_id", "invoice_number"])
+            .returning(col(Invoice.id))
+        )
+        inserted = set(result.scalars().all())
+        items: list[dict[str, Any]] = []  # pyright: ignore[reportExplicitAny]
+        for row, invoice, totals in chunk:
+            if invoice.id in inserted:
+                created.append(invoice)
+                items.extend(item.model_dump() for item in totals.items)
+            else:
+                errors.append(
+                    ImportRowError(row=row, errors=["invoice_number: already exists"])
+                )
+        # asyncpg caps a statement at 32767 bind parameters, and one chunk
+        # of invoices can carry any number of items.
+        for start in range(0, len(items), LINE_ITEMS_PER_INSERT):
+            _ = await session.execute(
+                insert(LineItem).values(items[start : start + LINE_ITEMS_PER_INSERT])
+            )
+
+    if len(created) < len(pending):
+        await release_invoices(session, user_id, period, len(pending) - len(created))
+    await record_invoices_created(session, (rollup_key(i) for i in created))
+    errors.sort(key=lambda e: e.row)
+    return InvoiceImportResult(
+        created=len(created),
+        ids=[i.id for i in created if i.id],
+        errors=errors,
+    )
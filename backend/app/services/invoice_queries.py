@@ -0,0 +1,48 @@
+import re
+from typing import Any, TypeVar
+
+from sqlalchemy import ColumnElement, Select, func, literal_column
+from sqlmodel import col
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models import Invoice, InvoiceFilter
+
+# Search words are runs of letters and digits; the tsquery is built from them
+# alone, so user input never reaches the tsquery parser's operators.
+_SEARCH_WORD = re.compile(r"[^\W_]+")
+MAX_SEARCH_WORDS = 8
+
+_Query = TypeVar("_Query", SelectOfScalar[Invoice], Select[Any])  # pyright: ignore[reportExplicitAny]
+
+
+def filter_invoices(query: _Query, filters: InvoiceFilter) -> _Query:
+    if filters.date_from:
+        query = query.where(col(Invoice.date) >= filters.date_from)
+    if filters.date_to:
+        query = query.where(col(Invoice.date) <= filters.date_to)
+    if filters.status:
+        query = query.where(col(Invoice.status) == filters.status)
+    if filters.client_name:
+        query = query.where(
+            col(Invoice.client_name).icontains(filters.client_name, autoescape=True)
+        )
+    if filters.invoice_number:
+        query = query.where(
+            col(Invoice.invoice_number).startswith(
+                filters.invoice_number, autoescape=True
+            )
+        )
+    if filters.ids:
+        query = query.where(col(Invoice.id).in_(filters.ids))
+    return query
+
+
+def search_tsquery(text: str) -> ColumnElement[Any] | None:  # pyright: ignore[reportExplicitAny]
+    """A tsquery matching every word of ``text`` as a prefix; None if it has none."""
+    words = _SEARCH_WORD.findall(text.lower())[:MAX_SEARCH_WORDS]
+    if not words:
+        return None
+    # Same config as INVOICE_SEARCH_DOCUMENT, so words are normalized alike.
+    return func.to_tsquery(
+        literal_column("'simple'::regconfig"), " & ".join(f"{w}:*" for w in words)
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.models import InvoiceFilter, User
+from app.services.analytics import rebuild_rollups
+from app.services.export_service import open_pdf_export, stream_invoice_pdfs_zip
+from app.services.jobs import JobContext, JobResult, job_handler
+from app.services.usage import reconcile_usage
+
+# Importing this module registers every job kind with services.jobs.
+ANALYTICS_REBUILD = "analytics.rebuild"
+INVOICES_EXPORT_PDF = "invoices.export_pdf"
+USAGE_RECONCILE = "usage.reconcile"
+
+
+def job_result_path(filename: str) -> Path:
+    return Path(settings.JOB_RESULT_DIR) / filename
+
+
+def expire_job_results(max_age: float | None = None) -> int:
+    """Delete result files older than ``max_age`` seconds; returns how many.
+
+    Downloads of a deleted file answer 410 Gone.
+    """
+    cutoff = time.time() - (max_age or settings.JOB_RESULT_TTL_SECONDS)
+    removed = 0
+    for path in Path(settings.JOB_RESULT_DIR).glob("*"):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue  # Removed by another worker in the meantime.
+    return removed
+
+
+@job_handler(ANALYTICS_REBUILD)
+async def rebuild_analytics(context: JobContext) -> JobResult:
+    await context.report(0, 1, "Rebuilding rollups")
+    async with context.session_factory() as session:
+        await rebuild_rollups(session, context.user_id)
+        await session.commit()
+    return None
+
+
+@job_handler(USAGE_RECONCILE)
+async def reconcile_plan_usage(context: JobContext) -> JobResult:
+    await context.report(0, 1, "Recounting invoices")
+    async with context.session_factory() as session:
+        await reconcile_usage(session, context.user_id)
+        await session.commit()
+    return None
+
+
+@job_handler(INVOICES_EXPORT_PDF)
+async def export_invoice_pdfs(context: JobContext) -> JobResult:
+    """Render the invoices matching ``payload`` (an InvoiceFilter) into a ZIP."""
+    filters = InvoiceFilter.model_validate(context.payload)
+    async with context.session_factory() as session:
+        user = await session.get(User, context.user_id)
+        if user is None:
+            raise LookupError("User no longer exists")
+        total, templates, invoices = await open_pdf_export(
+            session, context.user_id, filters
+        )
+
+        async def progress(finished: int) -> None:
+            await context.report(finished, total, f"Rendered {finished} of {total}")
+
+        filename = f"{context.job_id}.zip"
+        path = job_result_path(filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Each new export sweeps out the ones nobody downloaded in time.
+        _ = await asyncio.to_thread(expire_job_results)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("wb") as archive:
+                async for chunk in stream_invoice_pdfs_zip(
+                    invoices, user, templates=templates, progress=progress
+                ):
+                    _ = await asyncio.to_thread(archive.write, chunk)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return {"file": filename, "invoice_count": total}
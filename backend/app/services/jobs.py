@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.core.config import settings
+from app.db import async_session_maker
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+JobResult = dict[str, Any] | None  # pyright: ignore[reportExplicitAny]
+
+
+class JobContext:
+    """Handed to a job handler; reports progress and keeps the claim alive.
+
+    Every write is conditional on ``attempt``: once the lease has expired
+    and another worker has reclaimed the job, this one can no longer touch
+    it.
+    """
+
+    def __init__(
+        self,
+        job: Job,
+        session_factory: Callable[[], AsyncSession],
+        lease: timedelta,
+        min_report_interval: float = 1.0,
+    ):
+        assert job.id
+        self.job_id: uuid.UUID = job.id
+        self.user_id: uuid.UUID = job.user_id
+        self.payload: dict[str, Any] = job.payload  # pyright: ignore[reportExplicitAny]
+        self.attempt: int = job.attempts
+        self.session_factory: Callable[[], AsyncSession] = session_factory
+        self.lease: timedelta = lease
+        self.min_report_interval: float = min_report_interval
+        self._last_report: float = 0.0
+
+    async def report(
+        self, done: int, total: int | None = None, message: str | None = None
+    ) -> None:
+        """Record progress (``done`` of ``total``) and extend the lease.
+
+        Calls closer together than ``min_report_interval`` are dropped so a
+        tight loop can report every step without a write per step.
+        """
+        now = time.monotonic()
+        if now - self._last_report < self.min_report_interval and done != total:
+            return
+        self._last_report = now
+        values: dict[str, Any] = {"run_after": func.now() + self.lease}  # pyright: ignore[reportExplicitAny]
+        if total:
+            values["progress"] = min(done / total, 1.0)
+        if message is not None:
+            values["progress_message"] = message
+        _ = await self.update(values)
+
+    async def extend_lease(self) -> bool:
+        return await self.update({"run_after": func.now() + self.lease})
+
+    async def update(self, values: dict[str, Any]) -> bool:  # pyright: ignore[reportExplicitAny]
+        """Apply ``values`` to the job; False if the claim was lost."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Job)
+                .where(
+                    col(Job.id) == self.job_id,
+                    col(Job.status) == "running",
+                    col(Job.attempts) == self.attempt,
+                )
+                .values(values)
+            )
+            await session.commit()
+        return bool(result.rowcount)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownArgumentType]
+
+
+JobHandler = Callable[[JobContext], Awaitable[JobResult]]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register the coroutine that runs jobs of ``kind``."""
+
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        return handler
+
+    return register
+
+
+def enqueue_job(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    kind: str,
+    payload: dict[str, Any] | None = None,  # pyright: ignore[reportExplicitAny]
+) -> Job:
+    """Add a job to the session; it becomes visible to workers on commit."""
+    if kind not in _handlers:
+        raise KeyError(f"No handler registered for job kind {kind!r}")
+    job = Job(user_id=user_id, kind=kind, payload=payload or {})
+    session.add(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    return min(
+        settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.JOB_RETRY_MAX_SECONDS,
+    )
+
+
+class JobWorker:
+    """Runs queued jobs, ``concurrency`` at a time.
+
+    Each slot claims one job with ``FOR UPDATE SKIP LOCKED``, so workers in
+    the API processes and in ``worker.py`` share one queue without a
+    broker. A claim is a lease, extended every third of the lease while
+    the handler runs and by every progress report; if the worker dies, the
+    job is retried once the lease runs out.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session_maker,
+        concurrency: int = 2,
+        poll_interval: float = 2.0,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+    ):
+        self.session_factory: Callable[[], AsyncSession] = session_factory
+        self.concurrency: int = concurrency
+        self.poll_interval: float = poll_interval
+        self.lease: timedelta = timedelta(seconds=lease_seconds)
+        self.max_attempts: int = max_attempts
+        self._wake: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._wake = asyncio.Event()
+            self._tasks = [
+                asyncio.create_task(self._run()) for _ in range(self.concurrency)
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            _ = task.cancel()
+        _ = await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            try:
+                ran = await self.run_once()
+            except Exception:
+                logger.exception("Job worker iteration failed")
+                ran = False
+            if not ran:
+                try:
+                    _ = await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def _claim(self) -> Job | None:
+        async with self.session_factory() as session:
+            due = (
+                select(Job.id)
+                .where(
+                    col(Job.status).in_(["queued", "running"]),
+                    col(Job.run_after) <= func.now(),
+                    col(Job.kind).in_(list(_handlers)),
+                )
+                .order_by(col(Job.run_after))
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            result = await session.execute(
+                update(Job)
+                .where(col(Job.id) == due.scalar_subquery())
+                .values(
+                    status="running",
+                    attempts=col(Job.attempts) + 1,
+                    run_after=func.now() + self.lease,
+                    started_at=func.coalesce(col(Job.started_at), func.now()),
+                )
+                .returning(Job)
+            )
+            job = result.scalars().first()
+            await session.commit()
+            return job
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job; returns False when none was due."""
+        job = await self._claim()
+        if job is None:
+            return False
+
+        context = JobContext(job, self.session_factory, self.lease)
+        heartbeat = asyncio.create_task(self._heartbeat(context))
+        values: dict[str, Any]  # pyright: ignore[reportExplicitAny]
+        try:
+            if job.attempts > self.max_attempts:
+                # Only reachable by reclaiming expired leases, i.e. the job
+                # keeps taking its worker down with it.
+                raise RuntimeError("Worker stopped while running the job")
+            result = await _handlers[job.kind](context)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job.id, job.kind)
+            values = {"error": f"{type(e).__name__}: {e}"[:1000]}
+            if job.attempts < self.max_attempts:
+                values |= {
+                    "status": "queued",
+                    "run_after": datetime.now(UTC)
+                    + timedelta(seconds=retry_delay(job.attempts)),
+                }
+            else:
+                values |= {"status": "failed", "finished_at": func.now()}
+        else:
+            values = {
+                "status": "succeeded",
+                "result": result,
+                "error": None,
+                "progress": 1.0,
+                "finished_at": func.now(),
+            }
+        finally:
+            _ = heartbeat.cancel()
+            _ = await asyncio.gather(heartbeat, return_exceptions=True)
+
+        if not await context.update(values):
+            logger.warning("Job %s lost its claim before it finished", job.id)
+        return True
+
+    async def _heartbeat(self, context: JobContext) -> None:
+        interval = self.lease.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                _ = await context.extend_lease()
+            except Exception:
+                logger.exception("Could not extend the lease of job %s", context.job_id)
+
+
+job_worker = JobWorker(
+    concurrency=settings.JOB_WORKERS,
+    poll_interval=settings.JOB_POLL_SECONDS,
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+)
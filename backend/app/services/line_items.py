@@ -0,0 +1,103 @@
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col
+
+from app.models import Invoice, LineItem
+
+CENT = Decimal("0.01")
+
+
+class InvalidLineItem(ValueError):
+    pass
+
+
+@dataclass
+class InvoiceTotals:
+    subtotal: Decimal = Decimal(0)
+    vat_amount: Decimal = Decimal(0)
+    items: list[LineItem] = field(default_factory=list)
+
+    @property
+    def total(self) -> Decimal:
+        return self.subtotal + self.vat_amount
+
+
+def _decimal(value: object, name: str, position: int) -> Decimal:
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise InvalidLineItem(f"items[{position - 1}].{name}: not a number")
+    if not number.is_finite():
+        raise InvalidLineItem(f"items[{position - 1}].{name}: must be finite")
+    return number
+
+
+def compute_totals(invoice: Invoice) -> InvoiceTotals:
+    """Build line items and money totals from ``content["items"]`` in one pass.
+
+    Each line is rounded to the cent before summing, as on the printed
+    invoice. VAT comes from the item's ``vat_rate`` or else the invoice-wide
+    ``content["vat_rate"]``, in percent.
+    """
+    content: Mapping[str, Any] = invoice.content or {}  # pyright: ignore[reportExplicitAny]
+    default_rate = _decimal(content.get("vat_rate") or 0, "vat_rate", 1)
+    totals = InvoiceTotals()
+    for position, item in enumerate(content.get("items") or [], start=1):  # pyright: ignore[reportAny]
+        if not isinstance(item, Mapping):
+            raise InvalidLineItem(f"items[{position - 1}]: must be an object")
+        quantity = _decimal(item.get("quantity", 0), "quantity", position)  # pyright: ignore[reportUnknownMemberType]
+        unit_price = _decimal(item.get("unit_price", 0), "unit_price", position)  # pyright: ignore[reportUnknownMemberType]
+        vat_rate = _decimal(
+            item.get("vat_rate", default_rate),  # pyright: ignore[reportUnknownMemberType]
+            "vat_rate",
+            position,
+        )
+        line_total = (quantity * unit_price).quantize(CENT, ROUND_HALF_UP)
+        vat_amount = (line_total * vat_rate / 100).quantize(CENT, ROUND_HALF_UP)
+        totals.subtotal += line_total
+        totals.vat_amount += vat_amount
+        totals.items.append(
+            LineItem(
+                invoice_id=invoice.id,  # pyright: ignore[reportArgumentType]
+                user_id=invoice.user_id,
+                position=position,
+                description=str(item.get("description") or ""),  # pyright: ignore[reportUnknownMemberType, reportUnknownArgumentType]
+                quantity=quantity,
+                unit_price=unit_price,
+                vat_rate=vat_rate,
+                line_total=line_total,
+                vat_amount=vat_amount,
+            )
+        )
+    return totals
+
+
+def apply_totals(invoice: Invoice) -> InvoiceTotals:
+    """Overwrite the invoice's money columns with server-computed values.
+
+    Invoices without an ``items`` list keep their supplied ``total_amount``
+    (manually totalled and legacy invoices).
+    """
+    totals = compute_totals(invoice)
+    if "items" in (invoice.content or {}):
+        invoice.subtotal = float(totals.subtotal)
+        invoice.vat_amount = float(totals.vat_amount)
+        invoice.total_amount = float(totals.total)
+    else:
+        invoice.subtotal = invoice.total_amount
+        invoice.vat_amount = 0.0
+    return totals
+
+
+async def replace_line_items(
+    session: AsyncSession, invoice: Invoice, totals: InvoiceTotals
+) -> None:
+    _ = await session.execute(
+        delete(LineItem).where(col(LineItem.invoice_id) == invoice.id)
+    )
+    session.add_all(totals.items)
@@ -0,0 +1,319 @@
+import asyncio
+import logging
+import queue
+import random
+import smtplib
+import ssl
+import threading
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.core.config import settings
+from app.db import async_session_maker
+from app.models import EmailOutbox, Invoice, User
+from app.services.export_service import invoice_pdf_filename
+from app.services.pdf_service import RENDER_ERRORS, render_invoice_pdf
+from app.services.templates import load_user_templates, template_for
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Connection:
+    smtp: smtplib.SMTP
+    sent: int = 0
+
+
+class SmtpPool:
+    """Up to ``size`` SMTP connections, each reused for many messages.
+
+    ``send`` blocks, so call it from a thread. A connection is retired after
+    ``max_messages`` so that a long month-end batch rotates connections now
+    and then without opening one per message.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+        timeout: float = 30.0,
+        size: int = 4,
+        max_messages: int = 100,
+    ):
+        self.host: str = host
+        self.port: int = port
+        self.username: str | None = username
+        self.password: str | None = password
+        self.starttls: bool = starttls
+        self.timeout: float = timeout
+        self.size: int = size
+        self.max_messages: int = max_messages
+        self.connections_opened: int = 0
+        self._idle: queue.LifoQueue[_Connection] = queue.LifoQueue()
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> _Connection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                _ = smtp.starttls(context=ssl.create_default_context())
+            if self.username and self.password:
+                _ = smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections_opened += 1
+        return _Connection(smtp)
+
+    def send(self, message: EmailMessage) -> None:
+        with self._slots:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = None
+            if connection is not None:
+                try:
+                    return self._send_on(connection, message)
+                except smtplib.SMTPServerDisconnected:
+                    pass  # the server dropped an idle connection; open a new one
+            self._send_on(self._connect(), message)
+
+    def _send_on(self, connection: _Connection, message: EmailMessage) -> None:
+        try:
+            _ = connection.smtp.send_message(message)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server refused this message, but the session is still usable.
+            self._release(connection)
+            raise
+        except Exception:
+            connection.smtp.close()
+            raise
+        connection.sent += 1
+        self._release(connection)
+
+    def _release(self, connection: _Connection) -> None:
+        if connection.sent >= self.max_messages:
+            _quit(connection.smtp)
+        else:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                _quit(self._idle.get_nowait().smtp)
+            except queue.Empty:
+                return
+
+
+def _quit(smtp: smtplib.SMTP) -> None:
+    try:
+        _ = smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies mean retrying the same message cannot succeed."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter after the ``attempts``-th failure."""
+    delay = min(
+        settings.EMAIL_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.EMAIL_RETRY_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def build_message(
+    outbox: EmailOutbox, invoice: Invoice, user: User, pdf: bytes
+) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.SMTP_FROM
+    message["To"] = outbox.recipient
+    if user.email:
+        message["Reply-To"] = user.email
+    sender = user.company_name or user.full_name or user.email
+    message["Subject"] = (
+        outbox.subject or f"Invoice {invoice.invoice_number} from {sender}"
+    )
+    message.set_content(
+        outbox.body or f"Please find attached invoice {invoice.invoice_number}.\n"
+    )
+    message.add_attachment(
+        pdf,
+        maintype="application",
+        subtype="pdf",
+        filename=invoice_pdf_filename(invoice),
+    )
+    return message
+
+
+class EmailWorker:
+    """Delivers ``EmailOutbox`` rows.
+
+    Rows are claimed in batches with ``FOR UPDATE SKIP LOCKED``, so any
+    number of workers, in one process or many, can drain the same outbox.
+    A claim is a lease: a worker that dies mid-send leaves the row
+    ``sending`` with an expired ``next_attempt_at``, and another worker
+    takes it over.
+    """
+
+    def __init__(
+        self,
+        pool: SmtpPool,
+        session_factory: Callable[[], AsyncSession] = async_session_maker,
+        batch_size: int = 50,
+        poll_interval: float = 5.0,
+        max_attempts: int = 8,
+        lease_seconds: float = 300.0,
+    ):
+        self.pool: SmtpPool = pool
+        self.session_factory: Callable[[], AsyncSession] = session_factory
+        self.batch_size: int = batch_size
+        self.poll_interval: float = poll_interval
+        self.max_attempts: int = max_attempts
+        self.lease: timedelta = timedelta(seconds=lease_seconds)
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.pool.close)
+
+    def wake(self) -> None:
+        """Skip the rest of the poll interval, e.g. right after enqueueing."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    _ = await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def run_once(self) -> int:
+        """Claim one batch of due messages and try to deliver each of them."""
+        async with self.session_factory() as session:
+            due = (
+                select(EmailOutbox.id)
+                .where(
+                    col(EmailOutbox.status).in_(["queued", "sending"]),
+                    col(EmailOutbox.next_attempt_at) <= func.now(),
+                )
+                .order_by(col(EmailOutbox.next_attempt_at))
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await session.execute(
+                update(EmailOutbox)
+                .where(col(EmailOutbox.id).in_(due.scalar_subquery()))
+                .values(
+                    status="sending",
+                    attempts=col(EmailOutbox.attempts) + 1,
+                    next_attempt_at=func.now() + self.lease,
+                )
+                .returning(col(EmailOutbox.id))
+            )
+            # The primary key is never NULL; this only narrows the model's type.
+            claimed = [
+                outbox_id for outbox_id in result.scalars() if outbox_id is not None
+            ]
+            await session.commit()
+
+        # One delivery per pooled connection at a time; the rest wait here
+        # rather than in threads blocked on the pool.
+        limit = asyncio.Semaphore(self.pool.size)
+
+        async def deliver(outbox_id: uuid.UUID) -> None:
+            async with limit:
+                await self._deliver(outbox_id)
+
+        _ = await asyncio.gather(*(deliver(outbox_id) for outbox_id in claimed))
+        return len(claimed)
+
+    async def _deliver(self, outbox_id: uuid.UUID) -> None:
+        async with self.session_factory() as session:
+            outbox = await session.get(EmailOutbox, outbox_id)
+            if outbox is None:  # the invoice was deleted meanwhile
+                return
+            try:
+                invoice = await session.get(Invoice, outbox.invoice_id)
+                user = await session.get(User, outbox.user_id)
+                if invoice is None or user is None:
+                    raise LookupError("Invoice no longer exists")
+                templates = await load_user_templates(
+                    session, outbox.user_id, [invoice.template_name]
+                )
+                pdf = await render_invoice_pdf(
+                    invoice, user, template_for(invoice, templates)
+                )
+                message = build_message(outbox, invoice, user, pdf)
+                await asyncio.to_thread(self.pool.send, message)
+            except (LookupError, smtplib.SMTPException, OSError, *RENDER_ERRORS) as e:
+                give_up = is_permanent(e) or outbox.attempts >= self.max_attempts
+                outbox.status = "failed" if give_up else "queued"
+                outbox.next_attempt_at = datetime.now(UTC) + timedelta(
+                    seconds=retry_delay(outbox.attempts)
+                )
+                outbox.last_error = f"{type(e).__name__}: {e}"[:1000]
+            else:
+                outbox.status = "sent"
+                outbox.sent_at = datetime.now(UTC)
+                outbox.last_error = None
+            session.add(outbox)
+            await session.commit()
+
+
+smtp_pool = SmtpPool(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USERNAME,
+    password=settings.SMTP_PASSWORD,
+    starttls=settings.SMTP_STARTTLS,
+    timeout=settings.SMTP_TIMEOUT_SECONDS,
+    size=settings.SMTP_POOL_SIZE,
+    max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+)
+email_worker = EmailWorker(
+    smtp_pool,
+    batch_size=settings.EMAIL_BATCH_SIZE,
+    poll_interval=settings.EMAIL_POLL_SECONDS,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    lease_seconds=settings.EMAIL_LEASE_SECONDS,
+)
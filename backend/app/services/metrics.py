@@ -0,0 +1,182 @@
+"""Prometheus metrics, kept with ``prometheus_client``.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set before this module is imported, each
+process writes its values to files in that directory and ``render`` reads
+them all, so a scrape that lands on any worker of a pre-fork server
+reports the whole server. Otherwise ``render`` reports this process only.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+registry = CollectorRegistry()
+
+
+def render() -> bytes:
+    """Every metric in the Prometheus text exposition format."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(registry)
+    scrape = CollectorRegistry()
+    _ = multiprocess.MultiProcessCollector(scrape)
+    return generate_latest(scrape)
+
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time to the end of the response, by route template",
+    ["method", "route", "status"],
+    registry=registry,
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    registry=registry,
+)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["route"],
+    registry=registry,
+)
+db_query_seconds = Histogram(
+    "db_query_duration_seconds",
+    "Time per SQL statement, from send to cursor result",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+    registry=registry,
+)
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Wait for a pooled connection, including pre-ping and reconnects",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+    registry=registry,
+)
+db_pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+render_pool_task_seconds = Histogram(
+    "render_pool_task_seconds",
+    "Render pool task time, including time queued behind other renders",
+    ["task"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+    registry=registry,
+)
+render_pool_queue_depth = Gauge(
+    "render_pool_queue_depth",
+    "Renders running or waiting in the render pool",
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+render_pool_failures = Counter(
+    "render_pool_failures",
+    "Renders refused because the queue was full, or that timed out",
+    ["reason"],
+    registry=registry,
+)
+pdf_cache_requests = Counter(
+    "pdf_cache_requests",
+    "Rendered PDF cache lookups",
+    ["result"],
+    registry=registry,
+)
+password_hash_seconds = Histogram(
+    "password_hash_duration_seconds",
+    "argon2 hash/verify time, including time queued for a hashing thread",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+password_hash_queue_depth = Gauge(
+    "password_hash_queue_depth",
+    "Password hash operations running or waiting",
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+password_hash_rejected = Counter(
+    "password_hash_rejected",
+    "Password hash operations refused under load",
+    registry=registry,
+)
+
+
+@dataclass
+class RequestStats:
+    """Per-request counters, filled in by the hooks below while it runs."""
+
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    render_seconds: float = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        """A ``Server-Timing`` header value, shown by browser dev tools."""
+        parts = [
+            f"app;dur={total_seconds * 1000:.1f}",
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+        ]
+        if self.render_seconds:
+            parts.append(f"render;dur={self.render_seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# SQLAlchemy copies the caller's context into the greenlet that runs the
+# sync driver calls, so the event hooks see the request's RequestStats.
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on ``engine`` and charge it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):  # pyright: ignore[reportUnusedFunction, reportUnusedParameter, reportMissingParameterType, reportUnknownParameterType]
+        conn.info["query_started_at"] = time.perf_counter()  # pyright: ignore[reportUnknownMemberType]
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):  # pyright: ignore[reportUnusedFunction, reportUnusedParameter, reportMissingParameterType, reportUnknownParameterType]
+        started_at: float | None = conn.info.pop("query_started_at", None)  # pyright: ignore[reportUnknownMemberType]
+        if started_at is None:
+            return
+        elapsed = time.perf_counter() - started_at
+        db_query_seconds.observe(elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+
+
+def track_pool(engine: Engine) -> None:
+    """Count ``engine``'s connections in ``db_pool_checked_out``."""
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):  # pyright: ignore[reportUnusedFunction, reportUnusedParameter, reportMissingParameterType, reportUnknownParameterType]
+        db_pool_checked_out.inc()
+
+    # A detached connection leaves the pool without being checked back in.
+    @event.listens_for(engine, "checkin")
+    @event.listens_for(engine, "detach")
+    def _release(dbapi_connection, connection_record):  # pyright: ignore[reportUnusedFunction, reportUnusedParameter, reportMissingParameterType, reportUnknownParameterType]
+        db_pool_checked_out.dec()
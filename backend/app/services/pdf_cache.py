@@ -0,0 +1,223 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.metrics import pdf_cache_requests
+
+
+class PdfCache:
+    """Content-addressed cache of rendered PDFs.
+
+    Entries are keyed by a digest of the HTML fed to WeasyPrint, so a stale
+    entry can never be served for changed data. The memory tier is an LRU
+    bounded by total bytes; the optional disk tier survives restarts and is
+    shared by every worker pointing at the same directory.
+
+    On disk, renderings of an invoice live in a directory of their own, so
+    any worker can invalidate them without knowing their keys. The disk
+    tier has its own budget, ``disk_max_bytes``: once a worker has written
+    a tenth of it, a background sweep deletes the least recently used
+    files until the directory is back under 90% of the budget.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        disk_dir: str | Path | None = None,
+        disk_max_bytes: int = 0,
+    ):
+        self.max_bytes: int = max_bytes
+        self.disk_dir: Path | None = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes: int = disk_max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size: int = 0
+        self._keys_by_invoice: dict[uuid.UUID, set[str]] = {}
+        self._invoice_by_key: dict[str, uuid.UUID] = {}
+        self._written_since_sweep: int = 0
+        self._sweeping: bool = False
+        self._lock: threading.Lock = threading.Lock()
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for(html: str, version: str = "") -> str:
+        """Digest of the HTML, namespaced by the template ``version`` stamp."""
+        return hashlib.sha256(f"{version}\0{html}".encode()).hexdigest()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, invoice_id: uuid.UUID | None = None) -> bytes | None:
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+                pdf_cache_requests.labels(result="memory").inc()
+                return pdf
+
+        path = self._disk_path(key, invoice_id)
+        try:
+            pdf = path.read_bytes() if path is not None else None
+            if path is not None:
+                # The sweep evicts by modification time, so mark it as used.
+                os.utime(path)
+        except OSError:
+            pdf = None
+        if pdf is None:
+            pdf_cache_requests.labels(result="miss").inc()
+            return None
+        pdf_cache_requests.labels(result="disk").inc()
+        with self._lock:
+            self._store(key, pdf, invoice_id)
+        return pdf
+
+    def put(self, key: str, pdf: bytes, invoice_id: uuid.UUID | None = None) -> None:
+        with self._lock:
+            self._store(key, pdf, invoice_id)
+
+        path = self._disk_path(key, invoice_id)
+        if path is None or path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file.
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                _ = tmp.write(pdf)
+            os.replace(tmp_name, path)
+        except OSError:
+            Path(tmp_name).unlink(missing_ok=True)
+            return
+        self._written(len(pdf))
+
+    def invalidate(self, invoice_id: uuid.UUID | None) -> None:
+        """Drop every rendering produced for ``invoice_id``."""
+        if invoice_id is None:
+            return
+        with self._lock:
+            for key in self._keys_by_invoice.pop(invoice_id, set()):
+                del self._invoice_by_key[key]
+                pdf = self._entries.pop(key, None)
+                if pdf is not None:
+                    self._size -= len(pdf)
+
+        # Also removes renderings other workers wrote and this one never saw.
+        if self.disk_dir is not None:
+            shutil.rmtree(
+                self._invoice_dir(self.disk_dir, invoice_id), ignore_errors=True
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_invoice.clear()
+            self._invoice_by_key.clear()
+            self._size = 0
+
+    def sweep_disk(self) -> int:
+        """Trim the disk tier to 90% of its budget, oldest files first.
+
+        Returns the number of bytes deleted. Safe to run from several
+        workers at once; a file already gone is simply skipped.
+        """
+        if self.disk_dir is None or not self.disk_max_bytes:
+            return 0
+        files: list[tuple[float, int, Path]] = []
+        total = 0
+        for path in self.disk_dir.rglob("*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        freed = 0
+        target = self.disk_max_bytes * 9 // 10
+        for _, size, path in sorted(files):
+            if total - freed <= target:
+                break
+            path.unlink(missing_ok=True)
+            freed += size
+            if path.parent.parent.name == "invoices":
+                try:
+                    path.parent.rmdir()
+                except OSError:
+                    pass  # Still holds other renderings.
+        return freed
+
+    def _written(self, size: int) -> None:
+        if not self.disk_max_bytes:
+            return
+        with self._lock:
+            self._written_since_sweep += size
+            if self._sweeping or self._written_since_sweep < self.disk_max_bytes // 10:
+                return
+            self._sweeping = True
+            self._written_since_sweep = 0
+        # Walking the directory is slow, so keep it off the caller's thread.
+        threading.Thread(
+            target=self._sweep_in_background, name="pdf-cache-sweep", daemon=True
+        ).start()
+
+    def _sweep_in_background(self) -> None:
+        try:
+            _ = self.sweep_disk()
+        finally:
+            with self._lock:
+                self._sweeping = False
+
+    def _store(self, key: str, pdf: bytes, invoice_id: uuid.UUID | None = None) -> None:
+        # Caller holds the lock.
+        if len(pdf) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[key] = pdf
+        self._size += len(pdf)
+        if invoice_id is not None:
+            self._keys_by_invoice.setdefault(invoice_id, set()).add(key)
+            self._invoice_by_key[key] = invoice_id
+        while self._size > self.max_bytes:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self._unindex(evicted_key)
+
+    def _unindex(self, key: str) -> None:
+        # Caller holds the lock.
+        invoice_id = self._invoice_by_key.pop(key, None)
+        if invoice_id is None:
+            return
+        keys = self._keys_by_invoice[invoice_id]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_invoice[invoice_id]
+
+    @staticmethod
+    def _invoice_dir(disk_dir: Path, invoice_id: uuid.UUID) -> Path:
+        return disk_dir / "invoices" / str(invoice_id)
+
+    def _disk_path(self, key: str, invoice_id: uuid.UUID | None = None) -> Path | None:
+        if self.disk_dir is None:
+            return None
+        if invoice_id is not None:
+            return self._invoice_dir(self.disk_dir, invoice_id) / f"{key}.pdf"
+        return self.disk_dir / key[:2] / f"{key}.pdf"
+
+
+pdf_cache = PdfCache(
+    settings.PDF_CACHE_MAX_BYTES,
+    settings.PDF_CACHE_DIR,
+    settings.PDF_CACHE_DISK_MAX_BYTES,
+)
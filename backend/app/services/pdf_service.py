@@ -1,19 +1,111 @@
 # pyright: reportMissingTypeStubs=false
-from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from jinja2 import TemplateError
 
 from app.models import Invoice, User
+from app.services.pdf_cache import pdf_cache
+from app.services.render_pool import RenderPoolSaturated, RenderTimeout, render_pool
+from app.services.templates import VersionedTemplate, template_registry
+
+
+class PdfLayoutError(Exception):
+    """WeasyPrint could not lay out an invoice's HTML."""
+
 
-TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
-env = Environment(
-    loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html", "xml"])
+# What rendering one invoice can fail with short of a bug here: the user's
+# template (arithmetic in it included), the layout, or a busy or broken pool.
+RENDER_ERRORS = (
+    TemplateError,
+    ArithmeticError,
+    PdfLayoutError,
+    RenderPoolSaturated,
+    RenderTimeout,
+    BrokenProcessPool,
 )
 
 
-def generate_pdf(invoice: Invoice, user: User) -> bytes:
-    template = env.get_template("invoice.html")
-    html_content = template.render(invoice=invoice, user=user)
-    from weasyprint import HTML  # type: ignore
+def render_invoice_html(
+    invoice: Invoice, user: User, template: VersionedTemplate | None = None
+) -> str:
+    template = template or template_registry.builtin()
+    return template.render(invoice=invoice, user=user)
+
+
+def _data_only_url_fetcher() -> Any:  # pyright: ignore[reportExplicitAny]
+    # User templates are untrusted HTML: never let them make WeasyPrint reach
+    # the network or the local filesystem. Inline data: URIs still work.
+    try:
+        # WeasyPrint >= 68; the locked 67 only has default_url_fetcher.
+        from weasyprint.urls import URLFetcher  # pyright: ignore[reportAttributeAccessIssue, reportUnknownVariableType]
+
+        return URLFetcher(allowed_protocols={"data"})  # pyright: ignore[reportUnknownVariableType]
+    except ImportError:
+        from functools import partial
+
+        from weasyprint.urls import default_url_fetcher  # pyright: ignore[reportUnknownVariableType]
+
+        return partial(default_url_fetcher, allowed_protocols={"data"})
+
+
+def html_to_pdf(html_content: str) -> bytes:
     from typing import cast
 
-    return cast(bytes, HTML(string=html_content).write_pdf())  # pyright: ignore[reportUnknownMemberType]
+    from weasyprint import HTML  # type: ignore
+
+    document = HTML(string=html_content, url_fetcher=_data_only_url_fetcher())
+    try:
+        return cast(bytes, document.write_pdf())  # pyright: ignore[reportUnknownMemberType]
+    except Exception as e:
+        # Runs in a render pool process; the original may not even unpickle.
+        raise PdfLayoutError(f"{type(e).__name__}: {e}") from e
+
+
+def generate_pdf(
+    invoice: Invoice, user: User, template: VersionedTemplate | None = None
+) -> bytes:
+    template = template or template_registry.builtin()
+    html_content = render_invoice_html(invoice, user, template)
+    key = pdf_cache.key_for(html_content, template.version)
+    cached = pdf_cache.get(key, invoice.id)
+    if cached is not None:
+        return cached
+
+    pdf_content = html_to_pdf(html_content)
+    pdf_cache.put(key, pdf_content, invoice_id=invoice.id)
+    return pdf_content
+
+
+def invoice_pdf_source(
+    invoice: Invoice, user: User, template: VersionedTemplate | None = None
+) -> tuple[str, str]:
+    """The HTML an invoice's PDF is laid out from, and its cache key.
+
+    The key identifies the PDF's exact bytes, so it doubles as an ETag that
+    costs a template render rather than a WeasyPrint layout.
+    """
+    template = template or template_registry.builtin()
+    html_content = render_invoice_html(invoice, user, template)
+    return html_content, pdf_cache.key_for(html_content, template.version)
+
+
+async def render_pdf_source(
+    html_content: str, key: str, invoice_id: uuid.UUID | None = None
+) -> bytes:
+    cached = pdf_cache.get(key, invoice_id)
+    if cached is not None:
+        return cached
+
+    pdf_content = await render_pool.run(html_to_pdf, html_content)
+    pdf_cache.put(key, pdf_content, invoice_id=invoice_id)
+    return pdf_content
+
+
+async def render_invoice_pdf(
+    invoice: Invoice, user: User, template: VersionedTemplate | None = None
+) -> bytes:
+    """Async variant of ``generate_pdf`` that lays out the PDF in the render pool."""
+    html_content, key = invoice_pdf_source(invoice, user, template)
+    return await render_pdf_source(html_content, key, invoice.id)
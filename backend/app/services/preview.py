@@ -0,0 +1,109 @@
+import asyncio
+import importlib.util
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any, Generic, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class PreviewUnavailable(Exception):
+    """PNG previews need the optional ``pypdfium2`` rasterizer."""
+
+
+def png_supported() -> bool:
+    return importlib.util.find_spec("pypdfium2") is not None
+
+
+def pdf_to_png(pdf: bytes, page: int, dpi: int) -> tuple[bytes, int]:
+    """Rasterize one page (0-based) of ``pdf``; returns ``(png, page_count)``.
+
+    Runs in the render pool. Rasterizing the PDF itself rather than laying
+    the HTML out again keeps the preview pixel-identical to the download.
+    """
+    import io
+
+    try:
+        import pypdfium2 as pdfium  # pyright: ignore[reportMissingImports]
+    except ImportError as e:
+        raise PreviewUnavailable("Install the 'preview' extra for PNG output") from e
+
+    document = pdfium.PdfDocument(pdf)  # pyright: ignore[reportUnknownVariableType, reportUnknownMemberType]
+    try:
+        page_count: int = len(document)  # pyright: ignore[reportUnknownArgumentType]
+        if not 0 <= page < page_count:
+            raise IndexError(f"Page {page + 1} out of range (1-{page_count})")
+        # render() documents scale as a float; its signature infers int.
+        bitmap = document[page].render(scale=dpi / 72)  # pyright: ignore[reportArgumentType, reportUnknownMemberType, reportUnknownVariableType]
+        buffer = io.BytesIO()
+        bitmap.to_pil().save(buffer, format="PNG", optimize=False)  # pyright: ignore[reportUnknownMemberType]
+        return buffer.getvalue(), page_count
+    finally:
+        document.close()  # pyright: ignore[reportUnknownMemberType]
+
+
+@dataclass
+class _Slot(Generic[T]):
+    factory: Callable[[], Awaitable[T]]
+    deadline: float
+    future: asyncio.Future[T] = field(default_factory=asyncio.Future)
+    timer: asyncio.TimerHandle | None = None
+
+
+class PreviewCoalescer:
+    """Debounces renders per key so a burst of edits costs one render.
+
+    Each ``submit`` replaces the pending render for its key and pushes the
+    start back by ``delay`` seconds, but never past ``max_delay`` after the
+    first request of the burst, so continuous typing still gets previews.
+    Every caller in the burst receives the result of the latest submission.
+    """
+
+    def __init__(self, delay: float, max_delay: float):
+        self.delay: float = delay
+        self.max_delay: float = max_delay
+        self._slots: dict[Hashable, _Slot[Any]] = {}  # pyright: ignore[reportExplicitAny]
+
+    async def submit(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = _Slot(factory, deadline=loop.time() + self.max_delay)
+            self._slots[key] = slot
+        else:
+            slot.factory = factory
+            if slot.timer:
+                slot.timer.cancel()
+        start_at = min(loop.time() + self.delay, slot.deadline)
+        slot.timer = loop.call_at(start_at, self._start, key, slot)
+        # Shield: one impatient client must not cancel the render for the rest.
+        return await asyncio.shield(slot.future)
+
+    def _start(self, key: Hashable, slot: _Slot[Any]) -> None:  # pyright: ignore[reportExplicitAny]
+        # Requests arriving from now on open a new burst.
+        if self._slots.get(key) is slot:
+            del self._slots[key]
+        task = asyncio.ensure_future(slot.factory())
+        task.add_done_callback(lambda t: _settle(slot.future, t))
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+
+def _settle(future: asyncio.Future[T], task: asyncio.Future[T]) -> None:
+    if future.done():
+        return
+    if task.cancelled():
+        _ = future.cancel()
+    elif (error := task.exception()) is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(task.result())
+
+
+preview_coalescer = PreviewCoalescer(
+    delay=settings.PREVIEW_DEBOUNCE_SECONDS,
+    max_delay=settings.PREVIEW_MAX_DELAY_SECONDS,
+)
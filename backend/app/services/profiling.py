@@ -0,0 +1,78 @@
+import sys
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+from app.core.config import settings
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")  # pyright: ignore[reportAny]
+    return f"{module}:{frame.f_code.co_qualname}"
+
+
+class SamplingProfiler:
+    """Samples the call stack of one thread at a fixed interval.
+
+    Meant for the event loop thread: it sees whatever coroutine the loop is
+    running, so while one request is profiled the samples also include the
+    other requests it interleaves with, and idle time shows up as the
+    selector. Render pool processes and argon2 threads are not sampled.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id: int = thread_id
+        self.interval: float = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._sample, name="profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # pyright: ignore[reportPrivateUsage]
+            stack: list[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        """Samples in the collapsed-stack format read by flamegraph.pl and speedscope."""
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+
+def profile_path(profile_id: uuid.UUID) -> Path:
+    return Path(settings.PROFILE_DIR) / f"{profile_id}.folded"
+
+
+def save_profile(profile_id: uuid.UUID, profiler: SamplingProfiler) -> Path:
+    """Write the profile where any worker can serve it, keeping the newest few."""
+    path = profile_path(profile_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _ = path.write_text(profiler.folded())
+    try:
+        profiles = sorted(
+            path.parent.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True
+        )
+    except FileNotFoundError:  # another worker pruned concurrently
+        return path
+    for old in profiles[settings.PROFILE_KEEP :]:
+        old.unlink(missing_ok=True)
+    return path
@@ -0,0 +1,222 @@
+# pyright: reportMissingTypeStubs=false
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, TypeVar
+
+from app.core.config import settings
+from app.services.metrics import (
+    render_pool_failures,
+    render_pool_queue_depth,
+    render_pool_task_seconds,
+    request_stats,
+)
+
+T = TypeVar("T")
+
+
+class RenderPoolSaturated(Exception):
+    """Raised when the render queue is full; callers should retry later."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Render queue is full")
+        self.retry_after: int = retry_after
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within the configured timeout."""
+
+
+def _warm_worker() -> None:
+    # Import WeasyPrint and lay out a tiny document so fontconfig and the
+    # font caches are loaded before the first real request hits the worker.
+    from weasyprint import HTML  # type: ignore
+
+    _ = HTML(string="<p>warm-up</p>").write_pdf()  # pyright: ignore[reportUnknownMemberType]
+
+
+def _noop() -> None:
+    return None
+
+
+class RenderPool:
+    """Bounded process pool for CPU-heavy rendering.
+
+    Keeps WeasyPrint off the event loop and lets renders scale across cores.
+    At most ``max_queue`` renders may be running or waiting at once; beyond
+    that ``run`` fails fast with ``RenderPoolSaturated`` instead of piling up
+    requests.
+
+    Each worker is its own single-process executor, and a render is only
+    handed to a worker once that worker is idle. The timeout therefore
+    starts when the render starts, not while it waits its turn, and a render
+    that overruns is stopped by killing just its worker; renders running on
+    the other workers are unaffected. A killed or crashed worker is started
+    again for the next render.
+
+    A render counts as pending until its worker is actually done with it,
+    not when the caller stops waiting.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        timeout: float,
+        retry_after: int,
+        initializer: Callable[[], None] | None = _warm_worker,
+    ):
+        self.workers: int = workers
+        self.max_queue: int = max_queue
+        self.timeout: float = timeout
+        self.retry_after: int = retry_after
+        self.initializer: Callable[[], None] | None = initializer
+        self._executors: list[ProcessPoolExecutor | None] = [None] * workers
+        self._idle: list[int] = list(range(workers))
+        self._waiters: deque[asyncio.Future[int]] = deque()
+        self._pending: int = 0
+        # Done-callbacks run on the executors' management threads.
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _ensure_executor(self, slot: int) -> ProcessPoolExecutor:
+        executor = self._executors[slot]
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+            self._executors[slot] = executor
+        return executor
+
+    def _recycle(self, slot: int, executor: ProcessPoolExecutor) -> None:
+        """Kill the worker in ``slot``; its next render starts a fresh one."""
+        if self._executors[slot] is executor:
+            self._executors[slot] = None
+        processes = executor._processes or {}  # pyright: ignore[reportPrivateUsage]
+        for process in list(processes.values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _acquire(self) -> int:
+        """Wait for an idle worker and claim it."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            waiter: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if waiter.done() and not waiter.cancelled():
+                # Handed a worker just as we were cancelled; pass it on.
+                self._release(waiter.result())
+            raise
+
+    def _release(self, slot: int) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                try:
+                    _ = waiter.get_loop().call_soon_threadsafe(
+                        self._hand_over, waiter, slot
+                    )
+                    return
+                except RuntimeError:
+                    # The waiter's event loop has been closed.
+                    continue
+            self._idle.append(slot)
+
+    def _hand_over(self, waiter: asyncio.Future[int], slot: int) -> None:
+        # Runs on the waiter's loop, which may have cancelled it meanwhile.
+        if waiter.done():
+            self._release(slot)
+        else:
+            waiter.set_result(slot)
+
+    def _finished(self, slot: int, _future: Future[Any]) -> None:
+        self._release(slot)
+        self._dequeued()
+
+    def _dequeued(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        render_pool_queue_depth.dec()
+
+    async def start(self) -> None:
+        """Spawn and warm every worker up front instead of on first request."""
+        loop = asyncio.get_running_loop()
+        _ = await asyncio.gather(
+            *(
+                loop.run_in_executor(self._ensure_executor(slot), _noop)
+                for slot in range(self.workers)
+            )
+        )
+
+    async def run(self, fn: Callable[..., T], *args: object) -> T:
+        with self._lock:
+            if self._pending >= self.max_queue:
+                saturated = True
+            else:
+                saturated = False
+                self._pending += 1
+        if saturated:
+            render_pool_failures.labels(reason="saturated").inc()
+            raise RenderPoolSaturated(self.retry_after)
+        render_pool_queue_depth.inc()
+
+        started_at = time.perf_counter()
+        try:
+            try:
+                slot = await self._acquire()
+            except BaseException:
+                self._dequeued()
+                raise
+            executor = self._ensure_executor(slot)
+            future = executor.submit(fn, *args)
+            future.add_done_callback(partial(self._finished, slot))
+            try:
+                return await asyncio.wait_for(
+                    asyncio.wrap_future(future), timeout=self.timeout
+                )
+            except TimeoutError:
+                render_pool_failures.labels(reason="timeout").inc()
+                self._recycle(slot, executor)
+                raise RenderTimeout(f"Render exceeded {self.timeout}s")
+            except BrokenProcessPool:
+                render_pool_failures.labels(reason="crashed").inc()
+                self._recycle(slot, executor)
+                raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+            render_pool_task_seconds.labels(task=fn.__name__).observe(elapsed)
+            if (stats := request_stats.get()) is not None:
+                stats.render_seconds += elapsed
+
+    def shutdown(self) -> None:
+        for slot, executor in enumerate(self._executors):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executors[slot] = None
+
+
+render_pool = RenderPool(
+    workers=settings.PDF_RENDER_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.PDF_RENDER_MAX_QUEUE,
+    timeout=settings.PDF_RENDER_TIMEOUT_SECONDS,
+    retry_after=settings.PDF_RENDER_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,328 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    TemplateNotFound,
+    nodes,
+    select_autoescape,
+)
+from jinja2.exceptions import SecurityError
+from jinja2.runtime import Context
+from jinja2.sandbox import ImmutableSandboxedEnvironment, safe_range
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.core.config import settings
+from app.models import Invoice, InvoiceTemplate
+
+TEMPLATE_DIR = Path(__file__).parent.parent / "templates"
+DEFAULT_TEMPLATE = "invoice.html"
+
+
+@dataclass(frozen=True)
+class VersionedTemplate:
+    """A compiled template plus a stamp that changes whenever its source does.
+
+    The stamp is safe to fold into cache keys for anything rendered from it.
+    """
+
+    template: Template
+    version: str
+
+    def render(self, **context: Any) -> str:  # pyright: ignore[reportExplicitAny, reportAny]
+        if isinstance(self.template.environment, BudgetedSandbox):
+            return self.template.environment.render_budgeted(self.template, context)
+        return self.template.render(**context)  # pyright: ignore[reportAny]
+
+
+class TemplateBudgetExceeded(SecurityError):
+    """A user template did more work or wrote more output than one render may."""
+
+
+@dataclass
+class _Budget:
+    operations: int
+    deadline: float
+
+    def charge(self, cost: int) -> None:
+        self.operations -= cost
+        if self.operations < 0:
+            raise TemplateBudgetExceeded("Template does too much work to render")
+        if time.monotonic() > self.deadline:
+            raise TemplateBudgetExceeded("Template took too long to render")
+
+
+_budget: ContextVar[_Budget | None] = ContextVar("template_budget", default=None)
+
+
+class BudgetedSandbox(ImmutableSandboxedEnvironment):
+    """Sandbox that bounds the cost of rendering one untrusted template.
+
+    Each loop iteration, call, attribute or item lookup costs an operation,
+    as does every item of a ``range`` or of a sequence built with ``*``.
+    ``render_budgeted`` stops a render that runs out of operations, passes
+    its deadline or writes too much output, with ``TemplateBudgetExceeded``.
+    Outside ``render_budgeted`` nothing is counted.
+    """
+
+    intercepted_binops: frozenset[str] = frozenset({"*", "**"})
+
+    def __init__(
+        self,
+        max_operations: int,
+        max_output: int,
+        time_limit: float,
+        **options: Any,  # pyright: ignore[reportExplicitAny, reportAny]
+    ):
+        super().__init__(**options)  # pyright: ignore[reportAny]
+        self.max_operations: int = max_operations
+        self.max_output: int = max_output
+        self.time_limit: float = time_limit
+        self.globals["range"] = self._range  # pyright: ignore[reportArgumentType]
+        self.filters["_budgeted"] = self._budgeted  # pyright: ignore[reportArgumentType]
+
+    def _parse(
+        self, source: str, name: str | None, filename: str | None
+    ) -> nodes.Template:
+        # Loop bodies may make no calls at all, so charge the iteration itself.
+        template = super()._parse(source, name, filename)
+        for loop in list(template.find_all(nodes.For)):
+            loop.iter = nodes.Filter(
+                loop.iter, "_budgeted", [], [], None, None, lineno=loop.iter.lineno
+            )
+        return template
+
+    def _charge(self, cost: int = 1) -> None:
+        if (budget := _budget.get()) is not None:
+            budget.charge(cost)
+
+    def _budgeted(self, iterable: Iterable[object]) -> Iterator[object]:
+        for item in iterable:
+            self._charge()
+            yield item
+
+    def _range(self, *args: int) -> range:
+        rng = safe_range(*args)
+        self._charge(len(rng))
+        return rng
+
+    def call(
+        self,
+        context: Context,
+        obj: Any,  # pyright: ignore[reportExplicitAny, reportAny]
+        /,
+        *args: Any,  # pyright: ignore[reportExplicitAny, reportAny]
+        **kwargs: Any,  # pyright: ignore[reportExplicitAny, reportAny]
+    ) -> Any:  # pyright: ignore[reportExplicitAny]
+        self._charge()
+        return super().call(context, obj, *args, **kwargs)  # pyright: ignore[reportAny]
+
+    def getattr(self, obj: Any, attribute: str) -> Any:  # pyright: ignore[reportExplicitAny, reportAny]
+        self._charge()
+        return super().getattr(obj, attribute)  # pyright: ignore[reportAny]
+
+    def getitem(self, obj: Any, argument: Any) -> Any:  # pyright: ignore[reportExplicitAny, reportAny]
+        self._charge()
+        return super().getitem(obj, argument)  # pyright: ignore[reportAny]
+
+    def call_binop(
+        self,
+        context: Context,
+        operator: str,
+        left: Any,
+        right: Any,  # pyright: ignore[reportExplicitAny, reportAny]
+    ) -> Any:  # pyright: ignore[reportExplicitAny]
+        # Charge before computing, so one expression can't allocate gigabytes.
+        if operator == "*":
+            for sequence, times in ((left, right), (right, left)):  # pyright: ignore[reportAny]
+                if isinstance(sequence, (str, list, tuple)) and isinstance(times, int):
+                    self._charge(len(sequence) * max(times, 0))  # pyright: ignore[reportUnknownArgumentType]
+        elif operator == "**" and isinstance(right, int):
+            self._charge(abs(right))
+        return super().call_binop(context, operator, left, right)  # pyright: ignore[reportAny]
+
+    def render_budgeted(
+        self,
+        template: Template,
+        context: Mapping[str, Any],  # pyright: ignore[reportExplicitAny]
+    ) -> str:
+        token = _budget.set(
+            _Budget(self.max_operations, time.monotonic() + self.time_limit)
+        )
+        try:
+            parts: list[str] = []
+            size = 0
+            for chunk in template.generate(**context):
+                size += len(chunk)
+                if size > self.max_output:
+                    raise TemplateBudgetExceeded("Template output is too large")
+                parts.append(chunk)
+            return "".join(parts)
+        finally:
+            _budget.reset(token)
+
+
+class _RevisionLoader(BaseLoader):
+    """Serves user template sources handed over by ``TemplateRegistry``.
+
+    Names embed the template id and version, so a loaded revision never goes
+    stale and Jinja's cache never needs to re-check it.
+    """
+
+    def __init__(self):
+        self.pending: dict[str, str] = {}
+
+    def get_source(
+        self, environment: Environment, template: str
+    ) -> tuple[str, str | None, Callable[[], bool] | None]:
+        try:
+            return self.pending[template], None, lambda: True
+        except KeyError:
+            raise TemplateNotFound(template) from None
+
+
+class TemplateRegistry:
+    """Compiles invoice templates once and shares the bytecode across processes.
+
+    Built-in templates come from ``template_dir``; per-user templates are
+    ``InvoiceTemplate`` rows and run in a ``BudgetedSandbox`` since their
+    authors are not trusted. Both environments write compiled code to
+    ``FileSystemBytecodeCache`` files in the same directory, so a freshly
+    started worker loads bytecode instead of parsing and compiling every
+    source again. With ``auto_reload``
+    off, a cached built-in template is never re-checked against the disk.
+    """
+
+    def __init__(
+        self,
+        template_dir: str | Path = TEMPLATE_DIR,
+        bytecode_dir: str | Path | None = None,
+        auto_reload: bool = False,
+        cache_size: int = 400,
+        max_operations: int = 1_000_000,
+        max_output: int = 5_000_000,
+        render_timeout: float = 2.0,
+    ):
+        if bytecode_dir:
+            Path(bytecode_dir).mkdir(parents=True, exist_ok=True)
+        # Without a directory Jinja picks a per-user folder under the system
+        # temp dir, which is still shared by every worker on the host.
+        bytecode_cache = FileSystemBytecodeCache(
+            str(bytecode_dir) if bytecode_dir else None
+        )
+        self.auto_reload: bool = auto_reload
+        self.env: Environment = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(["html", "xml"]),
+            auto_reload=auto_reload,
+            bytecode_cache=bytecode_cache,
+            cache_size=cache_size,
+        )
+        self._revisions: _RevisionLoader = _RevisionLoader()
+        self.user_env: BudgetedSandbox = BudgetedSandbox(
+            max_operations,
+            max_output,
+            render_timeout,
+            loader=self._revisions,
+            autoescape=True,
+            auto_reload=False,
+            # Kept apart from bytecode compiled without the budget checks.
+            bytecode_cache=FileSystemBytecodeCache(
+                str(bytecode_dir) if bytecode_dir else None,
+                "__jinja2_budgeted_%s.cache",
+            ),
+            cache_size=cache_size,
+        )
+        self._builtin_version: str | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def precompile(self) -> int:
+        """Compile every built-in template up front; returns how many."""
+        names = self.env.list_templates(filter_func=_is_template)
+        for name in names:
+            _ = self.env.get_template(name)
+        self._builtin_version = self._digest_builtins(names)
+        return len(names)
+
+    def builtin_version(self) -> str:
+        # Built-ins may include each other, so one digest covers them all.
+        if self._builtin_version is None or self.auto_reload:
+            names = self.env.list_templates(filter_func=_is_template)
+            self._builtin_version = self._digest_builtins(names)
+        return self._builtin_version
+
+    def builtin(self, name: str = DEFAULT_TEMPLATE) -> VersionedTemplate:
+        return VersionedTemplate(self.env.get_template(name), self.builtin_version())
+
+    def for_revision(self, row: InvoiceTemplate) -> VersionedTemplate:
+        name = f"user/{row.id}/{row.version}"
+        with self._lock:
+            self._revisions.pending[name] = row.source
+            try:
+                template = self.user_env.get_template(name)
+            finally:
+                del self._revisions.pending[name]
+        return VersionedTemplate(template, f"user:{row.id}:{row.version}")
+
+    def check_syntax(self, source: str) -> None:
+        """Raise ``jinja2.TemplateSyntaxError`` if ``source`` does not compile."""
+        _ = self.user_env.parse(source)
+
+    def _digest_builtins(self, names: Iterable[str]) -> str:
+        digest = hashlib.sha256()
+        for name in names:
+            source, _, _ = self.env.loader.get_source(self.env, name)  # pyright: ignore[reportOptionalMemberAccess]
+            digest.update(name.encode("utf-8") + b"\0" + source.encode("utf-8"))
+        return f"builtin:{digest.hexdigest()[:16]}"
+
+
+def _is_template(name: str) -> bool:
+    return name.endswith((".html", ".xml"))
+
+
+template_registry = TemplateRegistry(
+    bytecode_dir=settings.TEMPLATE_BYTECODE_DIR,
+    auto_reload=settings.TEMPLATE_AUTO_RELOAD,
+    cache_size=settings.TEMPLATE_CACHE_SIZE,
+    max_operations=settings.TEMPLATE_MAX_OPERATIONS,
+    max_output=settings.TEMPLATE_MAX_OUTPUT_CHARS,
+    render_timeout=settings.TEMPLATE_RENDER_TIMEOUT_SECONDS,
+)
+
+
+async def load_user_templates(
+    session: AsyncSession, user_id: uuid.UUID, names: Iterable[str | None]
+) -> dict[str, VersionedTemplate]:
+    """Compile the current revision of each named template the user owns."""
+    wanted = {name for name in names if name}
+    if not wanted:
+        return {}
+    result = await session.execute(
+        select(InvoiceTemplate).where(
+            InvoiceTemplate.user_id == user_id, col(InvoiceTemplate.name).in_(wanted)
+        )
+    )
+    return {
+        row.name: template_registry.for_revision(row) for row in result.scalars().all()
+    }
+
+
+def template_for(
+    invoice: Invoice, templates: Mapping[str, VersionedTemplate]
+) -> VersionedTemplate:
+    # A template deleted after the invoice chose it falls back to the default.
+    if invoice.template_name and invoice.template_name in templates:
+        return templates[invoice.template_name]
+    return template_registry.builtin()
@@ -0,0 +1,147 @@
+"""Plan limits enforced with per-user, per-month usage counters.
+
+Creating invoices bumps the user's ``UsageCounter`` row for the month with
+one conditional upsert in the creating transaction. The ``WHERE`` on the
+conflict branch refuses the increment once it would pass the limit, and
+the row lock it takes is held until that transaction ends. Parallel
+creates for one user are therefore counted one after another and can
+never overshoot, and a rolled-back create hands its quota back. No check
+reads the invoice table.
+
+Every counter write also holds the user's usage lock in shared mode, which
+a recount of that user takes exclusively.
+"""
+
+import uuid
+from datetime import UTC, date, datetime
+
+from sqlalchemy import delete, func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col
+
+from app.core.config import settings
+from app.models import Subscription, UsageCounter, UsageRead
+from app.services import user_locks
+
+
+class PlanLimitExceeded(Exception):
+    def __init__(self, plan: str, limit: int):
+        super().__init__(
+            f"The {plan} plan allows {limit} invoices per month; "
+            + "delete some or upgrade to create more"
+        )
+        self.plan: str = plan
+        self.limit: int = limit
+
+
+def month_start(at: datetime) -> date:
+    return at.astimezone(UTC).date().replace(day=1)
+
+
+def invoice_limit(plan: str) -> int | None:
+    return settings.PLAN_INVOICE_LIMITS.get(plan) or None
+
+
+async def get_plan(session: AsyncSession, user_id: uuid.UUID) -> str:
+    subscription = await session.get(Subscription, user_id)
+    return subscription.plan if subscription else settings.DEFAULT_PLAN
+
+
+def current_period() -> date:
+    return month_start(datetime.now(UTC))
+
+
+async def consume_invoices(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    count: int = 1,
+    period: date | None = None,
+) -> None:
+    """Count ``count`` new invoices against this month's limit, or raise.
+
+    Must run in the transaction that inserts the invoices, before inserting
+    them, so every writer locks the counter row first.
+    """
+    if count <= 0:
+        return
+    plan = await get_plan(session, user_id)
+    limit = invoice_limit(plan)
+    if limit is not None and count > limit:
+        raise PlanLimitExceeded(plan, limit)
+
+    await user_locks.lock_users(session, user_locks.USAGE, [user_id])
+    stmt = insert(UsageCounter).values(
+        user_id=user_id,
+        period=period or current_period(),
+        invoices=count,
+    )
+    total = col(UsageCounter.invoices) + stmt.excluded.invoices
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "period"],
+        set_={"invoices": total},
+        where=total <= limit if limit is not None else None,
+    ).returning(col(UsageCounter.invoices))
+    result = await session.execute(stmt)
+    if result.scalar() is None and limit is not None:
+        raise PlanLimitExceeded(plan, limit)
+
+
+async def release_invoices(
+    session: AsyncSession, user_id: uuid.UUID, period: date, count: int = 1
+) -> None:
+    """Give back quota for invoices deleted, or counted but never inserted."""
+    await user_locks.lock_users(session, user_locks.USAGE, [user_id])
+    _ = await session.execute(
+        update(UsageCounter)
+        .where(col(UsageCounter.user_id) == user_id, col(UsageCounter.period) == period)
+        .values(invoices=func.greatest(col(UsageCounter.invoices) - count, 0))
+    )
+
+
+async def get_usage(session: AsyncSession, user_id: uuid.UUID) -> UsageRead:
+    period = current_period()
+    counter = await session.get(UsageCounter, (user_id, period))
+    plan = await get_plan(session, user_id)
+    return UsageRead(
+        plan=plan,
+        period=period,
+        invoices=counter.invoices if counter else 0,
+        invoice_limit=invoice_limit(plan),
+    )
+
+
+async def reconcile_usage(session: AsyncSession, user_id: uuid.UUID | None = None):
+    """Recompute the usage counters from the invoice table.
+
+    No counter write can land between the count and the commit of the
+    caller's transaction. For one user this holds that user's usage lock,
+    so other tenants keep creating invoices; for everyone it locks the
+    counter and invoice tables.
+    """
+    if user_id is None:
+        # Writers lock their counter row before touching invoices; taking
+        # the locks in the same order keeps this from deadlocking with them.
+        _ = await session.execute(text("LOCK TABLE usagecounter IN EXCLUSIVE MODE"))
+        _ = await session.execute(text("LOCK TABLE invoice IN SHARE MODE"))
+    else:
+        await user_locks.lock_users(
+            session, user_locks.USAGE, [user_id], exclusive=True
+        )
+    counter_delete = delete(UsageCounter)
+    user_filter = ""
+    params: dict[str, uuid.UUID] = {}
+    if user_id is not None:
+        counter_delete = counter_delete.where(col(UsageCounter.user_id) == user_id)
+        user_filter = "AND user_id = :user_id"
+        params["user_id"] = user_id
+
+    _ = await session.execute(counter_delete)
+    _ = await session.execute(
+        text(
+            "INSERT INTO usagecounter (user_id, period, invoices) "
+            + "SELECT user_id, CAST(date_trunc('month', created_at AT TIME ZONE 'UTC') AS DATE), COUNT(*) "
+            + f"FROM invoice WHERE created_at IS NOT NULL {user_filter} GROUP BY 1, 2"
+        ),
+        params,
+    )
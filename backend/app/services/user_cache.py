@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Mapper
+
+from app.core.config import settings
+from app.models import User
+
+UserSnapshot = dict[str, Any]  # pyright: ignore[reportExplicitAny]
+
+
+class SharedUserCacheTier(Protocol):
+    """Cache shared between workers (e.g. Redis), storing user snapshots."""
+
+    def get(self, key: str) -> UserSnapshot | None: ...
+
+    def set(self, key: str, value: UserSnapshot, ttl: float) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class LocalSharedTier:
+    """In-process stand-in for a shared tier, for development and tests."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, UserSnapshot]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: str) -> UserSnapshot | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: UserSnapshot, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            _ = self._entries.pop(key, None)
+
+
+class UserCache:
+    """TTL'd cache of active users, keyed by user id.
+
+    Entries are plain snapshots and every ``get`` builds a fresh, detached
+    ``User``, so requests never share a mutable ORM instance. Writes to a
+    ``User`` through the ORM invalidate the entry (see the mapper events
+    below); other workers' local tiers catch up within ``ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        shared: SharedUserCacheTier | None = None,
+    ):
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+        self.shared: SharedUserCacheTier | None = shared
+        self._entries: OrderedDict[uuid.UUID, tuple[float, UserSnapshot]] = (
+            OrderedDict()
+        )
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID) -> User | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, snapshot = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(user_id)
+                    return User.model_validate(snapshot)
+                del self._entries[user_id]
+
+        if self.shared is None:
+            return None
+        snapshot = self.shared.get(str(user_id))
+        if snapshot is None:
+            return None
+        self._store_local(user_id, snapshot)
+        return User.model_validate(snapshot)
+
+    def set(self, user: User) -> None:
+        if user.id is None or not user.is_active:
+            return
+        snapshot = user.model_dump()
+        self._store_local(user.id, snapshot)
+        if self.shared is not None:
+            self.shared.set(str(user.id), snapshot, self.ttl)
+
+    def invalidate(self, user_id: uuid.UUID | None) -> None:
+        if user_id is None:
+            return
+        with self._lock:
+            _ = self._entries.pop(user_id, None)
+        if self.shared is not None:
+            self.shared.delete(str(user_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _store_local(self, user_id: uuid.UUID, snapshot: UserSnapshot) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                _ = self._entries.popitem(last=False)
+
+
+user_cache = UserCache(
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    shared=LocalSharedTier() if settings.USER_CACHE_SHARED else None,
+)
+
+
+# Bulk UPDATE/DELETE statements bypass these hooks; they are bounded by the TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(_mapper: Mapper[User], _connection: Connection, target: User):
+    user_cache.invalidate(target.id)
@@ -0,0 +1,34 @@
+"""Per-user advisory locks guarding data derived from a user's invoices.
+
+Writers take the lock shared, so they never wait on each other. A rebuild
+of one user's rollups or usage counters takes it exclusively: it waits for
+that user's in-flight writers to commit, and holds back their new ones
+until it commits, without touching any other tenant. Both forms are
+transaction-scoped and released on commit or rollback.
+"""
+
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# First key of the two-key advisory lock, one per kind of derived data.
+ANALYTICS = 1
+USAGE = 2
+
+
+async def lock_users(
+    session: AsyncSession,
+    namespace: int,
+    user_ids: Iterable[uuid.UUID],
+    *,
+    exclusive: bool = False,
+) -> None:
+    function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    # Sorted so two transactions locking several users cannot deadlock.
+    for user_id in sorted(set(user_ids)):
+        _ = await session.execute(
+            text(f"SELECT {function}(:namespace, hashtext(:user_id))"),
+            {"namespace": namespace, "user_id": str(user_id)},
+        )
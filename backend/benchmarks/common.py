@@ -0,0 +1,100 @@
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+
+@dataclass
+class Stats:
+    n: int
+    median_ms: float
+    p95_ms: float
+    mean_ms: float
+    min_ms: float
+    max_ms: float
+    ops_per_s: float | None = None
+
+    @classmethod
+    def from_samples(
+        cls, samples_ms: list[float], ops_per_s: float | None = None
+    ) -> "Stats":
+        ordered = sorted(samples_ms)
+        p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+        return cls(
+            n=len(ordered),
+            median_ms=round(statistics.median(ordered), 3),
+            p95_ms=round(p95, 3),
+            mean_ms=round(statistics.fmean(ordered), 3),
+            min_ms=round(ordered[0], 3),
+            max_ms=round(ordered[-1], 3),
+            ops_per_s=round(ops_per_s, 2) if ops_per_s is not None else None,
+        )
+
+
+@dataclass
+class Result:
+    suite: str
+    name: str
+    params: dict[str, Any] = field(default_factory=dict)  # pyright: ignore[reportExplicitAny]
+    stats: Stats | None = None
+
+    def as_dict(self) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+        return asdict(self)
+
+    def __str__(self) -> str:
+        params = " ".join(f"{k}={v}" for k, v in self.params.items())  # pyright: ignore[reportAny]
+        s = self.stats
+        line = f"{self.suite:<6} {self.name:<22} {params:<28}"
+        if s is None:
+            return line
+        line += f" median {s.median_ms:>9.2f} ms  p95 {s.p95_ms:>9.2f} ms"
+        if s.ops_per_s is not None:
+            line += f"  {s.ops_per_s:>9.1f} ops/s"
+        return line
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 1) -> Stats:
+    for _ in range(warmup):
+        _ = fn()
+    samples: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        _ = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return Stats.from_samples(samples)
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[object]], iterations: int, warmup: int = 1
+) -> Stats:
+    for _ in range(warmup):
+        _ = await fn()
+    samples: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        _ = await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return Stats.from_samples(samples)
+
+
+async def measure_throughput(
+    fn: Callable[[int], Awaitable[object]], concurrency: int, duration: float
+) -> Stats:
+    """Run ``concurrency`` closed loops of ``fn`` for ``duration`` seconds."""
+    samples: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def loop(worker: int) -> None:
+        i = worker
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            _ = await fn(i)
+            samples.append((time.perf_counter() - start) * 1000)
+            i += concurrency
+
+    start = time.perf_counter()
+    _ = await asyncio.gather(*(loop(worker) for worker in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return Stats.from_samples(samples, ops_per_s=len(samples) / elapsed)
@@ -0,0 +1,68 @@
+"""Compare two benchmark result files.
+
+    uv run python -m benchmarks.compare base.json head.json [--threshold 10]
+
+Prints the change in median latency (and throughput, where measured) for
+every benchmark present in both files, and exits 1 if any median got
+slower by more than ``--threshold`` percent.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+
+def _load(path: Path) -> dict[str, dict[str, Any]]:  # pyright: ignore[reportExplicitAny]
+    data = json.loads(path.read_text())  # pyright: ignore[reportAny]
+    return {
+        _label(result): result
+        for result in data["results"]  # pyright: ignore[reportAny]
+    }
+
+
+def _label(result: dict[str, Any]) -> str:  # pyright: ignore[reportExplicitAny]
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))  # pyright: ignore[reportAny]
+    return f"{result['suite']}.{result['name']}" + (f"[{params}]" if params else "")
+
+
+def _change(base: float, head: float) -> float:
+    return (head - base) / base * 100 if base else 0.0
+
+
+def compare(base: Path, head: Path, threshold: float) -> bool:
+    before, after = _load(base), _load(head)
+    regressed = False
+    width = max((len(label) for label in before.keys() | after.keys()), default=0)
+    for label in sorted(before.keys() & after.keys()):
+        b, h = before[label]["stats"], after[label]["stats"]  # pyright: ignore[reportAny]
+        change = _change(b["median_ms"], h["median_ms"])  # pyright: ignore[reportAny]
+        line = (
+            f"{label:<{width}}  {b['median_ms']:>9.2f} -> {h['median_ms']:>9.2f} ms"
+            + f"  {change:>+7.1f}%"
+        )
+        if b.get("ops_per_s") and h.get("ops_per_s"):  # pyright: ignore[reportAny]
+            ops = _change(b["ops_per_s"], h["ops_per_s"])  # pyright: ignore[reportAny]
+            line += f"  throughput {ops:>+7.1f}%"
+        if change > threshold:
+            regressed = True
+            line += "  REGRESSION"
+        print(line)
+    for label in sorted(before.keys() ^ after.keys()):
+        print(f"{label:<{width}}  only in {'base' if label in before else 'head'}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n")[0])
+    _ = parser.add_argument("base", type=Path)
+    _ = parser.add_argument("head", type=Path)
+    _ = parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="percent slowdown of a median that counts as a regression",
+    )
+    args = parser.parse_args()
+    sys.exit(1 if compare(args.base, args.head, args.threshold) else 0)
@@ -0,0 +1,165 @@
+"""Run the API benchmarks and write the results as JSON.
+
+    uv run python -m benchmarks.run                       # every suite
+    uv run python -m benchmarks.run --suites pdf,login
+    uv run python -m benchmarks.run --sizes 1000,100000 --output base.json
+
+Needs the database from DATABASE_URL; seeded data is kept between runs
+(use --cleanup to drop it). Compare two result files with
+``python -m benchmarks.compare``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+# Background workers would compete with the measured requests.
+os.environ.setdefault("EMAIL_WORKER_ENABLED", "false")
+os.environ.setdefault("JOB_WORKERS", "0")
+
+SUITES = ("pdf", "serialize", "api", "login", "e2e")
+
+
+def _ints(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _meta() -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+    from sqlalchemy.engine import make_url
+
+    from app.core.config import settings
+
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": make_url(settings.DATABASE_URL).render_as_string(
+            hide_password=True
+        ),
+        "settings": {
+            name: getattr(settings, name)
+            for name in (
+                "DB_POOL_SIZE",
+                "PDF_RENDER_WORKERS",
+                "PDF_CACHE_MAX_BYTES",
+                "ARGON2_TIME_COST",
+                "ARGON2_MEMORY_COST",
+                "ARGON2_PARALLELISM",
+                "PASSWORD_HASH_WORKERS",
+            )
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> list[Any]:  # pyright: ignore[reportExplicitAny]
+    from app.db import async_session_maker
+    from benchmarks import seed, suites
+
+    if args.cleanup:
+        async with async_session_maker() as session:
+            print(f"Removed {await seed.cleanup(session)} benchmark users")
+        return []
+
+    results: list[Any] = []  # pyright: ignore[reportExplicitAny]
+    if "pdf" in args.suites:
+        # Calls the renderer directly, outside any request or render pool.
+        results += suites.bench_pdf(args.items, args.iterations)
+    if "serialize" in args.suites:
+        results += suites.bench_serialize(args.page_sizes, args.iterations)
+    if not {"api", "login", "e2e"} & set(args.suites):
+        return results
+    async with suites.api_client() as client:
+        if "api" in args.suites:
+            results += await suites.bench_api_reads(client, args.sizes, args.iterations)
+        if "login" in args.suites:
+            results += await suites.bench_login(
+                client, args.iterations, max(args.concurrency), args.duration
+            )
+        if "e2e" in args.suites:
+            results += await suites.bench_end_to_end(
+                client, max(args.sizes), args.concurrency, args.duration
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=(__doc__ or "").split("\n")[0])
+    _ = parser.add_argument(
+        "--suites",
+        type=lambda value: value.split(","),
+        default=list(SUITES),
+        help=f"comma-separated subset of {','.join(SUITES)}",
+    )
+    _ = parser.add_argument(
+        "--sizes",
+        type=_ints,
+        default=[1_000, 10_000],
+        help="invoices per user for the list/detail suites",
+    )
+    _ = parser.add_argument(
+        "--items",
+        type=_ints,
+        default=[1, 10, 100, 500],
+        help="line items per invoice for the PDF suite",
+    )
+    _ = parser.add_argument(
+        "--page-sizes",
+        type=_ints,
+        default=[100, 1_000],
+        help="rows per list page for the serialize suite",
+    )
+    _ = parser.add_argument("--iterations", type=int, default=20)
+    _ = parser.add_argument(
+        "--concurrency",
+        type=_ints,
+        default=[1, 8, 32],
+        help="concurrent clients for the throughput suites",
+    )
+    _ = parser.add_argument(
+        "--duration", type=float, default=5.0, help="seconds per throughput run"
+    )
+    _ = parser.add_argument("--output", type=Path)
+    _ = parser.add_argument(
+        "--cleanup", action="store_true", help="delete all seeded data and exit"
+    )
+    args = parser.parse_args()
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(main(args))
+    if args.cleanup:
+        sys.exit(0)
+
+    meta = _meta()
+    output: Path = args.output or Path(__file__).parent / "results" / (
+        f"{meta['commit'][:12] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    _ = output.write_text(
+        json.dumps(
+            {"meta": meta, "results": [result.as_dict() for result in results]},
+            indent=2,
+            default=str,
+        )
+    )
+    print(f"Wrote {output}")
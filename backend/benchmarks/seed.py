@@ -0,0 +1,165 @@
+"""Deterministic data generator for the benchmarks.
+
+Every benchmark user lives under ``@bench.invalid`` so seeded data can
+never collide with real accounts and ``cleanup`` can find all of it.
+"""
+
+import random
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel, col, select
+
+from app.models import Invoice, LineItem, User
+from app.security import pwd_context
+from app.services.analytics import rebuild_rollups
+from app.services.line_items import InvoiceTotals, apply_totals
+
+BENCH_DOMAIN = "bench.invalid"
+BENCH_PASSWORD = "bench-password"
+
+CLIENTS = (
+    "Acme Corp",
+    "Globex",
+    "Initech",
+    "Umbrella",
+    "Stark Industries",
+    "Wayne Enterprises",
+    "Hooli",
+    "Vandelay Industries",
+)
+STATUSES = ("draft", "sent", "paid")
+# asyncpg caps a statement at 32767 bind parameters.
+_MAX_PARAMS = 30_000
+
+
+def synthetic_invoice(
+    rng: random.Random, number: int, items: int, user_id: uuid.UUID | None = None
+) -> tuple[Invoice, InvoiceTotals]:
+    client = rng.choice(CLIENTS)
+    invoice = Invoice(
+        id=uuid.uuid4(),
+        invoice_number=f"BENCH-{number:07}",
+        date=datetime(2023, 1, 1) + timedelta(minutes=7 * number),
+        client_name=client,
+        client_email=f"billing@{client.split()[0].lower()}.example",
+        status=rng.choice(STATUSES),
+        user_id=user_id or uuid.uuid4(),
+        content={
+            "vat_rate": 20,
+            "items": [
+                {
+                    "description": f"Service line {i + 1}",
+                    "quantity": rng.randint(1, 20),
+                    "unit_price": round(rng.uniform(5, 500), 2),
+                }
+                for i in range(items)
+            ],
+        },
+    )
+    return invoice, apply_totals(invoice)
+
+
+async def _insert_chunked(
+    session: AsyncSession,
+    model: type[SQLModel],
+    rows: Sequence[dict[str, Any]],  # pyright: ignore[reportExplicitAny]
+) -> None:
+    if not rows:
+        return
+    chunk = max(1, _MAX_PARAMS // len(rows[0]))
+    for start in range(0, len(rows), chunk):
+        _ = await session.execute(insert(model).values(rows[start : start + chunk]))
+
+
+async def ensure_user(session: AsyncSession, name: str) -> User:
+    email = f"{name}@{BENCH_DOMAIN}"
+    result = await session.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if user is None:
+        user = User(
+            email=email,
+            full_name=f"Benchmark {name}",
+            company_name="Bench Co",
+            hashed_password=pwd_context.hash(BENCH_PASSWORD),
+        )
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+    return user
+
+
+async def _delete_user_data(session: AsyncSession, user_ids: Sequence[uuid.UUID]):
+    for table in (
+        "lineitem",
+        "emailoutbox",
+        "job",
+        "invoicedailyrollup",
+        "clientmonthlyrollup",
+        "invoiceimport",
+        "invoice",
+        "invoicetemplate",
+    ):
+        _ = await session.execute(
+            text(f"DELETE FROM {table} WHERE user_id = ANY(:ids)"),
+            {"ids": list(user_ids)},
+        )
+
+
+async def seed_invoices(
+    session: AsyncSession,
+    count: int,
+    items_per_invoice: int = 5,
+    seed: int = 0,
+    force: bool = False,
+) -> User:
+    """Return a user owning exactly ``count`` generated invoices.
+
+    Seeding is skipped when a previous run already left the same data set.
+    """
+    user = await ensure_user(session, f"invoices-{count}")
+    assert user.id
+    existing = (
+        await session.execute(
+            select(func.count()).where(col(Invoice.user_id) == user.id)
+        )
+    ).scalar_one()
+    if existing == count and not force:
+        return user
+
+    await _delete_user_data(session, [user.id])
+    rng = random.Random(seed)
+    batch = 5_000
+    for start in range(0, count, batch):
+        invoices: list[dict[str, Any]] = []  # pyright: ignore[reportExplicitAny]
+        items: list[dict[str, Any]] = []  # pyright: ignore[reportExplicitAny]
+        for number in range(start, min(count, start + batch)):
+            invoice, totals = synthetic_invoice(rng, number, items_per_invoice, user.id)
+            invoices.append(invoice.model_dump())
+            items.extend(item.model_dump() for item in totals.items)
+        await _insert_chunked(session, Invoice, invoices)
+        await _insert_chunked(session, LineItem, items)
+        await session.commit()
+        print(f"  seeded {min(count, start + batch)}/{count} invoices")
+
+    await rebuild_rollups(session, user.id)
+    await session.commit()
+    _ = await session.execute(text("ANALYZE invoice"))
+    await session.commit()
+    return user
+
+
+async def cleanup(session: AsyncSession) -> int:
+    """Delete every benchmark user and everything they own."""
+    result = await session.execute(
+        select(User.id).where(col(User.email).endswith(f"@{BENCH_DOMAIN}"))
+    )
+    user_ids = [user_id for user_id in result.scalars().all() if user_id]
+    await _delete_user_data(session, user_ids)
+    _ = await session.execute(delete(User).where(col(User.id).in_(user_ids)))
+    await session.commit()
+    return len(user_ids)
@@ -0,0 +1,283 @@
+import random
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import cache
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel, TypeAdapter
+from sqlmodel import col, select
+
+from app.api.pagination import encode_cursor
+from app.api.responses import PydanticJSONResponse
+from app.db import async_session_maker
+from app.main import app
+from app.models import Invoice, InvoicePage, InvoiceSummary, User
+from app.security import create_access_token
+from benchmarks.common import (
+    Result,
+    measure,
+    measure_async,
+    measure_throughput,
+)
+from benchmarks.seed import (
+    BENCH_PASSWORD,
+    ensure_user,
+    seed_invoices,
+    synthetic_invoice,
+)
+
+
+@asynccontextmanager
+async def api_client() -> AsyncIterator[AsyncClient]:
+    """An httpx client wired straight into the ASGI app, lifespan included."""
+    async with (
+        app.router.lifespan_context(app),
+        AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench"
+        ) as client,
+    ):
+        yield client
+
+
+def _auth(user: User) -> dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+
+
+def bench_pdf(line_items: list[int], iterations: int) -> list[Result]:
+    """HTML templating and WeasyPrint layout, cold and from the PDF cache."""
+    from app.services.pdf_cache import pdf_cache
+    from app.services.pdf_service import generate_pdf, render_invoice_html
+
+    user = User(
+        email=f"pdf@{uuid.uuid4().hex}.invalid",
+        hashed_password="x",
+        company_name="Bench Co",
+    )
+    rng = random.Random(0)
+    results: list[Result] = []
+    for count in line_items:
+        invoice, _ = synthetic_invoice(rng, count, count)
+        params = {"line_items": count}
+
+        def cold(invoice: Invoice = invoice) -> bytes:
+            pdf_cache.clear()
+            return generate_pdf(invoice, user)
+
+        results += [
+            Result(
+                "pdf",
+                "render_html",
+                params,
+                measure(
+                    lambda invoice=invoice: render_invoice_html(invoice, user),
+                    iterations * 5,
+                ),
+            ),
+            Result("pdf", "generate_pdf_cold", params, measure(cold, iterations)),
+            Result(
+                "pdf",
+                "generate_pdf_cached",
+                params,
+                measure(
+                    lambda invoice=invoice: generate_pdf(invoice, user), iterations * 5
+                ),
+            ),
+        ]
+        print(*results[-3:], sep="\n")
+    return results
+
+
+@cache
+def _adapter(model: type[BaseModel]) -> TypeAdapter[BaseModel]:
+    return TypeAdapter(model)
+
+
+def _fastapi_default(model: type[BaseModel], obj: object) -> bytes:
+    # What FastAPI does with a route's return value and its response_model.
+    adapter = _adapter(model)
+    value = adapter.validate_python(obj, from_attributes=True)
+    return bytes(JSONResponse(adapter.dump_python(value, mode="json")).body)
+
+
+def bench_serialize(page_sizes: list[int], iterations: int) -> list[Result]:
+    """Building and encoding list pages and details, with no database.
+
+    ``fastapi_default`` validates rows into models, validates them again
+    against the response_model and encodes through ``json.dumps``;
+    ``pydantic_json`` is what the routes do now.
+    """
+    rng = random.Random(0)
+    fields = list(InvoiceSummary.model_fields)
+    results: list[Result] = []
+    for size in page_sizes:
+        invoices = [synthetic_invoice(rng, n, 10)[0] for n in range(size)]
+        rows = [{name: getattr(i, name) for name in fields} for i in invoices]
+        params = {"page_size": size}
+
+        def default_page(rows: list[dict[str, Any]] = rows) -> bytes:  # pyright: ignore[reportExplicitAny]
+            items = [InvoiceSummary.model_validate(row) for row in rows]
+            return _fastapi_default(InvoicePage, InvoicePage(items=items))
+
+        def pydantic_json_page(rows: list[dict[str, Any]] = rows) -> bytes:  # pyright: ignore[reportExplicitAny]
+            return bytes(
+                PydanticJSONResponse({"items": rows, "next_cursor": None}).body
+            )
+
+        assert default_page() == pydantic_json_page()
+        results += [
+            Result(
+                "serialize",
+                "page_fastapi_default",
+                params,
+                measure(default_page, iterations),
+            ),
+            Result(
+                "serialize",
+                "page_pydantic_json",
+                params,
+                measure(pydantic_json_page, iterations),
+            ),
+        ]
+        print(*results[-2:], sep="\n")
+
+    invoice, _ = synthetic_invoice(rng, 0, 50)
+    params = {"line_items": 50}
+    results += [
+        Result(
+            "serialize",
+            "detail_fastapi_default",
+            params,
+            measure(lambda: _fastapi_default(Invoice, invoice), iterations * 10),
+        ),
+        Result(
+            "serialize",
+            "detail_pydantic_json",
+            params,
+            measure(lambda: PydanticJSONResponse(invoice).body, iterations * 10),
+        ),
+    ]
+    print(*results[-2:], sep="\n")
+    return results
+
+
+async def bench_api_reads(
+    client: AsyncClient, sizes: list[int], iterations: int
+) -> list[Result]:
+    """List (first page, deep keyset page, filtered), search and detail latency."""
+    results: list[Result] = []
+    for size in sizes:
+        async with async_session_maker() as session:
+            user = await seed_invoices(session, size)
+            rows = await session.execute(
+                select(col(Invoice.id), col(Invoice.date))
+                .where(Invoice.user_id == user.id)
+                .order_by(col(Invoice.date).desc(), col(Invoice.id).desc())
+            )
+            keys = list(rows.all())
+        headers = _auth(user)
+        middle_id, middle_date = keys[len(keys) // 2]
+        deep_cursor = encode_cursor(middle_date.isoformat(), str(middle_id))
+        sample_ids = [
+            str(invoice_id)
+            for invoice_id, _ in random.Random(size).sample(keys, min(50, size))
+        ]
+        params = {"invoices": size}
+
+        async def get(
+            url: str, headers: dict[str, str] = headers, **query: str
+        ) -> None:
+            response = await client.get(url, params=query, headers=headers)
+            _ = response.raise_for_status()
+
+        cases = {
+            "list_first_page": lambda: get("/invoices/"),
+            "list_deep_page": lambda cursor=deep_cursor: get(
+                "/invoices/", cursor=cursor
+            ),
+            "list_filtered": lambda: get("/invoices/", client_name="globex"),
+            "list_status": lambda: get("/invoices/", status="sent"),
+            "search_number": lambda size=size: get(
+                "/invoices/search", q=f"bench-{size // 2:07}"
+            ),
+            "search_client": lambda: get("/invoices/search", q="initech"),
+            # Every seeded invoice has "Service line" items: the worst case.
+            "search_broad": lambda: get("/invoices/search", q="service"),
+        }
+        for name, case in cases.items():
+            results.append(
+                Result("api", name, params, await measure_async(case, iterations))
+            )
+            print(results[-1])
+
+        picks = iter(sample_ids * (iterations // len(sample_ids) + 2))
+        results.append(
+            Result(
+                "api",
+                "detail",
+                params,
+                await measure_async(
+                    lambda picks=picks: get(f"/invoices/{next(picks)}"), iterations
+                ),
+            )
+        )
+        print(results[-1])
+    return results
+
+
+async def bench_login(
+    client: AsyncClient, iterations: int, concurrency: int, duration: float
+) -> list[Result]:
+    """POST /auth/access-token: argon2 verify latency and throughput."""
+    async with async_session_maker() as session:
+        user = await ensure_user(session, "login")
+    form = {"username": user.email, "password": BENCH_PASSWORD}
+
+    async def login(_iteration: int = 0) -> None:
+        response = await client.post("/auth/access-token", data=form)
+        _ = response.raise_for_status()
+
+    results = [
+        Result("login", "latency", {}, await measure_async(login, iterations)),
+        Result(
+            "login",
+            "throughput",
+            {"concurrency": concurrency},
+            await measure_throughput(login, concurrency, duration),
+        ),
+    ]
+    print(*results, sep="\n")
+    return results
+
+
+async def bench_end_to_end(
+    client: AsyncClient, size: int, concurrency: list[int], duration: float
+) -> list[Result]:
+    """Requests/s for a read mix (list pages and details) at each concurrency."""
+    async with async_session_maker() as session:
+        user = await seed_invoices(session, size)
+        rows = await session.execute(
+            select(col(Invoice.id)).where(Invoice.user_id == user.id).limit(200)
+        )
+        ids = [str(invoice_id) for invoice_id in rows.scalars().all()]
+    headers = _auth(user)
+
+    async def request(i: int) -> None:
+        url = "/invoices/" if i % 4 == 0 else f"/invoices/{ids[i % len(ids)]}"
+        response = await client.get(url, headers=headers)
+        _ = response.raise_for_status()
+
+    results: list[Result] = []
+    for level in concurrency:
+        results.append(
+            Result(
+                "e2e",
+                "read_mix",
+                {"invoices": size, "concurrency": level},
+                await measure_throughput(request, level, duration),
+            )
+        )
+        print(results[-1])
+    return results
@@ -0,0 +1,55 @@
+"""Time argon2 hash/verify with the configured ARGON2_* settings.
+
+Override any setting through the environment to compare candidates, e.g.
+
+    ARGON2_MEMORY_COST=131072 uv run python scripts/benchmark_password_hash.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+
+async def benchmark(iterations: int, concurrency: int):
+    from app.core.config import settings
+    from app.security import get_password_hash_async, password_hasher, pwd_context
+
+    print(
+        f"argon2 t={settings.ARGON2_TIME_COST} m={settings.ARGON2_MEMORY_COST}KiB "
+        + f"p={settings.ARGON2_PARALLELISM}, {settings.PASSWORD_HASH_WORKERS} workers"
+    )
+
+    hashed = pwd_context.hash("benchmark-password")
+    timings: list[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        _ = pwd_context.verify("benchmark-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(
+        f"verify: median {statistics.median(timings):.1f} ms, "
+        + f"max {max(timings):.1f} ms over {iterations} runs"
+    )
+
+    password_hasher.max_pending = max(password_hasher.max_pending, concurrency)
+    start = time.perf_counter()
+    _ = await asyncio.gather(
+        *(get_password_hash_async(f"password-{i}") for i in range(concurrency))
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"pool: {concurrency} concurrent hashes in {elapsed:.2f}s "
+        + f"({concurrency / elapsed:.1f} hashes/s)"
+    )
+
+
+if __name__ == "__main__":
+    sys.path.append(os.getcwd())
+
+    asyncio.run(
+        benchmark(
+            iterations=int(os.getenv("ITERATIONS", "20")),
+            concurrency=int(os.getenv("CONCURRENCY", "32")),
+        )
+    )
@@ -1,7 +1,19 @@
 import asyncio
 import os
+
 from sqlalchemy import text
-from app.db import engine
+from sqlmodel import SQLModel
+
+from app.db import async_session_maker, engine
+from app.models import (
+    INVOICE_SEARCH_DOCUMENT,
+    InvoiceCounter,
+    InvoiceNumbering,
+    LineItem,
+    Subscription,
+    UsageCounter,
+)
+from app.services.analytics import rebuild_rollups
 
 
 async def fix_schema():
@@ -38,9 +50,241 @@ async def fix_schema():
         else:
             print("'provider_id' column already exists.")
 
+    await add_invoice_indexes()
+    await migrate_line_items()
+    await migrate_invoice_templates()
+    await migrate_invoice_versions()
+    await migrate_invoice_search()
+    await migrate_invoice_numbering()
+    await migrate_plan_usage()
+
     print("Schema fix complete.")
 
 
+INVOICE_INDEXES = {
+    "ix_invoice_user_date_id": "ON invoice (user_id, date DESC, id DESC)",
+    "ix_invoice_user_status": "ON invoice (user_id, status)",
+    "ix_invoice_client_name_trgm": "ON invoice USING gin (client_name gin_trgm_ops)",
+}
+
+
+async def add_invoice_indexes():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and
+    # it is what keeps a live invoice table writable while indexes build.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        _ = await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+        for name, definition in INVOICE_INDEXES.items():
+            print(f"Ensuring index '{name}'...")
+            _ = await conn.execute(
+                text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+            )
+
+        result = await conn.execute(
+            text(
+                "SELECT user_id, invoice_number, COUNT(*) FROM invoice "
+                + "GROUP BY user_id, invoice_number HAVING COUNT(*) > 1"
+            )
+        )
+        duplicates = result.all()
+        if duplicates:
+            # Imports upsert on (user_id, invoice_number) and fail outright
+            # without this index, so stop here rather than finish half done.
+            print(
+                "Cannot create unique index 'ix_invoice_user_number': "
+                + f"{len(duplicates)} duplicated invoice numbers must be renamed first:"
+            )
+            for user_id, invoice_number, count in duplicates:
+                print(f"  user {user_id}: '{invoice_number}' x{count}")
+            raise SystemExit(1)
+
+        print("Ensuring index 'ix_invoice_user_number'...")
+        _ = await conn.execute(
+            text(
+                "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_invoice_user_number "
+                + "ON invoice (user_id, invoice_number)"
+            )
+        )
+
+
+async def migrate_line_items():
+    async with engine.begin() as conn:
+        print("Ensuring invoice money columns...")
+        for column in ("subtotal", "vat_amount"):
+            _ = await conn.execute(
+                text(
+                    f"ALTER TABLE invoice ADD COLUMN IF NOT EXISTS {column} "
+                    + "NUMERIC(14, 2) NOT NULL DEFAULT 0"
+                )
+            )
+        result = await conn.execute(
+            text(
+                "SELECT data_type FROM information_schema.columns "
+                + "WHERE table_name = 'invoice' AND column_name = 'total_amount'"
+            )
+        )
+        if result.scalar() != "numeric":
+            print("Converting 'total_amount' to NUMERIC(14, 2)...")
+            _ = await conn.execute(
+                text(
+                    "ALTER TABLE invoice ALTER COLUMN total_amount "
+                    + "TYPE NUMERIC(14, 2) USING ROUND(total_amount::numeric, 2)"
+                )
+            )
+
+        await conn.run_sync(
+            lambda sync_conn: LineItem.__table__.create(sync_conn, checkfirst=True)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownLambdaType, reportUnknownMemberType]
+        )
+
+        # Same arithmetic as services.line_items.compute_totals: each line
+        # and its VAT rounded to the cent, VAT rate defaulting to the
+        # invoice-wide content["vat_rate"].
+        print("Backfilling line items from invoice content...")
+        result = await conn.execute(
+            text(
+                """
+                INSERT INTO lineitem (id, invoice_id, user_id, position, description,
+                                      quantity, unit_price, vat_rate, line_total, vat_amount)
+                SELECT gen_random_uuid(), i.id, i.user_id, e.position,
+                       COALESCE(e.item->>'description', ''), q.quantity, q.unit_price,
+                       q.vat_rate, ROUND(q.quantity * q.unit_price, 2),
+                       ROUND(ROUND(q.quantity * q.unit_price, 2) * q.vat_rate / 100, 2)
+                FROM invoice i
+                CROSS JOIN LATERAL jsonb_array_elements(i.content::jsonb -> 'items')
+                    WITH ORDINALITY AS e(item, position)
+                CROSS JOIN LATERAL (
+                    SELECT COALESCE((e.item->>'quantity')::numeric, 0) AS quantity,
+                           COALESCE((e.item->>'unit_price')::numeric, 0) AS unit_price,
+                           COALESCE((e.item->>'vat_rate')::numeric,
+                                    (i.content::jsonb->>'vat_rate')::numeric, 0) AS vat_rate
+                ) q
+                WHERE jsonb_typeof(i.content::jsonb -> 'items') = 'array'
+                  AND NOT EXISTS (SELECT 1 FROM lineitem l WHERE l.invoice_id = i.id)
+                """
+            )
+        )
+        print(f"Inserted {result.rowcount} line items.")
+
+        print("Recomputing invoice totals from line items...")
+        _ = await conn.execute(
+            text(
+                """
+                UPDATE invoice i
+                SET subtotal = t.subtotal, vat_amount = t.vat_amount,
+                    total_amount = t.subtotal + t.vat_amount
+                FROM (
+                    SELECT invoice_id, SUM(line_total) AS subtotal,
+                           SUM(vat_amount) AS vat_amount
+                    FROM lineitem GROUP BY invoice_id
+                ) t
+                WHERE t.invoice_id = i.id
+                """
+            )
+        )
+        _ = await conn.execute(
+            text(
+                "UPDATE invoice SET subtotal = total_amount "
+                + "WHERE content IS NULL OR NOT (content::jsonb ? 'items')"
+            )
+        )
+
+    async with engine.begin() as conn:
+        print("Ensuring analytics rollup tables...")
+        for name in ("invoicedailyrollup", "clientmonthlyrollup"):
+            await conn.run_sync(SQLModel.metadata.tables[name].create, checkfirst=True)
+
+    # Totals may have changed, so the analytics rollups must follow.
+    print("Rebuilding analytics rollups...")
+    async with async_session_maker() as session:
+        await rebuild_rollups(session)
+        await session.commit()
+
+
+async def migrate_invoice_templates():
+    async with engine.begin() as conn:
+        print("Ensuring invoice template tables...")
+        _ = await conn.execute(
+            text("ALTER TABLE invoice ADD COLUMN IF NOT EXISTS template_name VARCHAR")
+        )
+        await conn.run_sync(
+            SQLModel.metadata.tables["invoicetemplate"].create, checkfirst=True
+        )
+        _ = await conn.execute(
+            text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_invoicetemplate_user_name "
+                + "ON invoicetemplate (user_id, name)"
+            )
+        )
+
+
+async def migrate_invoice_versions():
+    async with engine.begin() as conn:
+        print("Ensuring invoice version columns...")
+        _ = await conn.execute(
+            text(
+                "ALTER TABLE invoice ADD COLUMN IF NOT EXISTS version "
+                + "INTEGER NOT NULL DEFAULT 1"
+            )
+        )
+        _ = await conn.execute(
+            text(
+                "ALTER TABLE invoice ADD COLUMN IF NOT EXISTS updated_at "
+                + "TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"
+            )
+        )
+
+
+async def migrate_invoice_search():
+    async with engine.begin() as conn:
+        # Adding a stored generated column rewrites the table under an
+        # exclusive lock; run this outside busy hours on large tables.
+        print("Ensuring invoice search_vector column...")
+        _ = await conn.execute(
+            text(
+                "ALTER TABLE invoice ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                + f"GENERATED ALWAYS AS ({INVOICE_SEARCH_DOCUMENT}) STORED"
+            )
+        )
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        _ = await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gin"))
+        print("Ensuring index 'ix_invoice_user_search'...")
+        _ = await conn.execute(
+            text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_invoice_user_search "
+                + "ON invoice USING gin (user_id, search_vector)"
+            )
+        )
+
+
+async def migrate_invoice_numbering():
+    async with engine.begin() as conn:
+        print("Ensuring invoice numbering tables...")
+        for table in (InvoiceNumbering.__table__, InvoiceCounter.__table__):  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+            await conn.run_sync(
+                lambda sync_conn, table=table: table.create(sync_conn, checkfirst=True)  # pyright: ignore[reportUnknownLambdaType, reportUnknownMemberType]
+            )
+
+
+async def migrate_plan_usage():
+    async with engine.begin() as conn:
+        print("Ensuring plan usage tables...")
+        # Existing invoices keep a NULL created_at: their creation month is
+        # unknown, so they never count against a limit.
+        _ = await conn.execute(
+            text(
+                "ALTER TABLE invoice ADD COLUMN IF NOT EXISTS created_at "
+                + "TIMESTAMP WITH TIME ZONE"
+            )
+        )
+        for table in (Subscription.__table__, UsageCounter.__table__):  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+            await conn.run_sync(
+                lambda sync_conn, table=table: table.create(sync_conn, checkfirst=True)  # pyright: ignore[reportUnknownLambdaType, reportUnknownMemberType]
+            )
+
+
 if __name__ == "__main__":
     # Ensure we can import app
     import sys
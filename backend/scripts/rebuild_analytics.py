@@ -0,0 +1,24 @@
+import asyncio
+import os
+import uuid
+
+from app.db import async_session_maker
+from app.services.analytics import rebuild_rollups
+
+
+async def rebuild(user_id: uuid.UUID | None):
+    scope = f"user {user_id}" if user_id else "all users"
+    print(f"Rebuilding analytics rollups for {scope}...")
+    async with async_session_maker() as session:
+        await rebuild_rollups(session, user_id)
+        await session.commit()
+    print("Rebuild complete.")
+
+
+if __name__ == "__main__":
+    # Ensure we can import app
+    import sys
+
+    sys.path.append(os.getcwd())
+
+    asyncio.run(rebuild(uuid.UUID(sys.argv[1]) if len(sys.argv) > 1 else None))
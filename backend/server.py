@@ -1,13 +1,152 @@
-import uvicorn
+# pyright: reportMissingTypeStubs=false
+import asyncio
 import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import uvicorn
 from dotenv import load_dotenv
+from fastapi import FastAPI
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+from typing_extensions import override
+from uvicorn_worker import UvicornWorker
 
 _ = load_dotenv()
 
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+
+async def _prepare_database() -> None:
+    from app.db import engine, init_db
+
+    await init_db()
+    # Workers must not inherit the master's open connections.
+    await engine.dispose()
+
+
+class _Worker(UvicornWorker):
+    def __init__(self, *args: Any, **kwargs: Any):  # pyright: ignore[reportExplicitAny, reportAny]
+        super().__init__(*args, **kwargs)
+        # Stop waiting on in-flight requests a little before gunicorn kills
+        # the worker, so the app's shutdown still runs.
+        graceful_timeout = int(self.cfg.graceful_timeout)  # pyright: ignore[reportAny]
+        self.config.timeout_graceful_shutdown = max(1, graceful_timeout - 5)
+
+
+class ProductionServer(BaseApplication):
+    """gunicorn serving the app with uvicorn workers, loaded once in the master.
+
+    With ``preload_app`` the master imports the app, compiles the templates
+    and creates the schema before forking, and every worker shares that copy
+    on write. Only one worker at a time runs the email and job workers; when
+    it exits, its replacement takes them over. Every worker writes its
+    metrics to PROMETHEUS_MULTIPROC_DIR, so a scrape of /metrics covers the
+    whole server.
+    """
+
+    def __init__(self, options: dict[str, object]):
+        self.options: dict[str, object] = options
+        super().__init__()
+
+    @override
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    @override
+    def load(self) -> FastAPI:
+        from app.main import app
+        from app.services.templates import template_registry
+
+        _ = template_registry.precompile()
+        asyncio.run(_prepare_database())
+        app.state.schema_ready = True
+        return app
+
+
+def _pre_fork(server: Arbiter, worker: Worker) -> None:
+    # Runs in the master, which reaps an exited worker before forking its
+    # replacement, so the background workers never run twice.
+    workers: dict[int, Worker] = server.WORKERS
+    worker.run_background = not any(  # pyright: ignore[reportAttributeAccessIssue]
+        getattr(other, "run_background", False) for other in workers.values()
+    )
+
+
+def _post_fork(_server: Arbiter, worker: Worker) -> None:
+    from app.main import app
+
+    app.state.run_background_workers = worker.run_background  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType]
+
+
+def _child_exit(_server: Arbiter, worker: Worker) -> None:
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)  # pyright: ignore[reportUnknownMemberType]
+
+
+def run_production(host: str, port: int, workers: int) -> None:
+    """Serve with ``workers`` processes (see ``ProductionServer``).
+
+    Workers exit after WORKER_MAX_REQUESTS requests (plus up to 10% jitter)
+    and are replaced with a fresh fork. SIGTERM/SIGINT drain every worker:
+    each stops accepting, finishes in-flight requests and runs the app's
+    shutdown; stragglers are killed after GRACEFUL_TIMEOUT seconds.
+    """
+    max_requests = int(os.getenv("WORKER_MAX_REQUESTS", "10000"))
+    # Each worker has its own render pool; share the cores between them
+    # unless the size is set explicitly. Must happen before Settings loads.
+    _ = os.environ.setdefault(
+        "PDF_RENDER_WORKERS", str(max(1, _cpu_count() // workers))
+    )
+    # Must be set before prometheus_client is imported.
+    metrics_dir = None
+    if shared_dir := os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Files left by a previous run would be counted with this one's.
+        for path in Path(shared_dir).glob("*.db"):
+            path.unlink(missing_ok=True)
+    else:
+        metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(
+            prefix="invoice-metrics-"
+        )
+
+    master = os.getpid()
+    try:
+        ProductionServer(
+            {
+                "bind": f"[{host}]:{port}" if ":" in host else f"{host}:{port}",
+                "workers": workers,
+                "worker_class": _Worker,
+                "preload_app": True,
+                "max_requests": max_requests,
+                "max_requests_jitter": max_requests // 10,
+                "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+                "pre_fork": _pre_fork,
+                "post_fork": _post_fork,
+                "child_exit": _child_exit,
+            }
+        ).run()
+    finally:
+        # Workers are forked inside run() and unwind through here on exit.
+        if metrics_dir and os.getpid() == master:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
     host = os.getenv("BACKEND_HOST", "0.0.0.0")
-    port = int(os.getenv("BACKEND_PORT", 8000))
-    # In development, reload is useful. In production, it might be disabled,
-    # but for this setup we'll keep it simple or check for env (e.g. ENV=dev)
-    reload = os.getenv("ENV", "dev") == "dev"
-    uvicorn.run("app.main:app", host=host, port=port, reload=reload)
+    port = int(os.getenv("BACKEND_PORT", "8000"))
+    if os.getenv("ENV", "dev") == "dev":
+        uvicorn.run("app.main:app", host=host, port=port, reload=True)
+    else:
+        # WEB_CONCURRENCY is the conventional name used by other servers too.
+        workers = int(os.getenv("WEB_CONCURRENCY", "0")) or _cpu_count()
+        run_production(host, port, workers)
@@ -0,0 +1,48 @@
+from collections.abc import AsyncGenerator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+from app.security import create_access_token
+
+EMAIL = "invoices@example.com"
+
+
+async def _delete_user_data(session: AsyncSession, email: str) -> None:
+    user_ids = f"SELECT id FROM \"user\" WHERE email = '{email}'"
+    for table in (
+        "invoicedailyrollup",
+        "clientmonthlyrollup",
+        "invoiceimport",
+        "emailoutbox",
+        "job",
+        "invoice",
+        "invoicetemplate",
+        "invoicenumbering",
+        "invoicecounter",
+        "usagecounter",
+        "subscription",
+    ):
+        _ = await session.execute(
+            text(f"DELETE FROM {table} WHERE user_id IN ({user_ids})")
+        )
+    _ = await session.execute(text(f"DELETE FROM \"user\" WHERE email = '{email}'"))
+    await session.commit()
+
+
+@pytest.fixture
+async def user(session: AsyncSession) -> AsyncGenerator[User, None]:
+    await _delete_user_data(session, EMAIL)
+    user = User(email=EMAIL, full_name="Invoice Owner", hashed_password="x")
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    yield user
+    await _delete_user_data(session, EMAIL)
+
+
+@pytest.fixture
+def auth_headers(user: User) -> dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
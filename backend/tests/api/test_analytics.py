@@ -0,0 +1,65 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import User
+from app.services.analytics import rebuild_rollups
+
+
+@pytest.mark.asyncio
+async def test_incremental_rollups_match_rebuild(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    created: list[str] = []
+    for i, (client_name, amount) in enumerate(
+        [("Acme", 100.0), ("Acme", 50.5), ("Globex", 20.0)]
+    ):
+        response = await client.post(
+            "/invoices/",
+            json={
+                "invoice_number": f"AN-{i}",
+                "date": f"2024-0{i + 1}-15T00:00:00",
+                "client_name": client_name,
+                "total_amount": amount,
+                "status": "sent",
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        created.append(response.json()["id"])  # pyright: ignore[reportAny]
+
+    _ = await client.put(
+        f"/invoices/{created[0]}", json={"status": "paid"}, headers=auth_headers
+    )
+    _ = await client.delete(f"/invoices/{created[2]}", headers=auth_headers)
+
+    response = await client.get("/analytics/summary", headers=auth_headers)
+    assert response.status_code == 200
+    incremental = response.json()  # pyright: ignore[reportAny]
+    assert incremental["invoice_count"] == 2
+    assert incremental["total_amount"] == pytest.approx(150.5)
+    assert incremental["outstanding_amount"] == pytest.approx(50.5)
+    assert incremental["top_clients"][0]["client_name"] == "Acme"
+
+    await rebuild_rollups(session, user.id)
+    await session.commit()
+    response = await client.get("/analytics/summary", headers=auth_headers)
+    assert response.json() == incremental
+
+
+@pytest.mark.asyncio
+async def test_user_rebuild_leaves_invoice_table_writable(
+    session: AsyncSession, user: User
+):
+    assert user.id
+    await rebuild_rollups(session, user.id)
+    async with AsyncSession(session.bind) as writer:
+        # Fails straight away if the rebuild still held a table lock.
+        _ = await writer.execute(
+            text("LOCK TABLE invoice IN ROW EXCLUSIVE MODE NOWAIT")
+        )
+    await session.rollback()
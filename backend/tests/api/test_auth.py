@@ -1,9 +1,21 @@
 import pytest
 from httpx import AsyncClient
-from app.models import User
-from sqlmodel import select
+from passlib.context import CryptContext
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.models import User
+from app.security import password_hasher, pwd_context
+
+# Cheaper than the configured argon2 parameters, like a hash stored before
+# they were raised.
+old_context = CryptContext(
+    schemes=["argon2"],
+    argon2__rounds=1,
+    argon2__memory_cost=8192,
+    argon2__parallelism=1,
+)
 
 
 @pytest.mark.asyncio
@@ -77,3 +89,35 @@ async def test_google_callback_existing_user(
     result = await session.execute(select(User).where(User.email == "test@example.com"))
     users = result.scalars().all()
     assert len(users) == 1
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password(
+    client: AsyncClient, session: AsyncSession, user: User
+):
+    user.hashed_password = old_context.hash("secret")
+    session.add(user)
+    await session.commit()
+
+    response = await client.post(
+        "/auth/access-token", data={"username": user.email, "password": "secret"}
+    )
+
+    assert response.status_code == 200
+    await session.refresh(user)
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert pwd_context.verify("secret", user.hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_login_is_shed_when_hashing_is_saturated(
+    client: AsyncClient, user: User, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    response = await client.post(
+        "/auth/access-token", data={"username": user.email, "password": "secret"}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(password_hasher.retry_after)
@@ -0,0 +1,65 @@
+import pytest
+from aiosmtpd.controller import Controller
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models import Invoice, User
+from app.services import mailer
+from app.services.mailer import EmailWorker, SmtpPool
+
+
+@pytest.mark.asyncio
+async def test_emails_are_queued_and_delivered(
+    client: AsyncClient,
+    session: AsyncSession,
+    auth_headers: dict[str, str],
+    smtp_server: Controller,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    for number, email in (("MAIL-1", "a@example.com"), ("MAIL-2", None)):
+        _ = await client.post(
+            "/invoices/",
+            json={
+                "invoice_number": number,
+                "client_name": "Acme",
+                "client_email": email,
+                "status": "sent",
+            },
+            headers=auth_headers,
+        )
+
+    batch = await client.post(
+        "/invoices/email",
+        json={"filters": {"status": "sent"}, "subject": "Month end"},
+        headers=auth_headers,
+    )
+    assert batch.status_code == 202
+    assert batch.json() == {"queued": 1, "skipped": 1}
+
+    async def fake_render(invoice: Invoice, user: User, template: object) -> bytes:  # pyright: ignore[reportUnusedParameter]
+        return b"%PDF-" + invoice.invoice_number.encode()
+
+    monkeypatch.setattr(mailer, "render_invoice_pdf", fake_render)
+    pool = SmtpPool(smtp_server.hostname, smtp_server.port, size=2)
+    worker = EmailWorker(
+        pool, session_factory=async_sessionmaker(session.bind, class_=AsyncSession)
+    )
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+    pool.close()
+
+    [delivered] = smtp_server.handler.messages  # pyright: ignore[reportAny]
+    assert b"Subject: Month end" in delivered
+
+    listing = await client.get("/invoices/", headers=auth_headers)
+    invoice_id = next(
+        i["id"]  # pyright: ignore[reportAny]
+        for i in listing.json()["items"]  # pyright: ignore[reportAny]
+        if i["invoice_number"] == "MAIL-1"
+    )
+    deliveries = await client.get(
+        f"/invoices/{invoice_id}/emails", headers=auth_headers
+    )
+    [delivery] = deliveries.json()  # pyright: ignore[reportAny]
+    assert delivery["status"] == "sent"
+    assert delivery["attempts"] == 1
@@ -0,0 +1,20 @@
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_readiness_follows_lifespan(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    assert (await client.get("/health/live")).status_code == 200
+
+    monkeypatch.setattr(app.state, "ready", False, raising=False)
+    response = await client.get("/health/ready")
+    assert response.status_code == 503
+
+    monkeypatch.setattr(app.state, "ready", True)
+    response = await client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
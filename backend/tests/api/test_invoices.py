@@ -0,0 +1,421 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import col, select
+
+from app.models import Invoice, LineItem, User
+
+
+async def _seed(session: AsyncSession, user: User, count: int) -> None:
+    assert user.id
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        session.add(
+            Invoice(
+                invoice_number=f"INV-{i:03}",
+                date=start + timedelta(days=i),
+                client_name="Acme Corp" if i % 2 else "Globex",
+                status="paid" if i % 3 == 0 else "draft",
+                user_id=user.id,
+            )
+        )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_invoices_cursor_pagination(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    await _seed(session, user, 7)
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params: dict[str, str | int] = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/invoices/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()  # pyright: ignore[reportAny]
+        seen.extend(item["invoice_number"] for item in page["items"])  # pyright: ignore[reportAny]
+        cursor = page["next_cursor"]  # pyright: ignore[reportAny]
+        if not cursor:
+            break
+
+    assert seen == [f"INV-{i:03}" for i in reversed(range(7))]
+
+
+@pytest.mark.asyncio
+async def test_list_invoices_filters(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    await _seed(session, user, 6)
+
+    response = await client.get(
+        "/invoices/",
+        params={"client_name": "acme", "status": "draft"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    numbers = {item["invoice_number"] for item in response.json()["items"]}  # pyright: ignore[reportAny]
+    assert numbers == {"INV-001", "INV-005"}
+
+    response = await client.get(
+        "/invoices/",
+        params={"date_from": "2024-01-03T00:00:00", "date_to": "2024-01-04T00:00:00"},
+        headers=auth_headers,
+    )
+    numbers = {item["invoice_number"] for item in response.json()["items"]}  # pyright: ignore[reportAny]
+    assert numbers == {"INV-002", "INV-003"}
+
+
+@pytest.mark.asyncio
+async def test_list_invoices_rejects_bad_cursor(
+    client: AsyncClient, auth_headers: dict[str, str]
+):
+    response = await client.get(
+        "/invoices/", params={"cursor": "not-a-cursor"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_search_invoices_ranks_prefix_matches_across_fields(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    assert user.id
+    for number, client_name, email, description in [
+        ("INV-100", "Consulting Partners", None, "Hosting"),
+        ("INV-101", "Globex", "ap@consultancy.example", "Hosting"),
+        ("INV-102", "Initech", None, "Consulting, March"),
+        ("INV-103", "Hooli", None, "Hosting"),
+    ]:
+        session.add(
+            Invoice(
+                invoice_number=number,
+                client_name=client_name,
+                client_email=email,
+                user_id=user.id,
+                content={"items": [{"description": description, "quantity": 1}]},
+            )
+        )
+    await session.commit()
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params: dict[str, str | int] = {"q": "consult", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(
+            "/invoices/search", params=params, headers=auth_headers
+        )
+        assert response.status_code == 200
+        page = response.json()  # pyright: ignore[reportAny]
+        seen.extend(item["invoice_number"] for item in page["items"])  # pyright: ignore[reportAny]
+        cursor = page["next_cursor"]  # pyright: ignore[reportAny]
+        if not cursor:
+            break
+    # Client name outranks email, which outranks a line-item description.
+    assert seen == ["INV-100", "INV-101", "INV-102"]
+
+    response = await client.get(
+        "/invoices/search", params={"q": "inv-103 host"}, headers=auth_headers
+    )
+    assert [item["invoice_number"] for item in response.json()["items"]] == [  # pyright: ignore[reportAny]
+        "INV-103"
+    ]
+
+    response = await client.get(
+        "/invoices/search", params={"q": "&!"}, headers=auth_headers
+    )
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_export_flattens_line_items(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    assert user.id
+    session.add(
+        Invoice(
+            invoice_number="EXP-1",
+            client_name="Acme Corp",
+            user_id=user.id,
+            content={
+                "items": [
+                    {"description": "Design", "quantity": 2, "unit_price": 50.0},
+                    {"description": "Hosting", "quantity": 1, "unit_price": 10.0},
+                ]
+            },
+        )
+    )
+    await _seed(session, user, 1)
+
+    response = await client.get(
+        "/invoices/export", params={"format": "ndjson"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]  # pyright: ignore[reportAny]
+    assert [r["description"] for r in records] == [None, "Design", "Hosting"]  # pyright: ignore[reportAny]
+    assert records[1]["line_total"] == 100.0
+
+    response = await client.get("/invoices/export", headers=auth_headers)
+    lines = response.text.splitlines()
+    assert lines[0].startswith("invoice_id,invoice_number,date")
+    assert len(lines) == 4
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_row_errors_and_is_idempotent(
+    client: AsyncClient, auth_headers: dict[str, str]
+):
+    body = "\n".join(
+        json.dumps(record)
+        for record in [
+            {"invoice_number": "IMP-1", "client_name": "Acme", "total_amount": 10},
+            {"invoice_number": "IMP-2", "client_name": "Acme"},
+            {"invoice_number": "IMP-1", "client_name": "Duplicate"},
+            {"invoice_number": "IMP-3"},
+        ]
+    )
+    headers = auth_headers | {
+        "Content-Type": "application/x-ndjson",
+        "Idempotency-Key": "import-test-1",
+    }
+
+    response = await client.post("/invoices/import", content=body, headers=headers)
+    assert response.status_code == 200
+    result = response.json()  # pyright: ignore[reportAny]
+    assert result["created"] == 2
+    assert [e["row"] for e in result["errors"]] == [3, 4]  # pyright: ignore[reportAny]
+
+    retry = await client.post("/invoices/import", content=body, headers=headers)
+    assert retry.json() == result
+
+    listing = await client.get("/invoices/", headers=auth_headers)
+    assert len(listing.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_invoices_without_a_number_are_numbered_from_the_pattern(
+    client: AsyncClient, auth_headers: dict[str, str]
+):
+    response = await client.put(
+        "/invoice-numbering",
+        json={"pattern": "{YY}-{seq:03}", "reset": "yearly", "gaps": "gapless"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["next_number"].endswith("-001")  # pyright: ignore[reportAny]
+
+    body = "\n".join(
+        json.dumps(record)
+        for record in [
+            {"client_name": "Acme", "date": "2024-05-01T00:00:00"},
+            {"client_name": "Acme", "date": "2025-01-02T00:00:00"},
+            {"client_name": "Acme", "date": "2024-06-01T00:00:00"},
+            {"client_name": "Acme", "invoice_number": "MANUAL-1"},
+        ]
+    )
+    response = await client.post(
+        "/invoices/import",
+        content=body,
+        headers=auth_headers | {"Content-Type": "application/x-ndjson"},
+    )
+    assert response.json()["created"] == 4  # pyright: ignore[reportAny]
+
+    response = await client.post(
+        "/invoices/",
+        json={"client_name": "Globex", "date": "2024-12-31T00:00:00"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["invoice_number"] == "24-003"  # pyright: ignore[reportAny]
+
+    listing = await client.get("/invoices/", headers=auth_headers)
+    numbers = {item["invoice_number"] for item in listing.json()["items"]}  # pyright: ignore[reportAny]
+    assert numbers == {"24-001", "24-002", "24-003", "25-001", "MANUAL-1"}
+
+    response = await client.put(
+        "/invoice-numbering",
+        json={"pattern": "INV-{seq}", "reset": "yearly"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_totals_are_computed_from_line_items(
+    client: AsyncClient, auth_headers: dict[str, str]
+):
+    response = await client.post(
+        "/invoices/",
+        json={
+            "invoice_number": "TOT-1",
+            "client_name": "Acme",
+            "total_amount": 999.0,
+            "content": {
+                "vat_rate": 20,
+                "items": [
+                    {"description": "Design", "quantity": 3, "unit_price": 0.335},
+                    {
+                        "description": "Books",
+                        "quantity": 1,
+                        "unit_price": 10,
+                        "vat_rate": 0,
+                    },
+                ],
+            },
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    invoice = response.json()  # pyright: ignore[reportAny]
+    assert invoice["subtotal"] == 11.01
+    assert invoice["vat_amount"] == 0.2
+    assert invoice["total_amount"] == 11.21
+
+    response = await client.post(
+        "/invoices/",
+        json={
+            "invoice_number": "TOT-2",
+            "client_name": "Acme",
+            "content": {"items": [{"quantity": "NaN", "unit_price": 1}]},
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_writes_line_items(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    body = json.dumps(
+        [
+            {
+                "invoice_number": "LI-1",
+                "client_name": "Acme",
+                "content": {
+                    "vat_rate": 20,
+                    "items": [
+                        {"description": "Design", "quantity": 2, "unit_price": 50},
+                        {"description": "Hosting", "quantity": 1, "unit_price": 9.99},
+                    ],
+                },
+            },
+            {"invoice_number": "LI-2", "client_name": "Globex"},
+        ]
+    )
+    response = await client.post(
+        "/invoices/import",
+        content=body,
+        headers=auth_headers | {"Content-Type": "application/json"},
+    )
+    assert response.json()["created"] == 2  # pyright: ignore[reportAny]
+
+    result = await session.execute(
+        select(LineItem, Invoice.invoice_number)
+        .join(Invoice, col(Invoice.id) == col(LineItem.invoice_id))
+        .where(LineItem.user_id == user.id)
+        .order_by(col(LineItem.position))
+    )
+    rows = result.all()
+    assert [(number, item.description) for item, number in rows] == [
+        ("LI-1", "Design"),
+        ("LI-1", "Hosting"),
+    ]
+    assert [item.line_total for item, _ in rows] == [Decimal("100.00"), Decimal("9.99")]
+
+
+@pytest.mark.asyncio
+async def test_preview_applies_unsaved_edits(
+    client: AsyncClient, auth_headers: dict[str, str]
+):
+    created = await client.post(
+        "/invoices/",
+        json={"invoice_number": "PRE-1", "client_name": "Acme"},
+        headers=auth_headers,
+    )
+    invoice_id = created.json()["id"]  # pyright: ignore[reportAny]
+
+    response = await client.post(
+        f"/invoices/{invoice_id}/preview",
+        params={"format": "html"},
+        json={"client_name": "Globex"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert "Globex" in response.text
+
+    saved = await client.get(f"/invoices/{invoice_id}", headers=auth_headers)
+    assert saved.json()["client_name"] == "Acme"
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_and_if_match(
+    client: AsyncClient, auth_headers: dict[str, str]
+):
+    created = await client.post(
+        "/invoices/",
+        json={"invoice_number": "ETAG-1", "client_name": "Acme"},
+        headers=auth_headers,
+    )
+    invoice_id = created.json()["id"]  # pyright: ignore[reportAny]
+    url = f"/invoices/{invoice_id}"
+
+    first = await client.get(url, headers=auth_headers)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    unchanged = await client.get(url, headers=auth_headers | {"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+
+    listing = await client.get("/invoices/", headers=auth_headers)
+    list_etag = listing.headers["ETag"]
+    relisted = await client.get(
+        "/invoices/", headers=auth_headers | {"If-None-Match": list_etag}
+    )
+    assert relisted.status_code == 304
+
+    updated = await client.put(
+        url, json={"status": "sent"}, headers=auth_headers | {"If-Match": etag}
+    )
+    assert updated.status_code == 200
+    assert updated.json()["version"] == 2
+    assert updated.headers["ETag"] != etag
+
+    stale = await client.put(
+        url, json={"status": "paid"}, headers=auth_headers | {"If-Match": etag}
+    )
+    assert stale.status_code == 412
+    assert stale.headers["ETag"] == updated.headers["ETag"]
+
+    changed = await client.get(url, headers=auth_headers | {"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["status"] == "sent"
+    relisted = await client.get(
+        "/invoices/", headers=auth_headers | {"If-None-Match": list_etag}
+    )
+    assert relisted.status_code == 200
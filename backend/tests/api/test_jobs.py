@@ -0,0 +1,110 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import col
+
+from app.models import Job, User
+from app.services import jobs
+from app.services.jobs import JobContext, JobWorker, enqueue_job
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_reports_status(
+    client: AsyncClient, session: AsyncSession, auth_headers: dict[str, str]
+):
+    response = await client.post("/analytics/rebuild", headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.json()["id"]  # pyright: ignore[reportAny]
+    assert response.json()["status"] == "queued"
+
+    worker = JobWorker(async_sessionmaker(session.bind, class_=AsyncSession))
+    assert await worker.run_once()
+
+    status = await client.get(f"/jobs/{job_id}", headers=auth_headers)
+    assert status.json()["status"] == "succeeded"
+    assert status.json()["progress"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_given_up(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    async def broken(context: JobContext) -> None:  # pyright: ignore[reportUnusedParameter]
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs._handlers, "test.broken", broken)  # pyright: ignore[reportPrivateUsage]
+    monkeypatch.setattr(jobs, "retry_delay", lambda attempts: 0.0)  # pyright: ignore[reportUnknownArgumentType, reportUnknownLambdaType]
+    assert user.id
+    job = enqueue_job(session, user.id, "test.broken")
+    await session.commit()
+
+    worker = JobWorker(
+        async_sessionmaker(session.bind, class_=AsyncSession), max_attempts=2
+    )
+    assert await worker.run_once()
+    first = (await client.get(f"/jobs/{job.id}", headers=auth_headers)).json()  # pyright: ignore[reportAny]
+    assert first["status"] == "queued"
+    assert first["error"] == "RuntimeError: boom"
+
+    assert await worker.run_once()
+    second = (await client.get(f"/jobs/{job.id}", headers=auth_headers)).json()  # pyright: ignore[reportAny]
+    assert second["status"] == "failed"
+    assert second["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_lease_is_extended_while_the_handler_runs(
+    session: AsyncSession, user: User, monkeypatch: pytest.MonkeyPatch
+):
+    sessions = async_sessionmaker(session.bind, class_=AsyncSession)
+    leases: list[datetime] = []
+
+    async def slow(context: JobContext) -> None:
+        for _ in range(2):
+            await asyncio.sleep(0.5)
+            async with sessions() as own:
+                job = await own.get(Job, context.job_id)
+                assert job
+                leases.append(job.run_after)
+
+    monkeypatch.setitem(jobs._handlers, "test.slow", slow)  # pyright: ignore[reportPrivateUsage]
+    assert user.id
+    _ = enqueue_job(session, user.id, "test.slow")
+    await session.commit()
+
+    assert await JobWorker(sessions, lease_seconds=0.6).run_once()
+    assert leases[1] > leases[0]
+
+
+@pytest.mark.asyncio
+async def test_reclaimed_job_is_not_overwritten_by_its_old_worker(
+    session: AsyncSession, user: User, monkeypatch: pytest.MonkeyPatch
+):
+    sessions = async_sessionmaker(session.bind, class_=AsyncSession)
+
+    async def overtaken(context: JobContext) -> None:
+        # Another worker reclaimed the job after this one's lease ran out.
+        async with sessions() as own:
+            _ = await own.execute(
+                update(Job)
+                .where(col(Job.id) == context.job_id)
+                .values(attempts=col(Job.attempts) + 1)
+            )
+            await own.commit()
+
+    monkeypatch.setitem(jobs._handlers, "test.overtaken", overtaken)  # pyright: ignore[reportPrivateUsage]
+    assert user.id
+    job = enqueue_job(session, user.id, "test.overtaken")
+    await session.commit()
+
+    assert await JobWorker(sessions).run_once()
+    await session.refresh(job)
+    assert job.status == "running"
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models import User
+from app.services.usage import PlanLimitExceeded, consume_invoices, reconcile_usage
+
+
+@pytest.fixture(autouse=True)
+def small_free_plan(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "PLAN_INVOICE_LIMITS", {"free": 2, "pro": 0})
+    monkeypatch.setattr(settings, "DEFAULT_PLAN", "free")
+
+
+async def _create(client: AsyncClient, headers: dict[str, str], number: str) -> int:
+    response = await client.post(
+        "/invoices/",
+        json={"invoice_number": number, "client_name": "Acme"},
+        headers=headers,
+    )
+    return response.status_code
+
+
+@pytest.mark.asyncio
+async def test_monthly_limit_counts_creates_and_deletes(
+    client: AsyncClient,
+    session: AsyncSession,
+    user: User,
+    auth_headers: dict[str, str],
+):
+    assert await _create(client, auth_headers, "U-1") == 200
+    assert await _create(client, auth_headers, "U-2") == 200
+    assert await _create(client, auth_headers, "U-3") == 403
+    response = await client.get("/usage", headers=auth_headers)
+    assert response.json()["invoices"] == 2  # pyright: ignore[reportAny]
+    assert response.json()["invoice_limit"] == 2  # pyright: ignore[reportAny]
+
+    listing = await client.get("/invoices/", headers=auth_headers)
+    first_id = listing.json()["items"][0]["id"]  # pyright: ignore[reportAny]
+    _ = await client.delete(f"/invoices/{first_id}", headers=auth_headers)
+    assert await _create(client, auth_headers, "U-4") == 200
+
+    body = '[{"client_name": "A"}, {"client_name": "B"}]'
+    response = await client.post(
+        "/invoices/import",
+        content=body,
+        headers=auth_headers | {"Content-Type": "application/json"},
+    )
+    assert response.status_code == 403
+    listing = await client.get("/invoices/", headers=auth_headers)
+    assert len(listing.json()["items"]) == 2  # pyright: ignore[reportAny]
+
+    assert user.id
+    await reconcile_usage(session, user.id)
+    await session.commit()
+    response = await client.get("/usage", headers=auth_headers)
+    assert response.json()["invoices"] == 2  # pyright: ignore[reportAny]
+
+
+@pytest.mark.asyncio
+async def test_parallel_creates_cannot_overshoot_the_limit(
+    session: AsyncSession, user: User
+):
+    assert user.id
+    user_id = user.id
+    sessions = async_sessionmaker(session.bind, expire_on_commit=False)
+
+    async def take() -> bool:
+        async with sessions() as own:
+            try:
+                await consume_invoices(own, user_id)
+            except PlanLimitExceeded:
+                return False
+            await asyncio.sleep(0.05)  # the insert would happen here
+            await own.commit()
+            return True
+
+    results = await asyncio.gather(*(take() for _ in range(6)))
+    assert results.count(True) == 2
+
+
+@pytest.mark.asyncio
+async def test_user_recount_leaves_other_tenants_writable(
+    session: AsyncSession, user: User
+):
+    assert user.id
+    await reconcile_usage(session, user.id)
+    async with AsyncSession(session.bind) as writer:
+        # Fails straight away if the recount still held a table lock.
+        _ = await writer.execute(
+            text("LOCK TABLE usagecounter, invoice IN ROW EXCLUSIVE MODE NOWAIT")
+        )
+    await session.rollback()
@@ -1,12 +1,11 @@
+import socket
+from collections.abc import AsyncGenerator, Iterator
+
 import pytest
+from aiosmtpd.controller import Controller
 from fastapi.responses import RedirectResponse
-from collections.abc import AsyncGenerator
-from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-
-from app.main import app
-from app.db import get_session
-from app.core.config import settings
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 # Use an in-memory SQLite database for testing or a separate test DB
 # For now, let's use the same DB but rollback transactions, or better, use SQLite for isolation if possible.
@@ -14,9 +13,12 @@ from app.core.config import settings
 # So we must use Postgres. We can rely on the existing DB for now but use transaction rollback.
 # CAUTION: This might affect local DB if not careful. Ideally we should create a test DB.
 # Given the constraints and existing env, I will try to use the existing DB but wrap in transaction.
-
 from sqlalchemy.pool import NullPool
 
+from app.core.config import settings
+from app.db import get_session
+from app.main import app
+
 # Override dependency
 engine = create_async_engine(
     settings.DATABASE_URL, echo=False, future=True, poolclass=NullPool
@@ -81,3 +83,32 @@ def mock_google_sso(monkeypatch: pytest.MonkeyPatch):
             return UserInfo()
 
     monkeypatch.setattr("app.api.auth.GoogleSSO", MockGoogleSSO)
+
+
+class _SmtpRecorder:
+    """aiosmtpd handler that keeps every delivered message."""
+
+    def __init__(self):
+        self.messages: list[bytes] = []
+        self.sessions: set[int] = set()
+
+    async def handle_DATA(
+        self,
+        server: object,  # pyright: ignore[reportUnusedParameter]
+        session: object,
+        envelope: object,
+    ) -> str:
+        self.sessions.add(id(session))
+        self.messages.append(envelope.content)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownArgumentType]
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server() -> Iterator[Controller]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port: int = probe.getsockname()[1]  # pyright: ignore[reportAny]
+    controller = Controller(_SmtpRecorder(), hostname="127.0.0.1", port=port)
+    controller.start()
+    yield controller
+    controller.stop()
@@ -0,0 +1,67 @@
+"""EXPLAIN the hot invoice queries and fail if any falls back to a seq scan.
+
+The test tables are tiny, so sequential scans are disabled for the
+transaction: the planner then only picks one when no usable index exists.
+Run ``scripts/fix_db_schema.py`` first on databases created before the
+indexes were declared.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+import pytest
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.api.invoices import list_invoices_query, search_invoices_query
+from app.models import Invoice, InvoiceFilter
+from app.services.invoice_queries import search_tsquery
+
+USER_ID = uuid.uuid4()
+SEARCH_TSQUERY = search_tsquery("acme host")
+assert SEARCH_TSQUERY is not None
+
+
+async def _explain(
+    session: AsyncSession,
+    query: Select[Any] | SelectOfScalar[Invoice],  # pyright: ignore[reportExplicitAny]
+) -> str:
+    bind = session.get_bind()
+    sql = query.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True})
+    _ = await session.execute(text("SET LOCAL enable_seqscan = off"))
+    result = await session.execute(text(f"EXPLAIN {sql}"))
+    plan = "\n".join(row[0] for row in result.all())  # pyright: ignore[reportAny]
+    await session.rollback()
+    return plan
+
+
+QUERIES: dict[str, Select[Any] | SelectOfScalar[Invoice]] = {  # pyright: ignore[reportExplicitAny]
+    "list_first_page": list_invoices_query(USER_ID, InvoiceFilter()).limit(100),
+    "list_next_page": list_invoices_query(
+        USER_ID, InvoiceFilter(), after=(datetime(2024, 6, 1), uuid.uuid4())
+    ).limit(100),
+    "list_by_status": list_invoices_query(USER_ID, InvoiceFilter(status="paid")),
+    "list_by_client_name": list_invoices_query(
+        USER_ID, InvoiceFilter(client_name="acme")
+    ),
+    "list_by_invoice_number": list_invoices_query(
+        USER_ID, InvoiceFilter(invoice_number="INV-2024")
+    ),
+    "detail": select(Invoice).where(
+        Invoice.id == uuid.uuid4(), Invoice.user_id == USER_ID
+    ),
+    "search": search_invoices_query(USER_ID, SEARCH_TSQUERY).limit(20),
+    "number_lookup": select(Invoice).where(
+        Invoice.user_id == USER_ID, Invoice.invoice_number == "INV-001"
+    ),
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", list(QUERIES))
+async def test_hot_query_uses_index(session: AsyncSession, name: str):
+    plan = await _explain(session, QUERIES[name])
+    assert "Seq Scan" not in plan, f"{name} fell back to a seq scan:\n{plan}"
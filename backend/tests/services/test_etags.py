@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.etags import check_if_match, make_etag, matches_if_none_match
+
+
+def test_make_etag_is_quoted_and_stable():
+    etag = make_etag("a", 1)
+
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("a", 1)
+    assert etag != make_etag("a", 2)
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("x")
+
+    assert matches_if_none_match(etag, etag)
+    assert matches_if_none_match(f'"other", W/{etag}', etag)
+    assert matches_if_none_match("*", etag)
+    assert not matches_if_none_match(None, etag)
+    assert not matches_if_none_match('"other"', etag)
+
+
+def test_if_match_uses_strong_comparison():
+    etag = make_etag("x")
+
+    check_if_match(None, etag)
+    check_if_match(etag, etag)
+    check_if_match("*", etag)
+    with pytest.raises(HTTPException) as exc_info:
+        check_if_match(f"W/{etag}", etag)
+    assert exc_info.value.status_code == 412
@@ -0,0 +1,147 @@
+import asyncio
+import io
+import uuid
+import zipfile
+from collections.abc import AsyncIterator
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.models import Invoice, User
+from app.services import export_service
+from app.services.pdf_service import PdfLayoutError
+from app.services.render_pool import RenderPoolSaturated
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_contains_every_invoice(monkeypatch: pytest.MonkeyPatch):
+    async def fake_render(invoice: Invoice, user: User, template: object) -> bytes:  # pyright: ignore[reportUnusedParameter]
+        if invoice.invoice_number == "BROKEN":
+            raise PdfLayoutError("layout failed")
+        return b"%PDF-" + invoice.invoice_number.encode()
+
+    monkeypatch.setattr(export_service, "render_invoice_pdf", fake_render)
+    user = User(email="export@example.com", hashed_password="x")
+    invoices = [
+        Invoice(
+            id=uuid.uuid4(),
+            invoice_number=number,
+            client_name="Client",
+            user_id=uuid.uuid4(),
+        )
+        for number in ("INV/001", "INV-002", "BROKEN")
+    ]
+
+    chunks = [
+        chunk
+        async for chunk in export_service.stream_invoice_pdfs_zip(
+            invoices, user, concurrency=2
+        )
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    names = archive.namelist()
+    assert archive.testzip() is None
+    assert export_service.invoice_pdf_filename(invoices[0]) in names
+    assert export_service.invoice_pdf_filename(invoices[1]) in names
+    assert "layout failed" in archive.read("errors.txt").decode()
+    assert len(chunks) > 1
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_pulls_invoices_as_the_window_frees_up(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    rendered = 0
+    ahead: list[int] = []
+
+    async def fake_render(invoice: Invoice, user: User, template: object) -> bytes:  # pyright: ignore[reportUnusedParameter]
+        nonlocal rendered
+        await asyncio.sleep(0)
+        rendered += 1
+        return b"%PDF-"
+
+    async def invoices() -> AsyncIterator[Invoice]:
+        for number in range(10):
+            ahead.append(number - rendered)
+            yield Invoice(
+                id=uuid.uuid4(),
+                invoice_number=f"INV-{number}",
+                client_name="Client",
+                user_id=uuid.uuid4(),
+            )
+
+    monkeypatch.setattr(export_service, "render_invoice_pdf", fake_render)
+    user = User(email="export@example.com", hashed_password="x")
+    chunks = [
+        chunk
+        async for chunk in export_service.stream_invoice_pdfs_zip(
+            invoices(), user, concurrency=2
+        )
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert len(archive.namelist()) == 10
+    # Never more than the window's worth of invoices fetched but unrendered.
+    assert max(ahead) < 2
+
+
+@pytest.mark.asyncio
+async def test_stream_zip_gives_up_on_a_pool_that_stays_saturated(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    attempts = 0
+
+    async def fake_render(invoice: Invoice, user: User, template: object) -> bytes:  # pyright: ignore[reportUnusedParameter]
+        nonlocal attempts
+        attempts += 1
+        raise RenderPoolSaturated(retry_after=0)
+
+    monkeypatch.setattr(export_service, "render_invoice_pdf", fake_render)
+    monkeypatch.setattr(settings, "EXPORT_RENDER_MAX_WAIT_SECONDS", -1.0)
+    user = User(email="export@example.com", hashed_password="x")
+    invoice = Invoice(
+        id=uuid.uuid4(),
+        invoice_number="INV-1",
+        client_name="Client",
+        user_id=uuid.uuid4(),
+    )
+
+    chunks = [
+        chunk async for chunk in export_service.stream_invoice_pdfs_zip([invoice], user)
+    ]
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == ["errors.txt"]
+    assert "Render queue is full" in archive.read("errors.txt").decode()
+    assert attempts == 1
+
+
+def test_flatten_rounds_line_totals_like_stored_line_items():
+    row = {
+        "id": uuid.uuid4(),
+        "invoice_number": "INV-1",
+        "date": datetime(2025, 1, 1),
+        "due_date": None,
+        "status": "draft",
+        "client_name": "Client",
+        "client_email": None,
+        "total_amount": 0.0,
+        "content": {
+            "items": [
+                {"quantity": 3, "unit_price": 0.1},
+                {"quantity": "0.5", "unit_price": "0.05"},
+                {"quantity": "n/a", "unit_price": 1},
+            ]
+        },
+    }
+
+    records = list(export_service.flatten_invoice_row(row))
+
+    assert [r["line_total"] for r in records] == [
+        Decimal("0.30"),
+        Decimal("0.03"),
+        None,
+    ]
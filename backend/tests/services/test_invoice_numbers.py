@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.models import InvoiceNumbering
+from app.services.invoice_numbers import (
+    InvalidNumberPattern,
+    compile_pattern,
+    validate_numbering,
+)
+
+
+def test_pattern_renders_date_fields_and_padded_sequence():
+    date = datetime(2025, 3, 9)
+
+    assert compile_pattern("INV-{YYYY}-{seq:05}").render(42, date) == "INV-2025-00042"
+    assert compile_pattern("{YY}{MM}/{seq}").render(7, date) == "2503/7"
+    assert compile_pattern("{seq:03}").render(12345, date) == "12345"
+
+
+@pytest.mark.parametrize(
+    "pattern", ["INV-{YYYY}", "{name}-{seq}", "{seq:x}", "INV}{seq}", "{{seq}}"]
+)
+def test_invalid_patterns_are_rejected(pattern: str):
+    with pytest.raises(InvalidNumberPattern):
+        _ = compile_pattern(pattern)
+
+
+def test_yearly_reset_needs_a_year_in_the_pattern():
+    user_id = uuid.uuid4()
+    validate_numbering(
+        InvoiceNumbering(user_id=user_id, pattern="{YY}-{seq}", reset="yearly")
+    )
+    validate_numbering(
+        InvoiceNumbering(user_id=user_id, pattern="{seq}", reset="never")
+    )
+    with pytest.raises(InvalidNumberPattern):
+        validate_numbering(
+            InvoiceNumbering(user_id=user_id, pattern="{seq}", reset="yearly")
+        )
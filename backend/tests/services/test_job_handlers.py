@@ -0,0 +1,23 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.services.job_handlers import expire_job_results
+
+
+def test_expire_job_results_removes_only_old_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "JOB_RESULT_DIR", str(tmp_path))
+    old, fresh = tmp_path / "old.zip", tmp_path / "fresh.zip"
+    _ = old.write_bytes(b"PK")
+    _ = fresh.write_bytes(b"PK")
+    an_hour_ago = time.time() - 3600
+    os.utime(old, (an_hour_ago, an_hour_ago))
+
+    assert expire_job_results(max_age=60) == 1
+    assert not old.exists()
+    assert fresh.exists()
@@ -0,0 +1,38 @@
+import smtplib
+from email.message import EmailMessage
+
+from aiosmtpd.controller import Controller
+
+from app.services.mailer import SmtpPool, is_permanent, retry_delay
+
+
+def _message(n: int) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "invoices@example.com"
+    message["To"] = "client@example.com"
+    message["Subject"] = f"Invoice {n}"
+    message.set_content("See attached.")
+    return message
+
+
+def test_pool_reuses_connections_across_messages(
+    smtp_server: Controller,
+):
+    recorder = smtp_server.handler  # pyright: ignore[reportAny]
+    pool = SmtpPool(smtp_server.hostname, smtp_server.port, size=1, max_messages=3)
+
+    for n in range(7):
+        pool.send(_message(n))
+    pool.close()
+
+    assert len(recorder.messages) == 7  # pyright: ignore[reportAny]
+    assert pool.connections_opened == 3
+    assert len(recorder.sessions) == 3  # pyright: ignore[reportAny]
+
+
+def test_permanent_errors_and_backoff():
+    assert is_permanent(smtplib.SMTPDataError(554, b"rejected"))
+    assert not is_permanent(smtplib.SMTPDataError(451, b"try later"))
+    assert not is_permanent(smtplib.SMTPServerDisconnected())
+    assert retry_delay(1) <= retry_delay(10) * 2
+    assert retry_delay(50) <= 3600
@@ -0,0 +1,137 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine, text
+
+from app.api.metrics import MetricsMiddleware
+from app.api.metrics import router as metrics_router
+from app.core.config import settings
+from app.services.metrics import (
+    RequestStats,
+    instrument_engine,
+    registry,
+    request_stats,
+)
+from app.services.profiling import SamplingProfiler
+
+_WORKER = """
+from app.services.metrics import pdf_cache_requests, render
+
+pdf_cache_requests.labels(result="miss").inc()
+print(render().decode())
+"""
+
+
+def test_render_sums_every_worker_in_multiprocess_mode(tmp_path: Path):
+    env = os.environ | {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    outputs = [
+        subprocess.run(
+            [sys.executable, "-c", _WORKER],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for _ in range(2)
+    ]
+
+    assert 'pdf_cache_requests_total{result="miss"} 1.0' in outputs[0]
+    assert 'pdf_cache_requests_total{result="miss"} 2.0' in outputs[1]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_is_closed_without_a_token(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    app = FastAPI()
+    app.include_router(metrics_router)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+        assert (await client.get("/metrics")).status_code == 404
+
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+        assert (await client.get("/metrics")).status_code == 401
+        response = await client.get(
+            "/metrics", headers={"Authorization": "Bearer s3cret"}
+        )
+        assert response.status_code == 200
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+
+
+def test_engine_hooks_charge_queries_to_the_current_request():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            _ = conn.execute(text("SELECT 1"))
+            _ = conn.execute(text("SELECT 2"))
+    finally:
+        request_stats.reset(token)
+
+    assert stats.db_queries == 2
+    assert stats.db_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_by_route_template():
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    async def read_thing(thing_id: int):  # pyright: ignore[reportUnusedFunction]
+        return {"id": thing_id}
+
+    app.add_middleware(MetricsMiddleware)
+    route = "/things/{thing_id}"
+    labels = {"method": "GET", "route": route, "status": "200"}
+    count = "http_request_duration_seconds_count"
+    before = registry.get_sample_value(count, labels) or 0
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for thing_id in (1, 2):
+            response = await client.get(f"/things/{thing_id}")
+            assert response.status_code == 200
+            assert response.headers["Server-Timing"].startswith("app;dur=")
+            assert "X-Profile-Id" not in response.headers
+
+    assert registry.get_sample_value(count, labels) == before + 2
+    queries = registry.get_sample_value(
+        "http_request_db_queries_count", {"route": route}
+    )
+    assert queries is not None and queries >= 2
+
+
+def _busy_wait(stop: threading.Event) -> None:
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+def test_sampling_profiler_collects_folded_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_wait, args=(stop,))
+    worker.start()
+    assert worker.ident is not None
+    profiler = SamplingProfiler(worker.ident, interval=0.001)
+    profiler.start()
+    time.sleep(0.05)
+    profiler.stop()
+    stop.set()
+    worker.join()
+
+    folded = profiler.folded()
+    assert "test_metrics:_busy_wait" in folded
+    stack, count = folded.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0 and "threading:Thread.run" in stack
@@ -0,0 +1,93 @@
+import os
+import uuid
+from pathlib import Path
+
+from app.services.pdf_cache import PdfCache
+
+
+def test_get_returns_stored_pdf():
+    cache = PdfCache(max_bytes=1024)
+    key = cache.key_for("<h1>Invoice</h1>")
+    cache.put(key, b"%PDF-1")
+
+    assert cache.get(key) == b"%PDF-1"
+    assert cache.get(cache.key_for("<h1>Other</h1>")) is None
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = PdfCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    _ = cache.get("a")  # "b" is now the oldest entry
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.size == 8
+
+
+def test_skips_entries_larger_than_budget():
+    cache = PdfCache(max_bytes=4)
+    cache.put("big", b"too large")
+
+    assert cache.get("big") is None
+    assert cache.size == 0
+
+
+def test_invalidate_drops_all_renderings_of_invoice(tmp_path: Path):
+    cache = PdfCache(max_bytes=1024, disk_dir=tmp_path)
+    invoice_id = uuid.uuid4()
+    cache.put("old", b"v1", invoice_id=invoice_id)
+    cache.put("new", b"v2", invoice_id=invoice_id)
+    cache.put("other", b"v3", invoice_id=uuid.uuid4())
+
+    cache.invalidate(invoice_id)
+
+    assert cache.get("old") is None
+    assert cache.get("new") is None
+    assert cache.get("other") == b"v3"
+
+
+def test_disk_tier_survives_new_instance(tmp_path: Path):
+    PdfCache(max_bytes=1024, disk_dir=tmp_path).put("abc123", b"%PDF-disk")
+
+    cache = PdfCache(max_bytes=1024, disk_dir=tmp_path)
+    assert cache.get("abc123") == b"%PDF-disk"
+    assert len(cache) == 1
+
+
+def test_eviction_prunes_the_invoice_index():
+    cache = PdfCache(max_bytes=8)
+    for key in ("a", "b", "c"):
+        cache.put(key, b"xxxx", invoice_id=uuid.uuid4())
+
+    assert cache.get("a") is None
+    assert len(cache._keys_by_invoice) == 2  # pyright: ignore[reportPrivateUsage]
+
+
+def test_invalidate_removes_renderings_written_by_other_workers(tmp_path: Path):
+    invoice_id = uuid.uuid4()
+    writer = PdfCache(max_bytes=1024, disk_dir=tmp_path)
+    writer.put("abc123", b"%PDF-1", invoice_id=invoice_id)
+
+    PdfCache(max_bytes=1024, disk_dir=tmp_path).invalidate(invoice_id)
+
+    writer.clear()
+    assert writer.get("abc123", invoice_id) is None
+
+
+def test_sweep_keeps_disk_tier_within_budget(tmp_path: Path):
+    cache = PdfCache(max_bytes=1024, disk_dir=tmp_path)
+    invoice_id = uuid.uuid4()
+    for age, key in enumerate(("newest", "newer", "older", "oldest")):
+        cache.put(key, b"x" * 30, invoice_id=invoice_id)
+        path = tmp_path / "invoices" / str(invoice_id) / f"{key}.pdf"
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+    cache.clear()
+
+    cache.disk_max_bytes = 80
+    assert cache.sweep_disk() == 60
+    assert cache.get("oldest", invoice_id) is None
+    assert cache.get("older", invoice_id) is None
+    assert cache.get("newest", invoice_id) == b"x" * 30
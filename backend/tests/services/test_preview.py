@@ -0,0 +1,65 @@
+import asyncio
+import io
+
+import pytest
+
+from app.services.preview import PreviewCoalescer, pdf_to_png
+
+
+@pytest.mark.asyncio
+async def test_burst_of_submits_renders_once_with_latest_edit():
+    coalescer = PreviewCoalescer(delay=0.05, max_delay=1.0)
+    calls: list[int] = []
+
+    def render(edit: int):
+        async def run() -> int:
+            calls.append(edit)
+            return edit
+
+        return run
+
+    async def submit(edit: int) -> int:
+        await asyncio.sleep(edit * 0.01)
+        return await coalescer.submit("invoice", render(edit))
+
+    results = await asyncio.gather(*(submit(edit) for edit in range(3)))
+
+    assert calls == [2]
+    assert results == [2, 2, 2]
+    assert len(coalescer) == 0
+
+
+@pytest.mark.asyncio
+async def test_continuous_edits_still_render_by_max_delay():
+    coalescer = PreviewCoalescer(delay=0.05, max_delay=0.1)
+    started: list[float] = []
+    loop = asyncio.get_running_loop()
+    first = loop.time()
+
+    async def run() -> None:
+        started.append(loop.time())
+
+    waiters = []
+    for _ in range(8):
+        waiters.append(asyncio.ensure_future(coalescer.submit("invoice", run)))
+        await asyncio.sleep(0.03)
+    _ = await asyncio.gather(*waiters)
+
+    assert len(started) >= 2
+    assert started[0] - first < 0.15
+
+
+def test_pdf_to_png_rasterizes_requested_page():
+    pdfium = pytest.importorskip("pypdfium2")
+    document = pdfium.PdfDocument.new()
+    _ = document.new_page(72, 144)
+    _ = document.new_page(72, 144)
+    buffer = io.BytesIO()
+    document.save(buffer)
+
+    png, page_count = pdf_to_png(buffer.getvalue(), page=1, dpi=144)
+
+    assert page_count == 2
+    assert png.startswith(b"\x89PNG")
+    with pytest.raises(IndexError):
+        _ = pdf_to_png(buffer.getvalue(), page=2, dpi=72)
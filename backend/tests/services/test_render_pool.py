@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.render_pool import (
+    RenderPool,
+    RenderPoolSaturated,
+    RenderTimeout,
+)
+
+
+@pytest.mark.asyncio
+async def test_run_rejects_when_queue_is_full():
+    pool = RenderPool(workers=1, max_queue=0, timeout=1.0, retry_after=7)
+
+    with pytest.raises(RenderPoolSaturated) as exc_info:
+        _ = await pool.run(len, "never rendered")
+
+    assert exc_info.value.retry_after == 7
+    assert pool.pending == 0
+
+
+async def _settled(pool: RenderPool) -> int:
+    # Killed workers are noticed by the executor's management thread.
+    for _ in range(50):
+        if pool.pending == 0:
+            break
+        await asyncio.sleep(0.1)
+    return pool.pending
+
+
+@pytest.mark.asyncio
+async def test_timed_out_render_recycles_the_pool():
+    pool = RenderPool(
+        workers=1, max_queue=2, timeout=2.0, retry_after=1, initializer=None
+    )
+    try:
+        await pool.start()
+        with pytest.raises(RenderTimeout):
+            _ = await pool.run(time.sleep, 30)
+
+        assert await _settled(pool) == 0
+        assert await pool.run(len, "abc") == 3
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_crashed_worker_is_replaced():
+    pool = RenderPool(
+        workers=1, max_queue=2, timeout=5.0, retry_after=1, initializer=None
+    )
+    try:
+        await pool.start()
+        with pytest.raises(BrokenProcessPool):
+            _ = await pool.run(os._exit, 1)  # pyright: ignore[reportPrivateUsage]
+
+        assert await _settled(pool) == 0
+        assert await pool.run(len, "abc") == 3
+    finally:
+        pool.shutdown()
+
+
+def _nap(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def _import_this_module() -> None:
+    # As a worker initializer, keeps importing _nap out of timed renders.
+    return None
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_only_the_overrunning_render():
+    pool = RenderPool(
+        workers=2,
+        max_queue=4,
+        timeout=2.0,
+        retry_after=1,
+        initializer=_import_this_module,
+    )
+    try:
+        await pool.start()
+        slow = asyncio.create_task(pool.run(time.sleep, 30))
+        await asyncio.sleep(1.5)
+        # Still running on the other worker when the slow one is killed.
+        fast = asyncio.create_task(pool.run(_nap, 1.0))
+
+        with pytest.raises(RenderTimeout):
+            await slow
+        assert await fast == 1.0
+        assert await _settled(pool) == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_excludes_time_spent_queued():
+    pool = RenderPool(
+        workers=1,
+        max_queue=2,
+        timeout=1.5,
+        retry_after=1,
+        initializer=_import_this_module,
+    )
+    try:
+        await pool.start()
+        first, second = await asyncio.gather(pool.run(_nap, 1.0), pool.run(_nap, 1.0))
+
+        assert (first, second) == (1.0, 1.0)
+    finally:
+        pool.shutdown()
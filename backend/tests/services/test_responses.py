@@ -0,0 +1,54 @@
+import uuid
+from datetime import UTC, datetime
+
+import sqlalchemy as sa
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from app.api.invoices import SUMMARY_COLUMNS
+from app.api.responses import PydanticJSONResponse
+from app.models import Invoice, InvoicePage, InvoiceSummary
+
+
+def _fastapi_default(model: type[BaseModel], content: object) -> bytes:
+    adapter = TypeAdapter(model)
+    value = adapter.validate_python(content, from_attributes=True)
+    return bytes(JSONResponse(adapter.dump_python(value, mode="json")).body)
+
+
+def _invoice() -> Invoice:
+    return Invoice(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        invoice_number="INV-1",
+        date=datetime(2024, 3, 1, 9, 30),
+        client_name="Acme Corp – Zürich",
+        total_amount=1234.5,
+        subtotal=1028.75,
+        vat_amount=205.75,
+        status="sent",
+        content={"vat_rate": 20, "items": [{"description": "Work", "quantity": 1}]},
+        updated_at=datetime(2024, 3, 2, tzinfo=UTC),
+    )
+
+
+def test_model_matches_fastapi_encoding():
+    invoice = _invoice()
+
+    assert PydanticJSONResponse(invoice).body == _fastapi_default(Invoice, invoice)
+
+
+def test_summary_rows_match_fastapi_encoding():
+    invoice = _invoice()
+    row = {name: getattr(invoice, name) for name in InvoiceSummary.model_fields}
+    page = {"items": [row, row], "next_cursor": "abc"}
+
+    assert PydanticJSONResponse(page).body == _fastapi_default(InvoicePage, page)
+
+
+def test_summary_columns_follow_model_field_order():
+    # List rows are encoded as-is, so their keys must come out in the
+    # order InvoicePage documents.
+    keys = sa.select(*SUMMARY_COLUMNS).selected_columns.keys()
+
+    assert keys == list(InvoiceSummary.model_fields)
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.security import (
+    PasswordHasher,
+    PasswordHashingBusy,
+    pwd_context,
+    verify_and_update_password,
+)
+
+# Cheaper than the configured parameters, as hashes made before they were
+# raised would be.
+old_context = CryptContext(
+    schemes=["argon2"],
+    argon2__rounds=1,
+    argon2__memory_cost=8192,
+    argon2__parallelism=1,
+)
+
+
+@pytest.mark.asyncio
+async def test_hasher_sheds_load_past_max_pending():
+    hasher = PasswordHasher(workers=1, max_pending=1, retry_after=3)
+    release = threading.Event()
+    running = asyncio.create_task(hasher.run(release.wait, 5))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(PasswordHashingBusy) as exc_info:
+        _ = await hasher.run(pwd_context.hash, "secret")
+
+    assert exc_info.value.retry_after == 3
+    release.set()
+    assert await running is True
+    assert hasher.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_outdated_hash_is_replaced_on_verify():
+    old_hash = old_context.hash("secret")
+
+    verified, new_hash = await verify_and_update_password("secret", old_hash)
+
+    assert verified
+    assert new_hash is not None
+    assert not pwd_context.needs_update(new_hash)
+    assert f"m={settings.ARGON2_MEMORY_COST}," in new_hash
+    assert await verify_and_update_password("secret", new_hash) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_wrong_password_is_not_rehashed():
+    old_hash = old_context.hash("secret")
+
+    assert await verify_and_update_password("wrong", old_hash) == (False, None)
@@ -0,0 +1,91 @@
+import uuid
+from pathlib import Path
+
+import pytest
+from jinja2 import TemplateSyntaxError
+from jinja2.exceptions import SecurityError
+
+from app.models import Invoice, InvoiceTemplate, User
+from app.services.templates import (
+    TemplateBudgetExceeded,
+    TemplateRegistry,
+    template_for,
+)
+
+
+def _invoice(template_name: str | None = None) -> Invoice:
+    return Invoice(
+        id=uuid.uuid4(),
+        invoice_number="INV-1",
+        client_name="Client",
+        user_id=uuid.uuid4(),
+        template_name=template_name,
+    )
+
+
+def test_precompile_writes_shared_bytecode(tmp_path: Path):
+    registry = TemplateRegistry(bytecode_dir=tmp_path)
+    assert registry.precompile() >= 1
+    assert list(tmp_path.iterdir())
+
+    # A second process pointed at the same directory gets the same stamp.
+    other = TemplateRegistry(bytecode_dir=tmp_path)
+    assert other.builtin().version == registry.builtin().version
+    user = User(email="t@example.com", hashed_password="x")
+    assert "INV-1" in other.builtin().render(invoice=_invoice(), user=user)
+
+
+def test_user_revisions_are_versioned(tmp_path: Path):
+    registry = TemplateRegistry(bytecode_dir=tmp_path)
+    row = InvoiceTemplate(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), name="plain", source="v1 {{ n }}"
+    )
+    first = registry.for_revision(row)
+    assert first.render(n=1) == "v1 1"
+
+    row.source, row.version = "v2 {{ n }}", 2
+    second = registry.for_revision(row)
+    assert second.render(n=1) == "v2 1"
+    assert second.version != first.version
+    assert registry.for_revision(row).template is second.template
+
+    templates = {"plain": second}
+    assert template_for(_invoice("plain"), templates) is second
+    assert template_for(_invoice("gone"), templates).version.startswith("builtin:")
+
+
+def test_user_templates_are_sandboxed(tmp_path: Path):
+    registry = TemplateRegistry(bytecode_dir=tmp_path)
+    row = InvoiceTemplate(
+        id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        name="evil",
+        source="{{ user.__class__.__mro__ }}",
+    )
+    with pytest.raises(SecurityError):
+        _ = registry.for_revision(row).render(user=object())
+    with pytest.raises(TemplateSyntaxError):
+        registry.check_syntax("{% if %}")
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "{% for a in range(1000) %}{% for b in range(1000) %}{% endfor %}{% endfor %}",
+        "{% for a in s %}{% for b in s %}{% endfor %}{% endfor %}",
+        "{{ s * 100000 }}",
+        "{% for a in range(100) %}{{ s }}{% endfor %}",
+    ],
+)
+def test_user_templates_have_a_render_budget(tmp_path: Path, source: str):
+    registry = TemplateRegistry(
+        bytecode_dir=tmp_path, max_operations=10_000, max_output=10_000
+    )
+    row = InvoiceTemplate(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), name="slow", source=source
+    )
+    with pytest.raises(TemplateBudgetExceeded):
+        _ = registry.for_revision(row).render(s="x" * 1000)
+
+    row.source, row.version = "{% for a in range(3) %}{{ a }}{% endfor %}", 2
+    assert registry.for_revision(row).render() == "012"
@@ -0,0 +1,51 @@
+import uuid
+
+from app.models import User
+from app.services.user_cache import LocalSharedTier, UserCache
+
+
+def _user(**kwargs: object) -> User:
+    return User.model_validate(
+        {"id": uuid.uuid4(), "email": "cache@example.com", "hashed_password": "x"}
+        | kwargs
+    )
+
+
+def test_get_returns_detached_copy():
+    cache = UserCache(ttl=60, max_entries=10)
+    user = _user()
+    cache.set(user)
+
+    cached = cache.get(user.id)  # pyright: ignore[reportArgumentType]
+    assert cached is not None
+    assert cached is not user
+    assert cached.email == user.email
+
+
+def test_inactive_users_are_not_cached():
+    cache = UserCache(ttl=60, max_entries=10)
+    user = _user(is_active=False)
+    cache.set(user)
+
+    assert cache.get(user.id) is None  # pyright: ignore[reportArgumentType]
+
+
+def test_expired_entries_are_dropped():
+    cache = UserCache(ttl=-1, max_entries=10)
+    user = _user()
+    cache.set(user)
+
+    assert cache.get(user.id) is None  # pyright: ignore[reportArgumentType]
+
+
+def test_invalidate_clears_shared_tier():
+    shared = LocalSharedTier()
+    writer = UserCache(ttl=60, max_entries=10, shared=shared)
+    reader = UserCache(ttl=60, max_entries=10, shared=shared)
+    user = _user()
+    writer.set(user)
+
+    assert reader.get(user.id) is not None  # pyright: ignore[reportArgumentType]
+    writer.invalidate(user.id)
+    reader.clear()
+    assert reader.get(user.id) is None  # pyright: ignore[reportArgumentType]
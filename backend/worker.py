@@ -0,0 +1,45 @@
+import asyncio
+import os
+import signal
+
+from dotenv import load_dotenv
+
+_ = load_dotenv()
+
+
+async def main(concurrency: int) -> None:
+    # Imported after load_dotenv so Settings sees the .env values.
+    from app.core.config import settings
+    from app.db import init_db
+    from app.services import job_handlers  # noqa: F401  (registers job kinds)
+    from app.services.jobs import JobWorker
+    from app.services.mailer import email_worker
+    from app.services.render_pool import render_pool
+
+    await init_db()
+    await render_pool.start()
+    job_worker = JobWorker(
+        concurrency=concurrency,
+        poll_interval=settings.JOB_POLL_SECONDS,
+        lease_seconds=settings.JOB_LEASE_SECONDS,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+    )
+    job_worker.start()
+    if settings.EMAIL_WORKER_ENABLED:
+        email_worker.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    _ = await stopping.wait()
+
+    await job_worker.stop()
+    await email_worker.stop()
+    render_pool.shutdown()
+
+
+if __name__ == "__main__":
+    # Runs background jobs (and the email outbox) outside the API processes;
+    # any number of these can share the queue.
+    asyncio.run(main(int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))))
@@ -33,7 +33,7 @@ export const auth = {
 export const invoices = {
   list: async () => {
     const response = await api.get('/invoices/');
-    return response.data;
+    return response.data.items;
   },
   get: async (id: string) => {
     const response = await api.get(`/invoices/${id}`);